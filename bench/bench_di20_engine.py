@@ -0,0 +1,56 @@
+# DI20 스크리너 계산 벤치마크: 종목별 pandas 루프 vs (종목 x 날짜) NumPy 엔진
+# DB 없이 합성 데이터로 측정. 실행: python -m bench.bench_di20_engine
+import time
+import numpy as np
+import pandas as pd
+from nasdaq_100 import nasdaq_100, SNP_500
+from kr_index import KOSPI_50, KOSDAQ_150
+from worker.di20_engine import screen_low_di20
+from worker.get_low_di20_stocks import _is_low_di20
+
+
+def make_panel(tickers: list[str], days: int = 252, seed: int = 0) -> np.ndarray:
+    """랜덤워크 종가 + 신규 상장(앞쪽 NaN) + 거래정지(중간 NaN)가 섞인 패널"""
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (len(tickers), days)), axis=1))
+    listed = rng.integers(0, days, len(tickers))
+    for i in np.flatnonzero(rng.random(len(tickers)) < 0.1):
+        closes[i, :listed[i]] = np.nan
+    closes[rng.random(closes.shape) < 0.01] = np.nan
+    return closes
+
+
+def pandas_loop(tickers, closes):
+    result = []
+    for ticker, row in zip(tickers, closes):
+        close = pd.Series(row).dropna().reset_index(drop=True)
+        if close.empty:
+            continue
+        curr, p, is_low = _is_low_di20(close)
+        if is_low:
+            result.append((ticker, curr, p))
+    return result
+
+
+def main(repeat: int = 5):
+    tickers = list(dict.fromkeys(nasdaq_100 + SNP_500 + KOSPI_50 + KOSDAQ_150))
+    closes = make_panel(tickers)
+    print(f"4개 유니버스 합집합 {len(tickers)} 종목 x {closes.shape[1]} 일")
+
+    for name, fn in (("pandas", pandas_loop), ("numpy", screen_low_di20)):
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            result = fn(tickers, closes)
+            times.append(time.perf_counter() - t0)
+        print(f"{name:<7} | 최소 {min(times) * 1000:>8.2f}ms | {len(result)}종목")
+
+    expected = pandas_loop(tickers, closes)
+    actual = screen_low_di20(tickers, closes)
+    assert [t for t, _, _ in expected] == [t for t, _, _ in actual]
+    assert np.allclose([q for _, _, q in expected], [q for _, _, q in actual])
+    print("pandas 결과와 일치")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+# 스크리너 가격 조회 벤치마크: 티커별 루프 vs 유니버스 일괄 조회 vs 증분 상태 vs 지표 테이블
+# 실행: python -m bench.bench_di20_query [nasdaq_100|SNP_500|KOSPI_50|KOSDAQ_150]
+# DB 왕복 비교가 목적이므로 bulk도 로컬 mmap 저장소가 아닌 DB에서 패널을 읽는다 (DI20_PANEL_SOURCE=db)
+import sys, time
+import worker.get_low_di20_stocks as screener
+from db.db import pool_stats
+from worker.universe import members
+
+
+def _run(universe: str, mode: str):
+    before = pool_stats()
+    t0 = time.perf_counter()
+    result = screener.get_today_low_di20_stocks(universe, mode=mode)
+    elapsed = time.perf_counter() - t0
+    after = pool_stats()
+    # 풀 체크아웃 1회 = 쿼리 1회(DB 왕복)
+    return elapsed, {k: after[k] - before[k] for k in ("checkouts", "connections_created")}, result
+
+
+def main(universe: str = "nasdaq_100", repeat: int = 3):
+    screener.PANEL_SOURCE = "db"
+    print(f"유니버스: {universe} ({len(members(universe))} 종목), 반복 {repeat}회")
+    print(f"{'모드':<6} | {'평균(s)':>8} | {'최소(s)':>8} | {'새 연결':>7} | {'왕복':>5} | 결과")
+    for mode in ("loop", "bulk", "state", "table"):
+        times = []
+        for _ in range(repeat):
+            elapsed, stats, result = _run(universe, mode)
+            times.append(elapsed)
+        print(f"{mode:<6} | {sum(times) / len(times):>8.3f} | {min(times):>8.3f} | "
+              f"{stats['connections_created']:>7} | {stats['checkouts']:>5} | {len(result)}종목")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
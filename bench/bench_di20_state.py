@@ -0,0 +1,48 @@
+# DI20 증분 상태 검증/벤치마크 (DB 없이 합성 데이터)
+# 봉 추가/마지막 봉 수정을 반복하면서 매 단계 pandas 전체 재계산 결과와 비교한다.
+# 실행: python -m bench.bench_di20_state
+import math, time
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from worker.di20_state import Di20State, LOOKBACK
+from worker.get_low_di20_stocks import _is_low_di20
+
+
+def main(steps: int = 500, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    d0 = date(2023, 1, 2)
+    closes = list(100 * np.exp(np.cumsum(rng.normal(0, 0.02, 300))))
+    dates = [d0 + timedelta(days=i) for i in range(len(closes))]
+
+    st = Di20State.from_bars(list(zip(dates, closes)))
+    update_time = 0.0
+    mismatches = 0
+    for _ in range(steps):
+        if rng.random() < 0.5:
+            # 마지막 봉 수정(장중 갱신)
+            closes[-1] *= 1 + rng.normal(0, 0.005)
+        else:
+            dates.append(dates[-1] + timedelta(days=1))
+            closes.append(closes[-1] * (1 + rng.normal(0, 0.02)))
+
+        t0 = time.perf_counter()
+        st.apply(dates[-1], closes[-1])
+        update_time += time.perf_counter() - t0
+
+        curr, p, _ = _is_low_di20(pd.Series(closes[-LOOKBACK:]))
+        if not (math.isclose(curr, st.current(), abs_tol=1e-9) and math.isclose(p, st.quantile(), abs_tol=1e-9)):
+            mismatches += 1
+
+    t0 = time.perf_counter()
+    for _ in range(50):
+        _is_low_di20(pd.Series(closes[-LOOKBACK:]))
+    full_time = (time.perf_counter() - t0) / 50
+
+    print(f"{steps}회 갱신, 불일치 {mismatches}")
+    print(f"증분 갱신 평균 {update_time / steps * 1e6:.1f}us / pandas 전체 재계산 {full_time * 1e6:.1f}us")
+    assert mismatches == 0
+
+
+if __name__ == "__main__":
+    main()
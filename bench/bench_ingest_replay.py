@@ -0,0 +1,35 @@
+# 네트워크 없이 가격 수집 파이프라인(다운로드 → 변환 → DB 저장) 전체를 측정
+# ReplayProvider가 합성(또는 REPLAY_DIR의 녹화본) OHLCV를 지연/실패를 섞어 돌려준다.
+# 주의: 실제로 stock_prices에 쓰므로 테스트용 DB에서 실행할 것
+# 실행: python -m bench.bench_ingest_replay [period] [지연(초)] [실패율]
+import logging
+import os
+import sys
+import time
+
+from db.db import pool_stats
+from nasdaq_100 import SNP_500
+from worker.market_data import ReplayProvider, set_provider
+from worker.update_stock_info_by_yfinance import stock_price_update_by_yfinance_run
+
+
+def main(period: str = "2y", latency_sec: float = 0.2, failure_rate: float = 0.0):
+    logging.getLogger().setLevel(logging.WARNING)
+    set_provider(ReplayProvider(root=os.getenv("REPLAY_DIR"), latency_sec=latency_sec,
+                                failure_rate=failure_rate))
+
+    before = pool_stats()
+    t0 = time.perf_counter()
+    stock_price_update_by_yfinance_run(SNP_500, period=period)
+    elapsed = time.perf_counter() - t0
+    after = pool_stats()
+
+    print(f"SNP_500 x {period} | 지연 {latency_sec}s 실패율 {failure_rate} | {elapsed:.2f}s "
+          f"| 커넥션 체크아웃 {after['checkouts'] - before['checkouts']}회")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(args[0] if args else "2y",
+         float(args[1]) if len(args) > 1 else 0.2,
+         float(args[2]) if len(args) > 2 else 0.0)
@@ -0,0 +1,113 @@
+# 바이낸스 kline 메시지 디코딩 처리량: 기존 방식(json.loads + dict.get) vs KlineDecoder(선필터 + 정규식, 배치)
+# 실행: python -m bench.bench_kline_decode [원문 파일(COIN_WS_RECORD로 기록) | 메시지 수]
+import json, random, sys, time
+from coin.kline_decoder import Kline, KlineDecoder, decode, stream_symbol
+
+
+def synth_frames(n: int, n_symbols: int = 200, n_watch: int = 50, seed: int = 0) -> tuple[list[str], set[str]]:
+    """combined stream 형식 kline 메시지 n개 (구독 응답 약간 포함) + 감시 목록"""
+    rnd = random.Random(seed)
+    symbols = [f"C{i:03d}USDT" for i in range(n_symbols)]
+    watch = set(rnd.sample(symbols, n_watch))
+    start = 1_760_000_400_000
+    q = {s: 0.0 for s in symbols}
+    frames = []
+    for i in range(n):
+        if i % 1000 == 0:
+            frames.append(json.dumps({"result": None, "id": 1000 + i}, separators=(",", ":")))
+            continue
+        s = rnd.choice(symbols)
+        q[s] += rnd.random() * 1000
+        t = start + (i * 4 // n) * 3_600_000  # 전체 메시지가 1시간봉 4개에 걸치도록
+        k = {"t": t, "T": t + 3_599_999, "s": s, "i": "1h", "f": i, "L": i + 10,
+             "o": "1.0000", "c": "1.0100", "h": "1.0200", "l": "0.9900", "v": "1234.5",
+             "n": 10, "x": rnd.random() < 0.01, "q": f"{q[s]:.8f}", "V": "600.0", "Q": "610.0", "B": "0"}
+        data = {"e": "kline", "E": t + 1000, "s": s, "k": k}
+        frames.append(json.dumps({"stream": f"{s.lower()}@kline_1h", "data": data}, separators=(",", ":")))
+    return frames, watch
+
+
+def baseline(frames: list[str], watch: set[str]) -> list[Kline]:
+    """기존 ws_loop와 같은 파싱 (메시지마다 json.loads)"""
+    out = []
+    for raw in frames:
+        msg = json.loads(raw)
+        data = msg.get("data", msg)
+        if data.get("e") == "kline":
+            k = data.get("k", {})
+            symbol = (k.get("s") or "").upper()
+            if symbol not in watch:
+                continue
+            out.append(Kline(symbol, int(k.get("t", 0)), float(k.get("q", "0") or 0.0), bool(k.get("x", False))))
+    return out
+
+
+def single(frames: list[str], watch: set[str]) -> list[Kline]:
+    """선필터 + 메시지마다 decode (배치 없이)"""
+    lower = {s.lower() for s in watch}
+    out = []
+    for raw in frames:
+        symbol = stream_symbol(raw)
+        if symbol is not None and symbol not in lower:
+            continue
+        k = decode(raw)
+        if k is not None:
+            out.append(k)
+    return out
+
+
+def coalesce(klines: list[Kline]) -> list[Kline]:
+    latest = {}
+    for k in klines:
+        latest.pop((k.symbol, k.start), None)
+        latest[(k.symbol, k.start)] = k
+    return list(latest.values())
+
+
+def timed(fn, n: int, repeat: int = 3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    print(f"{fn.__name__:<12} {best:.3f}s  {n / best:>12,.0f} msg/s")
+    return result
+
+
+def main(arg: str = "200000", batch: int = 500):
+    if arg.isdigit():
+        frames, watch = synth_frames(int(arg))
+    else:
+        with open(arg, encoding="utf-8") as f:
+            frames = [line.rstrip("\n") for line in f if line.strip()]
+        # 기록 파일이면 나온 심볼 전부를 감시 목록으로
+        watch = {s.upper() for s in map(stream_symbol, frames) if s}
+    n = len(frames)
+    print(f"메시지 {n:,}개, 감시 {len(watch)}종목, 배치 {batch}")
+
+    decoder = KlineDecoder(watch)
+
+    def json_loads():
+        return baseline(frames, watch)
+
+    def prefilter():
+        return single(frames, watch)
+
+    def batched():
+        out = []
+        for i in range(0, n, batch):
+            out += decoder.decode_batch(frames[i:i + batch])[0]
+        return out
+
+    base = timed(json_loads, n)
+    one = timed(prefilter, n)
+    many = timed(batched, n)
+
+    assert one == base, "단건 디코딩 결과가 기존 방식과 다름"
+    expected = [k for i in range(0, n, batch) for k in coalesce(baseline(frames[i:i + batch], watch))]
+    assert many == expected, "배치 디코딩 결과가 기존 방식(봉별 마지막 값)과 다름"
+    print(f"결과 일치: kline {len(base):,}개 → 배치 병합 후 {len(many):,}개")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
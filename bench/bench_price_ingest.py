@@ -0,0 +1,61 @@
+# 가격 저장 벤치마크: execute_values vs COPY + 스테이징 테이블 upsert
+# 실제 stock_info 종목에 합성 가격을 넣고 측정 후 롤백하므로 테이블은 바뀌지 않는다.
+# 실행: python -m bench.bench_price_ingest [행 수]
+import sys, time
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from db.db import db_connection
+from worker.update_stock_info_by_yfinance import _upsert_prices_values, _upsert_prices_copy
+
+METHODS = {"values": _upsert_prices_values, "copy": _upsert_prices_copy}
+
+
+def make_rows(stock_ids: list[int], n_rows: int, seed: int = 0) -> list[tuple]:
+    """종목 x 날짜 합성 OHLCV (미래 날짜라 기존 행과 겹치지 않음 → 전부 INSERT)"""
+    rng = np.random.default_rng(seed)
+    days = max(1, n_rows // len(stock_ids))
+    start = date(2100, 1, 1)
+    rows = []
+    for sid in stock_ids:
+        closes = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.02, days))), 4)
+        for i, c in enumerate(closes.tolist()):
+            d = pd.Timestamp(start + timedelta(days=i))
+            rows.append((sid, d, c, c, c, c, int(rng.integers(1000, 10**6))))
+    return rows[:n_rows]
+
+
+def _measure(fn, rows, revise: bool):
+    with db_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                if revise:
+                    # 1차 적재 후 절반은 같은 값, 절반은 바뀐 값으로 다시 upsert → UPDATE 경로 측정
+                    fn(cur, rows)
+                    rows = [r if i % 2 else r[:5] + (r[5] + 1, r[6]) for i, r in enumerate(rows)]
+                t0 = time.perf_counter()
+                changed = fn(cur, rows)
+                return time.perf_counter() - t0, len(changed)
+        finally:
+            conn.rollback()
+
+
+def main(n_rows: int = 100_000):
+    with db_connection(readonly=True, autocommit=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT id FROM stock_info ORDER BY id")
+            stock_ids = [r[0] for r in cur.fetchall()]
+    rows = make_rows(stock_ids, n_rows)
+    print(f"{len(rows)}행 ({len(stock_ids)}종목)")
+
+    for scenario, revise in (("insert", False), ("update", True)):
+        counts = {}
+        for name, fn in METHODS.items():
+            elapsed, affected = _measure(fn, rows, revise)
+            counts[name] = affected
+            print(f"{scenario:<7} {name:<7} | {elapsed:>7.3f}s | {len(rows) / elapsed:>10,.0f} rows/s | 반영 {affected}")
+        assert counts["values"] == counts["copy"], counts
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
@@ -0,0 +1,59 @@
+# 스크리너 조회(종목별 최근 N개 종가)가 커버링 인덱스로 Index Only Scan을 타는지 확인
+# 실행: python -m bench.bench_screen_index [종목 수]
+import sys, time
+from db.db import db_connection
+from worker.get_low_di20_stocks import get_stock_price_by_days, get_stock_prices_bulk
+
+SINGLE_SQL = """
+    SELECT sp.date, sp.close
+    FROM stock_info si
+    JOIN stock_prices sp ON si.id = sp.stock_id
+    WHERE si.ticker = %s
+    ORDER BY date DESC
+    LIMIT %s
+"""
+
+BULK_SQL = """
+    SELECT si.ticker, sp.date, sp.close
+    FROM stock_info si
+    CROSS JOIN LATERAL (
+        SELECT p.date, p.close
+        FROM stock_prices p
+        WHERE p.stock_id = si.id
+        ORDER BY p.date DESC
+        LIMIT %s
+    ) sp
+    WHERE si.ticker = ANY(%s::text[])
+"""
+
+
+def explain(cur, sql: str, params) -> list[str]:
+    cur.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql, params)
+    return [r[0] for r in cur.fetchall()]
+
+
+def main(n_tickers: int = 500, days: int = 252):
+    with db_connection(readonly=True, autocommit=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT ticker FROM stock_info ORDER BY id LIMIT %s", (n_tickers,))
+            tickers = [r[0] for r in cur.fetchall()]
+            for name, sql, params in (("single", SINGLE_SQL, (tickers[0], days)),
+                                      ("bulk", BULK_SQL, (days, tickers))):
+                plan = explain(cur, sql, params)
+                print(f"── {name} ──")
+                print("\n".join(line[:160] for line in plan))
+                only = any("Index Only Scan" in line for line in plan)
+                print(f"=> Index Only Scan {'사용' if only else '미사용'}\n")
+
+    t0 = time.perf_counter()
+    for t in tickers:
+        get_stock_price_by_days(t, days)
+    loop = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    get_stock_prices_bulk(tickers, days)
+    bulk = time.perf_counter() - t0
+    print(f"{len(tickers)}종목 x {days}봉 | 종목별 {loop:.3f}s | 일괄 {bulk:.3f}s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
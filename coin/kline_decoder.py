@@ -0,0 +1,107 @@
+# 바이낸스 combined stream kline 메시지 디코더
+# {"stream":"btcusdt@kline_1h","data":{"e":"kline","E":...,"s":"BTCUSDT","k":{"t":...,"s":"BTCUSDT",...,"x":false,"q":"123.45",...}}}
+# 1) 스트림 이름 선필터: 원문 앞부분의 "stream":"<심볼>@ 만 잘라서 감시 목록에 없으면 JSON 파싱 없이 버림
+# 2) 필요한 필드(t, s, x, q)만 정규식으로 뽑아 Kline(슬롯 고정)으로 변환, 형식이 다르면 json.loads로 대체
+# 3) 큐에 쌓인 프레임을 한 번에 디코딩하고, 같은 (심볼, 봉 시작)은 마지막 값만 남김 (q는 봉 안에서 누적값)
+import json
+import re
+from typing import Iterable, Optional
+
+_STREAM_PREFIX = '{"stream":"'
+_PREFIX_LEN = len(_STREAM_PREFIX)
+
+# k 객체 안의 필드 순서(바이낸스 고정): t, T, s, i, f, L, o, c, h, l, v, n, x, q, ...
+_KLINE_RE = re.compile(r'"k":\{"t":(\d+),.*?"s":"([A-Z0-9]+)".*?"x":(true|false),"q":"([0-9.]+)"')
+
+
+class Kline:
+    __slots__ = ("symbol", "start", "quote_volume", "closed")
+
+    def __init__(self, symbol: str, start: int, quote_volume: float, closed: bool):
+        self.symbol = symbol
+        self.start = start
+        self.quote_volume = quote_volume
+        self.closed = closed
+
+    def __eq__(self, other):
+        return (isinstance(other, Kline) and self.symbol == other.symbol and self.start == other.start
+                and self.quote_volume == other.quote_volume and self.closed == other.closed)
+
+    def __repr__(self):
+        return f"Kline({self.symbol}, {self.start}, {self.quote_volume}, closed={self.closed})"
+
+
+def stream_symbol(raw: str) -> Optional[str]:
+    """combined stream 원문에서 심볼(소문자)만. 스트림 메시지가 아니면 None (구독 응답 등)"""
+    if not raw.startswith(_STREAM_PREFIX):
+        return None
+    end = raw.find("@", _PREFIX_LEN)
+    return raw[_PREFIX_LEN:end] if end > 0 else None
+
+
+def _decode_json(raw: str) -> Optional[Kline]:
+    """느린 경로: 전체 파싱 (필드 순서가 다르거나 정규식이 안 맞을 때)"""
+    msg = json.loads(raw)
+    data = msg.get("data", msg)
+    if data.get("e") != "kline":
+        return None
+    k = data.get("k", {})
+    return Kline((k.get("s") or "").upper(), int(k.get("t", 0)), float(k.get("q", "0") or 0.0),
+                 bool(k.get("x", False)))
+
+
+def decode(raw: str) -> Optional[Kline]:
+    """kline 메시지 하나 → Kline (kline이 아니면 None)"""
+    m = _KLINE_RE.search(raw)
+    if m is None:
+        return _decode_json(raw)
+    return Kline(m.group(2), int(m.group(1)), float(m.group(4)), m.group(3) == "true")
+
+
+class KlineDecoder:
+    """
+    감시 목록(대문자 심볼 set)을 받아서 선필터 + 디코딩
+    watchlist_mgr.current처럼 통째로 바뀌는 set을 넘기면 바뀔 때만 소문자 set을 다시 만든다.
+    """
+    def __init__(self, watch: Optional[set[str]] = None):
+        self._source: Optional[set[str]] = None
+        self._watch: frozenset[str] = frozenset()
+        if watch is not None:
+            self.set_watchlist(watch)
+
+    def set_watchlist(self, watch: set[str]):
+        if watch is self._source:
+            return
+        self._source = watch
+        self._watch = frozenset(s.lower() for s in watch)
+
+    def decode_batch(self, frames: Iterable) -> tuple[list[Kline], int, int]:
+        """
+        return: (Kline 목록, 감시 목록 밖으로 버린 수, kline이 아닌 메시지 수)
+        같은 (심볼, 봉 시작)이 여러 번 오면 마지막 것만 (도착 순서 유지)
+        """
+        latest: dict[tuple[str, int], Kline] = {}
+        filtered = other = 0
+        watch = self._watch
+        for raw in frames:
+            if isinstance(raw, (bytes, bytearray)):
+                raw = raw.decode()
+            symbol = stream_symbol(raw)
+            if symbol is not None:
+                if symbol not in watch:
+                    filtered += 1
+                    continue
+                kline = decode(raw)
+            else:
+                # 구독 응답, 스트림 이름에 "@"가 없는 메시지 등 (드묾) - 형식이 바뀐 스트림 메시지를 놓치지 않도록 전체 파싱
+                kline = _decode_json(raw)
+                if kline is not None and kline.symbol.lower() not in watch:
+                    filtered += 1
+                    continue
+            if kline is None:
+                other += 1
+                continue
+            key = (kline.symbol, kline.start)
+            latest.pop(key, None)
+            latest[key] = kline
+        return list(latest.values()), filtered, other
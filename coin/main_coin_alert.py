@@ -1,6 +1,9 @@
 import os, json, time, asyncio
 import aiohttp, websockets
 from dotenv import load_dotenv
+from common import metrics
+from worker.profiling import ws_sampler
+from coin.kline_decoder import KlineDecoder
 
 load_dotenv()  # ← dotenv 적용
 
@@ -14,6 +17,25 @@ CHUNK_SIZE = 100
 REFRESH_MIN = 10
 THRESHOLD = float(os.getenv("THRESHOLD"))
 
+# 지표 (common.metrics, 표준 라이브러리만 사용)
+WS_MESSAGES = metrics.counter("coin_ws_messages_total", "웹소켓 수신 메시지 수", ["kind"])
+WS_RATE = metrics.gauge("coin_ws_messages_per_sec", "최근 구간 초당 수신 메시지 수")
+WS_DECODE_SEC = metrics.histogram("coin_ws_decode_seconds", "메시지 파싱 + 필드 변환 시간 (배치 시간 / 메시지 수)",
+                                  buckets=(1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 1e-3, 1e-2))
+WS_QUEUE_WAIT_SEC = metrics.histogram("coin_ws_queue_wait_seconds", "수신 → 처리 시작까지 큐 대기 시간 (배치 첫 메시지)")
+PREVQ_CACHE = metrics.counter("coin_prevq_cache_total", "전일 거래대금 캐시 조회", ["result"])
+ALERT_DISPATCH_SEC = metrics.histogram("coin_alert_dispatch_seconds", "메시지 수신 → 디스코드 전송 완료 시간")
+WS_BATCH_SIZE = metrics.histogram("coin_ws_batch_size", "한 번에 디코딩한 메시지 수",
+                                  buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500))
+# 초당 메시지 수 갱신 간격(초)
+WS_RATE_WINDOW_SEC = 10
+# 큐에 쌓인 메시지를 한 번에 최대 몇 개까지 디코딩할지
+WS_BATCH_MAX = int(os.getenv("COIN_WS_BATCH_MAX", "500"))
+# 수신 큐 최대 길이. 처리가 밀려 가득 차면 가장 오래된 메시지부터 버림 (coin_ws_messages_total{kind="dropped"})
+WS_QUEUE_MAX = int(os.getenv("COIN_WS_QUEUE_MAX", "10000"))
+# 받은 원문을 한 줄에 하나씩 기록할 파일 (bench.bench_kline_decode 입력용, 비어 있으면 끔)
+WS_RECORD_FILE = os.getenv("COIN_WS_RECORD", "")
+
 async def send_discord(session: aiohttp.ClientSession, content:str):
     if not DISCORD_WEBHOOK_COIN:
         print("디스코드 웹 훅이 세팅되지 않았습니다.\n", content)
@@ -57,7 +79,9 @@ class PrevDayCache:
         if symbol in self.map:
             q, ts = self.map[symbol]
             if now - ts < self.ttl:
+                PREVQ_CACHE.labels("hit").inc()
                 return q
+        PREVQ_CACHE.labels("miss").inc()
         q = await self._fetch_prev_q(session, symbol)
         self.map[symbol] = (q, now)
         return q
@@ -176,9 +200,41 @@ class HourlyAlertState:
         return False
 
 
+def _put_latest(frames: asyncio.Queue, item):
+    """큐가 가득 차 있으면 가장 오래된 메시지를 버리고 넣음 (q는 봉 안 누적값 → 새 메시지가 이전 값을 대체)"""
+    try:
+        frames.put_nowait(item)
+    except asyncio.QueueFull:
+        frames.get_nowait()
+        frames.put_nowait(item)
+        WS_MESSAGES.labels("dropped").inc()
+
+
+async def read_frames(ws, frames: asyncio.Queue):
+    """
+    웹소켓 원문을 (수신 시각, 원문)으로 큐에 넣기만 함 → 지연 지표가 큐 대기 시간까지 포함
+    연결이 끝나면 None으로 알림 (큐가 가득 차 있어도 전달)
+    """
+    record = open(WS_RECORD_FILE, "a", encoding="utf-8") if WS_RECORD_FILE else None
+    try:
+        async for raw in ws:
+            _put_latest(frames, (time.perf_counter(), raw))
+            if record is not None:
+                record.write((raw.decode() if isinstance(raw, bytes) else raw) + "\n")
+    finally:
+        _put_latest(frames, None)
+        if record is not None:
+            record.close()
+
+
 async def ws_loop(session, watchlist_mgr: WatchlistManager, ws_ctl_queue: asyncio.Queue, prevq_cache: PrevDayCache):
     url = f"{SPOT_WS}?streams="  # ← 등호 추가
     hstate = HourlyAlertState()
+    decoder = KlineDecoder()
+    # PROFILE_WS_SAMPLE이 켜져 있을 때만 샘플링 (꺼져 있으면 None)
+    sampler = ws_sampler()
+    if sampler:
+        sampler.watch_loop()
 
     while True:
         try:
@@ -199,38 +255,69 @@ async def ws_loop(session, watchlist_mgr: WatchlistManager, ws_ctl_queue: asynci
 
                 ctl_task = asyncio.create_task(handle_ctl())
 
+                # 수신은 별도 태스크에서 큐에만 넣고, 처리 쪽은 쌓인 만큼 한 번에 꺼내서 디코딩
+                # (알림 전송을 기다리는 동안 들어온 메시지는 다음 배치에서 같은 봉끼리 합쳐짐)
+                frames: asyncio.Queue = asyncio.Queue(maxsize=WS_QUEUE_MAX)
+                reader_task = asyncio.create_task(read_frames(ws, frames))
+
+                rate_count, rate_since = 0, time.perf_counter()
                 try:
-                    async for raw in ws:
-                        msg = json.loads(raw)
-                        data = msg.get("data", msg)
-
-                        if data.get("e") == "kline":
-                            k = data.get("k", {})
-                            symbol = (k.get("s") or "").upper()
-                            if symbol not in watchlist_mgr.current:
-                                continue
-
-                            k_start = int(k.get("t", 0))
-                            q_now   = float(k.get("q", "0") or 0.0)
-                            is_closed = bool(k.get("x", False))
-
-                            prev_q = await prevq_cache.get(session, symbol)
-                            if prev_q <= 0:
-                                continue
-
-                            crossed = (q_now >= THRESHOLD * prev_q)
-                            if hstate.update_and_should_alert(symbol, k_start, crossed):
-                                ratio = q_now / prev_q if prev_q else 0.0
-                                text = (
-                                    f"🚨 **{symbol}** 1h 거래대금 급증 감지\n"
-                                    f"- 현재 1h q: `{q_now:,.2f}`\n"
-                                    f"- 전일 1d q: `{prev_q:,.2f}`\n"
-                                    f"- 배수: `{ratio:.2f}x` (기준 {THRESHOLD}x)\n"
-                                    f"- 캔들확정(x): {is_closed}\n"
-                                )
-                                await send_discord(session, text)
+                    connected = True
+                    while connected:
+                        frame = await frames.get()
+                        if frame is None:
+                            break
+                        # 배치에서 가장 먼저 받은 메시지의 수신 시각 기준 (큐 대기 포함)
+                        received, raw = frame
+                        dequeued = time.perf_counter()
+                        batch = [raw]
+                        while len(batch) < WS_BATCH_MAX and not frames.empty():
+                            frame = frames.get_nowait()
+                            if frame is None:
+                                connected = False
+                                break
+                            batch.append(frame[1])
+                        sampled = sampler.start() if sampler else None
+                        try:
+                            rate_count += len(batch)
+                            if received - rate_since >= WS_RATE_WINDOW_SEC:
+                                WS_RATE.set(rate_count / (received - rate_since))
+                                rate_count, rate_since = 0, received
+
+                            decoder.set_watchlist(watchlist_mgr.current)
+                            klines, filtered, other = decoder.decode_batch(batch)
+                            WS_DECODE_SEC.observe((time.perf_counter() - dequeued) / len(batch))
+                            WS_QUEUE_WAIT_SEC.observe(dequeued - received)
+                            WS_BATCH_SIZE.observe(len(batch))
+                            WS_MESSAGES.labels("filtered").inc(filtered)
+                            WS_MESSAGES.labels("other").inc(other)
+                            WS_MESSAGES.labels("kline").inc(len(batch) - filtered - other)
+
+                            for k in klines:
+                                prev_q = await prevq_cache.get(session, k.symbol)
+                                if prev_q <= 0:
+                                    continue
+
+                                crossed = (k.quote_volume >= THRESHOLD * prev_q)
+                                if hstate.update_and_should_alert(k.symbol, k.start, crossed):
+                                    ratio = k.quote_volume / prev_q if prev_q else 0.0
+                                    text = (
+                                        f"🚨 **{k.symbol}** 1h 거래대금 급증 감지\n"
+                                        f"- 현재 1h q: `{k.quote_volume:,.2f}`\n"
+                                        f"- 전일 1d q: `{prev_q:,.2f}`\n"
+                                        f"- 배수: `{ratio:.2f}x` (기준 {THRESHOLD}x)\n"
+                                        f"- 캔들확정(x): {k.closed}\n"
+                                    )
+                                    await send_discord(session, text)
+                                    ALERT_DISPATCH_SEC.observe(time.perf_counter() - received)
+                        finally:
+                            if sampled is not None:
+                                sampler.stop(sampled, len(batch))
+                    # 연결이 끊겼으면 수신 태스크의 예외를 그대로 올려서 재연결
+                    await reader_task
                 finally:
                     ctl_task.cancel()
+                    reader_task.cancel()
 
         except Exception as e:
             print("웹소켓 에러:", e)
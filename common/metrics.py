@@ -0,0 +1,285 @@
+# 프로세스 내 지표 레지스트리 (Counter / Gauge / Histogram)
+# 표준 라이브러리만 사용 → 코인 알람 프로세스에서도 가볍게 import 가능
+# db / worker / coin 어디에도 의존하지 않는 공용 패키지(common)에 둠 → db 계층도 worker를 import하지 않고 사용
+# - Prometheus 텍스트 형식 HTTP 엔드포인트: METRICS_PORT (0이면 끔), GET /metrics
+# - 주기적 덤프 파일: METRICS_DUMP_FILE (비어 있으면 끔), METRICS_DUMP_SEC 간격
+#
+#   DOWNLOAD_SEC = histogram("yf_download_seconds", "배치 다운로드 시간", ["provider"])
+#   DOWNLOAD_SEC.labels("yfinance").observe(1.2)
+#   with DOWNLOAD_SEC.labels("yfinance").time(): ...
+import abc
+import bisect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_DUMP_FILE = os.getenv("METRICS_DUMP_FILE", "")
+METRICS_DUMP_SEC = float(os.getenv("METRICS_DUMP_SEC", "60"))
+
+# 기본 구간(초): 1ms ~ 60s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(abc.ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._children: dict[tuple[str, ...], object] = {}
+
+    def labels(self, *values):
+        """라벨 값별 자식 (없으면 생성). 라벨이 없는 지표는 labels() 없이 바로 사용"""
+        key = tuple(str(v) for v in values)
+        if len(key) != len(self.label_names):
+            raise ValueError(f"{self.name}: 라벨 {self.label_names} 필요, {key} 받음")
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        return self.labels()
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """라벨 값 하나에 해당하는 값 객체 (render(name, label_names, key) 제공)"""
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            children = list(self._children.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in children:
+            lines += child.render(self.name, self.label_names, key)
+        return lines
+
+
+class _Value:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def set(self, value: float):
+        with self._lock:
+            self.value = value
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def get(self) -> float:
+        return self.value
+
+    def render(self, name, label_names, key) -> list[str]:
+        return [f"{name}{_format_labels(label_names, key)} {_format_value(self.value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float):
+        self._default().set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default().dec(amount)
+
+
+class _HistogramValue:
+    def __init__(self, buckets: tuple[float, ...]):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 마지막 칸 = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def render(self, name, label_names, key) -> list[str]:
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        lines, cumulative = [], 0
+        for bound, n in zip(list(self.buckets) + [float("inf")], counts):
+            cumulative += n
+            le = 'le="' + _format_value(bound) + '"'
+            lines.append(f"{name}_bucket{_format_labels(label_names, key, le)} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(label_names, key)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(label_names, key)} {count}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, label_names=(), buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        """같은 이름이 이미 있으면 기존 지표 (모듈을 다시 import해도 중복 등록되지 않음)"""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.label_names != metric.label_names:
+                    raise ValueError(f"지표 {metric.name}가 다른 형식으로 이미 등록됨")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines += metric.collect()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help_text: str, labels: tuple[str, ...] | list[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help_text, tuple(labels)))
+
+
+def gauge(name: str, help_text: str, labels: tuple[str, ...] | list[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, help_text, tuple(labels)))
+
+
+def histogram(name: str, help_text: str, labels: tuple[str, ...] | list[str] = (),
+              buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, help_text, tuple(labels), buckets))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def start_http_server(port: int, host: str = METRICS_HOST) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info("지표 엔드포인트: http://%s:%d/metrics", host, port)
+    return server
+
+
+def dump(path: str):
+    """현재 지표를 파일로 (임시 파일에 쓰고 교체 → 읽는 쪽이 반쯤 쓴 파일을 보지 않음)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(REGISTRY.render())
+    os.replace(tmp, path)
+
+
+def start_dump(path: str, interval_sec: float = METRICS_DUMP_SEC) -> threading.Thread:
+    def loop():
+        while True:
+            time.sleep(interval_sec)
+            try:
+                dump(path)
+            except OSError:
+                logger.exception("지표 덤프 실패: %s", path)
+
+    thread = threading.Thread(target=loop, name="metrics-dump", daemon=True)
+    thread.start()
+    logger.info("지표 덤프: %s (%.0fs 간격)", path, interval_sec)
+    return thread
+
+
+def start_from_env(port_offset: int = 0, name: str = ""):
+    """
+    METRICS_PORT / METRICS_DUMP_FILE 설정대로 시작
+    역할별 프로세스는 port_offset으로 포트를 나누고, 덤프 파일 이름의 {role}을 name으로 바꾼다.
+    """
+    if METRICS_PORT:
+        try:
+            start_http_server(METRICS_PORT + port_offset)
+        except OSError:
+            logger.exception("지표 엔드포인트 시작 실패 (포트 %d)", METRICS_PORT + port_offset)
+    if METRICS_DUMP_FILE:
+        start_dump(METRICS_DUMP_FILE.replace("{role}", name or "all"))
@@ -1,15 +1,221 @@
 import psycopg2
 from psycopg2 import sql
+from psycopg2 import pool as pg_pool
+from psycopg2 import extensions
 import os
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
+from common import metrics
+
 load_dotenv()
 
-def get_connection():
-    return psycopg2.connect(
+# 커넥션 풀 설정
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+# 풀에서 커넥션을 기다리는 최대 시간(초)
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# 이 시간(초) 이상 놀던 커넥션은 꺼낼 때 SELECT 1로 상태 확인
+DB_POOL_HEALTH_CHECK_SEC = float(os.getenv("DB_POOL_HEALTH_CHECK_SEC", "30"))
+
+
+DB_CONNECT_SEC = metrics.histogram("db_connect_seconds", "새 DB 커넥션 연결 시간")
+DB_CHECKOUT_SEC = metrics.histogram("db_checkout_seconds", "풀에서 커넥션을 꺼내기까지 걸린 시간")
+DB_EXECUTE_SEC = metrics.histogram("db_execute_seconds", "쿼리 실행 시간 (풀 커넥션)", ["op"])
+
+
+class _TimedCursor(extensions.cursor):
+    """execute / executemany / copy_expert 시간을 지표로 (execute_values는 페이지마다 execute 1번)"""
+    def execute(self, query, vars=None):
+        with DB_EXECUTE_SEC.labels("execute").time():
+            return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        with DB_EXECUTE_SEC.labels("executemany").time():
+            return super().executemany(query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        with DB_EXECUTE_SEC.labels("copy").time():
+            return super().copy_expert(sql, file, size)
+
+
+def _connect_kwargs() -> dict:
+    return dict(
         host=os.getenv("DB_HOST"),
         port=os.getenv("DB_PORT"),
         dbname=os.getenv("DB_NAME"),
         user=os.getenv("DB_USER"),
         password=os.getenv("DB_PASSWORD")
-    )
\ No newline at end of file
+    )
+
+
+def get_connection():
+    """풀을 거치지 않는 단독 커넥션 (마이그레이션처럼 세션을 오래 점유하는 작업용)"""
+    return psycopg2.connect(**_connect_kwargs())
+
+
+class PoolStats:
+    """풀 사용 지표: 대기 횟수, 체크아웃 지연, 새로 만든 커넥션 수 등"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.checkout_time_total = 0.0
+        self.checkout_time_max = 0.0
+        self.connections_created = 0
+        self.health_check_failures = 0
+
+    def record_checkout(self, elapsed: float, waited: bool):
+        with self._lock:
+            self.checkouts += 1
+            self.waits += int(waited)
+            self.checkout_time_total += elapsed
+            self.checkout_time_max = max(self.checkout_time_max, elapsed)
+
+    def incr(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "checkout_time_avg_ms": self.checkout_time_total / self.checkouts * 1000 if self.checkouts else 0.0,
+                "checkout_time_max_ms": self.checkout_time_max * 1000,
+                "connections_created": self.connections_created,
+                "health_check_failures": self.health_check_failures,
+            }
+
+
+class _ThreadedPool(pg_pool.ThreadedConnectionPool):
+    def __init__(self, minconn, maxconn, stats: PoolStats, **kwargs):
+        self._stats = stats  # 부모 __init__에서 minconn개를 바로 만들기 때문에 먼저 설정
+        super().__init__(minconn, maxconn, **kwargs)
+
+    def _connect(self, key=None):
+        with DB_CONNECT_SEC.time():
+            conn = super()._connect(key)
+        self._stats.incr("connections_created")
+        return conn
+
+    def _putconn(self, conn, key=None, close=False):
+        # 부모는 유휴 커넥션이 minconn개 이상이면 돌려받은 커넥션을 닫아 버린다
+        # → 동시 사용이 minconn을 넘을 때마다 새로 연결/종료가 반복됨. maxconn개까지 유휴로 유지
+        # (minconn은 시작 시 미리 여는 수로만 사용. putconn이 잡는 풀 락 안에서 호출됨)
+        minconn, self.minconn = self.minconn, self.maxconn
+        try:
+            super()._putconn(conn, key, close)
+        finally:
+            self.minconn = minconn
+
+
+class ConnectionPool:
+    """
+    스레드 안전 커넥션 풀
+    - maxconn개가 모두 사용 중이면 에러 대신 timeout까지 대기
+    - 오래 놀던 커넥션은 꺼낼 때 상태 확인, 끊겼으면 새로 연결
+    """
+    def __init__(self, minconn: int = DB_POOL_MIN, maxconn: int = DB_POOL_MAX,
+                 timeout: float = DB_POOL_TIMEOUT, health_check_sec: float = DB_POOL_HEALTH_CHECK_SEC):
+        self.stats = PoolStats()
+        self.timeout = timeout
+        self.health_check_sec = health_check_sec
+        self._sem = threading.BoundedSemaphore(maxconn)
+        self._pool = _ThreadedPool(minconn, maxconn, self.stats, cursor_factory=_TimedCursor, **_connect_kwargs())
+        self._last_used: dict[int, float] = {}
+
+    def _is_healthy(self, conn) -> bool:
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn))
+        # 방금 만든 커넥션이거나 최근에 쓴 커넥션은 확인 생략
+        if last_used is None or time.monotonic() - last_used < self.health_check_sec:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _checkout(self):
+        conn = self._pool.getconn()
+        if not self._is_healthy(conn):
+            self.stats.incr("health_check_failures")
+            self._last_used.pop(id(conn), None)
+            self._pool.putconn(conn, close=True)
+            conn = self._pool.getconn()
+        return conn
+
+    def _checkin(self, conn, session_changed: bool):
+        if conn.closed:
+            self._last_used.pop(id(conn), None)
+            self._pool.putconn(conn, close=True)
+            return
+        try:
+            if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            if session_changed:
+                conn.set_session(readonly="DEFAULT", autocommit=False)
+        except psycopg2.Error:
+            self._last_used.pop(id(conn), None)
+            self._pool.putconn(conn, close=True)
+            return
+        self._last_used[id(conn)] = time.monotonic()
+        self._pool.putconn(conn)
+
+    @contextmanager
+    def connection(self, readonly: bool = False, autocommit: bool = False):
+        t0 = time.perf_counter()
+        waited = not self._sem.acquire(blocking=False)
+        if waited and not self._sem.acquire(timeout=self.timeout):
+            raise pg_pool.PoolError(f"커넥션 풀 대기 시간 초과({self.timeout}s)")
+        try:
+            conn = self._checkout()
+        except Exception:
+            self._sem.release()
+            raise
+        self.stats.record_checkout(time.perf_counter() - t0, waited)
+        DB_CHECKOUT_SEC.observe(time.perf_counter() - t0)
+
+        session_changed = readonly or autocommit
+        try:
+            if session_changed:
+                conn.set_session(readonly=readonly or "DEFAULT", autocommit=autocommit)
+            yield conn
+        finally:
+            self._checkin(conn, session_changed)
+            self._sem.release()
+
+    def close(self):
+        self._pool.closeall()
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool()
+        return _pool
+
+
+def db_connection(readonly: bool = False, autocommit: bool = False):
+    """
+    풀 커넥션 컨텍스트 매니저
+        with db_connection() as conn:
+            with conn:  # commit / rollback
+                with conn.cursor() as cur: ...
+    """
+    return get_pool().connection(readonly=readonly, autocommit=autocommit)
+
+
+def pool_stats() -> dict:
+    return get_pool().stats.snapshot()
@@ -0,0 +1,501 @@
+# 버전별 스키마 마이그레이션
+# - schema_migrations 테이블에 적용된 버전을 기록하고, 아직 안 된 것만 순서대로 실행
+# - 여러 프로세스가 동시에 떠도 advisory lock으로 한 곳에서만 실행
+# - 큰 테이블을 건드리는 작업은 트랜잭션 밖에서 단계별로(중간에 죽어도 다시 실행하면 이어서) 진행
+# - 시작 시에는 가벼운 추가형 마이그레이션(테이블/인덱스 추가: 001, 002, 005)만 자동 실행 (DB_AUTO_MIGRATE, 기본 켜짐)
+#   무거운 마이그레이션(heavy: 003 파티션 이관 = 전체 복사 + ACCESS EXCLUSIVE 락, 004 = 파티션별 인덱스 + VACUUM)은
+#   DB_AUTO_MIGRATE_HEAVY=1이거나 CLI upgrade로만 실행. heavy를 건너뛰어도 이후 추가형 마이그레이션이 의존하지 않도록 유지
+# - 연도 파티션은 시작할 때와 매일 예약 잡(worker.main_worker)에서 미리 만든다
+# 실행: python -m db.migrations [status|upgrade|partitions|drop-old]
+#   upgrade    : 미적용 마이그레이션 실행 (heavy 포함)
+#   partitions : 연도 파티션 점검 (DEFAULT 파티션에 들어간 행은 해당 연도 파티션으로 옮김)
+#   drop-old   : 003 이관 후 남겨 둔 stock_prices_old 삭제 (이관 결과 확인 후 실행)
+import logging
+import os
+import sys
+import time
+from datetime import date
+from typing import Callable
+
+import psycopg2
+from psycopg2 import errors
+
+from db.db import get_connection
+
+logger = logging.getLogger(__name__)
+
+# 시작 시 추가형 마이그레이션 자동 실행 여부
+AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "1") == "1"
+# 시작 시 heavy 마이그레이션도 실행할지 (기본 꺼짐: 배포 후 python -m db.migrations upgrade로 직접 실행)
+AUTO_MIGRATE_HEAVY = os.getenv("DB_AUTO_MIGRATE_HEAVY", "0") == "1"
+# 온라인 이관 시 한 트랜잭션에서 옮길 종목 수
+BACKFILL_BATCH_STOCKS = int(os.getenv("DB_MIGRATE_BACKFILL_BATCH", "50"))
+# 올해 이후로 미리 만들어 둘 연도 파티션 수
+PARTITION_YEARS_AHEAD = int(os.getenv("DB_PARTITION_YEARS_AHEAD", "1"))
+
+_LOCK_KEY = 0x53544B4D  # "STKM"
+PRICE_COLUMNS = "stock_id, date, open, high, low, close, volume"
+
+
+class Migration:
+    """
+    version: 증가하는 정수
+    fn(conn): transactional이면 하나의 트랜잭션 안에서, 아니면 autocommit 커넥션으로 호출
+    heavy: 큰 테이블 전체를 다시 쓰거나 긴 락/VACUUM이 필요 → 시작 시 자동 실행하지 않음
+    """
+    def __init__(self, version: int, name: str, fn: Callable, transactional: bool = True, heavy: bool = False):
+        self.version = version
+        self.name = name
+        self.fn = fn
+        self.transactional = transactional
+        self.heavy = heavy
+
+
+def _relkind(cur, table: str) -> str | None:
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (table,))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def _has_unique_index(cur, table: str, columns: list[str]) -> bool:
+    """columns 순서 그대로의 유효한 UNIQUE 인덱스(제약 포함)가 있는지"""
+    cur.execute("""
+        SELECT 1
+        FROM pg_index i
+        WHERE i.indrelid = to_regclass(%s) AND i.indisunique AND i.indisvalid
+          AND ARRAY(
+                SELECT a.attname::text
+                FROM unnest(i.indkey::int2[]) WITH ORDINALITY AS k(attnum, ord)
+                JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+                WHERE k.ord <= i.indnkeyatts
+                ORDER BY k.ord
+              ) = %s::text[]
+    """, (table, columns))
+    return cur.fetchone() is not None
+
+
+def _create_index_concurrently(cur, name: str, target: str, unique: bool = False):
+    """
+    CREATE INDEX CONCURRENTLY name ON target (쓰기를 막지 않음, autocommit 필요)
+    이전 시도가 중간에 실패해 INVALID로 남은 인덱스는 지우고 다시 만든다.
+    """
+    cur.execute("""
+        SELECT i.indisvalid FROM pg_index i WHERE i.indexrelid = to_regclass(%s)
+    """, (name,))
+    row = cur.fetchone()
+    if row and row[0]:
+        return
+    if row:
+        logger.warning("INVALID 인덱스 재생성: %s", name)
+        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    cur.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY {name} ON {target}")
+
+
+def _partitions(cur, parent: str) -> list[str]:
+    cur.execute("""
+        SELECT c.relname
+        FROM pg_inherits inh
+        JOIN pg_class c ON c.oid = inh.inhrelid
+        WHERE inh.inhparent = to_regclass(%s)
+        ORDER BY c.relname
+    """, (parent,))
+    return [r[0] for r in cur.fetchall()]
+
+
+def _create_year_partitions(cur, parent: str, first_year: int, last_year: int):
+    for year in range(first_year, last_year + 1):
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS stock_prices_y{year}
+            PARTITION OF {parent}
+            FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')
+        """)
+
+
+def _default_partition(cur, parent: str) -> str | None:
+    cur.execute("""
+        SELECT c.relname
+        FROM pg_inherits inh
+        JOIN pg_class c ON c.oid = inh.inhrelid
+        WHERE inh.inhparent = to_regclass(%s) AND pg_get_expr(c.relpartbound, c.oid) = 'DEFAULT'
+    """, (parent,))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def _add_year_partition(cur, parent: str, year: int, default: str | None) -> int:
+    """
+    연도 파티션이 없으면 만든다. DEFAULT 파티션에 이미 그 연도 행이 있으면 파티션 생성이 실패하므로
+    같은 트랜잭션에서 그 행들을 빼 두었다가 파티션을 만든 뒤 다시 넣는다. return: 옮긴 행 수
+    """
+    cur.execute("SELECT to_regclass(%s)", (f"stock_prices_y{year}",))
+    if cur.fetchone()[0] is not None:
+        return 0
+    moved = 0
+    if default:
+        cur.execute(f"CREATE TEMP TABLE stock_prices_moved (LIKE {parent}) ON COMMIT DROP")
+        cur.execute(f"""
+            WITH d AS (
+                DELETE FROM {default} WHERE date >= %s AND date < %s
+                RETURNING {PRICE_COLUMNS}
+            )
+            INSERT INTO stock_prices_moved ({PRICE_COLUMNS}) SELECT {PRICE_COLUMNS} FROM d
+        """, (date(year, 1, 1), date(year + 1, 1, 1)))
+        moved = cur.rowcount
+    _create_year_partitions(cur, parent, year, year)
+    if moved:
+        cur.execute(f"INSERT INTO {parent} ({PRICE_COLUMNS}) SELECT {PRICE_COLUMNS} FROM stock_prices_moved")
+        logger.warning("DEFAULT 파티션의 %d년 행 %d개를 stock_prices_y%d로 옮김", year, moved, year)
+    return moved
+
+
+def ensure_partitions(conn, years_ahead: int = PARTITION_YEARS_AHEAD):
+    """
+    stock_prices가 파티션 테이블이면 올해 + years_ahead 까지 연도 파티션을 만들어 둔다.
+    DEFAULT 파티션에 이미 쌓인 연도(파티션이 늦게 만들어진 경우)도 파티션을 만들고 행을 옮긴다.
+    연도마다 짧은 트랜잭션 하나 (conn은 autocommit 상태로 넘길 것)
+    """
+    with conn.cursor() as cur:
+        if _relkind(cur, "stock_prices") != "p":
+            return
+        default = _default_partition(cur, "stock_prices")
+        this_year = date.today().year
+        years = set(range(this_year, this_year + years_ahead + 1))
+        if default:
+            cur.execute(f"SELECT DISTINCT extract(year FROM date)::int FROM {default}")
+            years.update(r[0] for r in cur.fetchall())
+    for year in sorted(years):
+        _run_locked(conn, lambda cur, y=year: _add_year_partition(cur, "stock_prices", y, default),
+                    f"{year} 파티션")
+
+
+def maintain_partitions():
+    """예약 잡/시작 시 연도 파티션 점검. 다른 프로세스가 마이그레이션 중이면 이번에는 건너뜀"""
+    conn = get_connection()
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_try_advisory_lock(%s)", (_LOCK_KEY,))
+            if not cur.fetchone()[0]:
+                logger.info("다른 프로세스가 마이그레이션 중. 파티션 점검 건너뜀")
+                return
+        try:
+            ensure_partitions(conn)
+        finally:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_unlock(%s)", (_LOCK_KEY,))
+    finally:
+        conn.close()
+
+
+def drop_old_table() -> bool:
+    """003 이관이 끝난 뒤 남겨 둔 stock_prices_old 삭제. return: 삭제했으면 True"""
+    conn = get_connection()
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            if _relkind(cur, "stock_prices") != "p" or _relkind(cur, "stock_prices_old") is None:
+                logger.info("삭제할 stock_prices_old 없음")
+                return False
+            cur.execute("DROP TABLE stock_prices_old")
+            logger.info("stock_prices_old 삭제")
+            return True
+    finally:
+        conn.close()
+
+
+# ── 마이그레이션 본문 ──
+
+def _m001_base_tables(conn):
+    """기존 DB는 그대로 두고, 빈 DB에서는 코드가 기대하는 테이블을 만든다"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS stock_info (
+                id        serial PRIMARY KEY,
+                ticker    text NOT NULL,
+                fullname  text,
+                exchange  text,
+                country   text,
+                marketcap bigint
+            )
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS stock_prices (
+                stock_id integer NOT NULL REFERENCES stock_info (id),
+                date     date    NOT NULL,
+                open     numeric,
+                high     numeric,
+                low      numeric,
+                close    numeric,
+                volume   bigint
+            )
+        """)
+
+
+def _m002_unique_keys(conn):
+    """
+    upsert가 기대는 UNIQUE 인덱스
+    - stock_info (ticker): stock_info_update_run의 ON CONFLICT (ticker)
+    - stock_prices (stock_id, date): save_price_to_db의 ON CONFLICT (stock_id, date)
+    같은 컬럼의 UNIQUE 인덱스/제약이 이미 있으면 그대로 사용
+    """
+    with conn.cursor() as cur:
+        if not _has_unique_index(cur, "stock_info", ["ticker"]):
+            _create_index_concurrently(cur, "stock_info_ticker_uidx", "stock_info (ticker)", unique=True)
+        if _relkind(cur, "stock_prices") != "p" and not _has_unique_index(cur, "stock_prices", ["stock_id", "date"]):
+            _create_index_concurrently(cur, "stock_prices_stock_id_date_uidx", "stock_prices (stock_id, date)",
+                                       unique=True)
+
+
+def _m003_partition_stock_prices(conn):
+    """
+    stock_prices → 연도별 RANGE 파티션 테이블로 온라인 이관
+    1) 같은 컬럼의 파티션 테이블 stock_prices_new 생성
+    2) 기존 테이블에 미러 트리거: 이관 중 들어오는 INSERT/UPDATE/DELETE를 새 테이블에도 반영
+    3) 종목 묶음 단위로 백필 (배치마다 커밋, ON CONFLICT DO NOTHING → 트리거가 넣은 최신 값 유지, 재실행 가능)
+    4) 짧은 ACCESS EXCLUSIVE 락 안에서 행 수 확인 후 이름 교체. 기존 테이블은 stock_prices_old로 남김
+    """
+    with conn.cursor() as cur:
+        if _relkind(cur, "stock_prices") == "p":
+            logger.info("stock_prices는 이미 파티션 테이블. 건너뜀")
+            return
+
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS stock_prices_new (
+                LIKE stock_prices INCLUDING DEFAULTS,
+                CONSTRAINT stock_prices_part_pkey PRIMARY KEY (stock_id, date),
+                CONSTRAINT stock_prices_part_stock_id_fkey FOREIGN KEY (stock_id) REFERENCES stock_info (id)
+            ) PARTITION BY RANGE (date)
+        """)
+        cur.execute("SELECT extract(year FROM min(date))::int FROM stock_prices")
+        this_year = date.today().year
+        first_year = cur.fetchone()[0] or this_year
+        _create_year_partitions(cur, "stock_prices_new", first_year, this_year + PARTITION_YEARS_AHEAD)
+        # 범위 밖 날짜(먼 과거/미래)를 받아줄 안전망
+        cur.execute("CREATE TABLE IF NOT EXISTS stock_prices_default PARTITION OF stock_prices_new DEFAULT")
+
+        cur.execute(f"""
+            CREATE OR REPLACE FUNCTION stock_prices_mirror() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    DELETE FROM stock_prices_new WHERE stock_id = OLD.stock_id AND date = OLD.date;
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    INSERT INTO stock_prices_new ({PRICE_COLUMNS})
+                    VALUES (NEW.stock_id, NEW.date, NEW.open, NEW.high, NEW.low, NEW.close, NEW.volume)
+                    ON CONFLICT (stock_id, date) DO UPDATE
+                    SET open = EXCLUDED.open, high = EXCLUDED.high, low = EXCLUDED.low,
+                        close = EXCLUDED.close, volume = EXCLUDED.volume;
+                END IF;
+                RETURN NULL;
+            END $$
+        """)
+        cur.execute("DROP TRIGGER IF EXISTS stock_prices_mirror ON stock_prices")
+        cur.execute("""
+            CREATE TRIGGER stock_prices_mirror
+            AFTER INSERT OR UPDATE OR DELETE ON stock_prices
+            FOR EACH ROW EXECUTE FUNCTION stock_prices_mirror()
+        """)
+
+        cur.execute("SELECT id FROM stock_info ORDER BY id")
+        stock_ids = [r[0] for r in cur.fetchall()]
+
+    copied = 0
+    started = time.perf_counter()
+    for i in range(0, len(stock_ids), BACKFILL_BATCH_STOCKS):
+        batch = stock_ids[i:i + BACKFILL_BATCH_STOCKS]
+
+        def copy_batch(cur):
+            # 배치 동안만 기존 테이블 쓰기를 멈춤(SHARE, 읽기는 그대로)
+            # → 앱 upsert가 트리거로 새 테이블에 넣는 행과 백필 행이 서로 기다리는 데드락이 생기지 않음
+            cur.execute("LOCK TABLE stock_prices IN SHARE MODE")
+            cur.execute(f"""
+                INSERT INTO stock_prices_new ({PRICE_COLUMNS})
+                SELECT {PRICE_COLUMNS} FROM stock_prices WHERE stock_id = ANY(%s::int[])
+                ON CONFLICT (stock_id, date) DO NOTHING
+            """, (batch,))
+            return cur.rowcount
+
+        copied += _run_locked(conn, copy_batch, "백필")
+        logger.info("stock_prices 백필 %d/%d종목 (누적 %d행, %.1fs)",
+                    min(i + BACKFILL_BATCH_STOCKS, len(stock_ids)), len(stock_ids),
+                    copied, time.perf_counter() - started)
+
+    def swap(cur):
+        cur.execute("LOCK TABLE stock_prices, stock_prices_new IN ACCESS EXCLUSIVE MODE")
+        cur.execute("SELECT (SELECT count(*) FROM stock_prices), (SELECT count(*) FROM stock_prices_new)")
+        old_count, new_count = cur.fetchone()
+        if old_count != new_count:
+            raise RuntimeError(f"이관 행 수 불일치: 기존 {old_count} / 새 테이블 {new_count}")
+        cur.execute("DROP TRIGGER stock_prices_mirror ON stock_prices")
+        cur.execute("ALTER TABLE stock_prices RENAME TO stock_prices_old")
+        cur.execute("ALTER TABLE stock_prices_new RENAME TO stock_prices")
+        cur.execute("DROP FUNCTION stock_prices_mirror()")
+        if old_count == 0:
+            cur.execute("DROP TABLE stock_prices_old")  # 빈 DB면 남겨둘 이유가 없음
+        return new_count
+
+    count = _run_locked(conn, swap, "테이블 교체")
+    if count:
+        logger.info("stock_prices 파티션 테이블로 교체 완료 (%d행). 확인 후 python -m db.migrations drop-old", count)
+
+
+def _run_locked(conn, fn: Callable, label: str, attempts: int = 20):
+    """
+    테이블 락이 필요한 짧은 트랜잭션 실행
+    lock_timeout을 짧게 둬서 락 대기열에서 앱 쿼리를 오래 막지 않고, 못 얻으면 잠시 후 재시도
+    """
+    for attempt in range(1, attempts + 1):
+        conn.autocommit = False
+        try:
+            with conn, conn.cursor() as cur:
+                cur.execute("SET LOCAL lock_timeout = '3s'")
+                return fn(cur)
+        except (errors.LockNotAvailable, errors.DeadlockDetected):
+            logger.warning("%s 락 획득 실패 (%d/%d). 재시도", label, attempt, attempts)
+            time.sleep(1)
+        finally:
+            conn.autocommit = True
+    raise RuntimeError(f"{label} 실패: 락을 얻지 못함")
+
+
+def _m004_screen_covering_index(conn):
+    """
+    스크리너용 커버링 인덱스: 종목별 최근 N개 종가를 힙 접근 없이(Index Only Scan) 읽는다.
+    파티션 테이블은 CONCURRENTLY를 직접 못 쓰므로
+    부모에 ON ONLY로 만든 뒤 파티션마다 CONCURRENTLY로 만들어 붙인다. (쓰기를 막지 않음)
+    """
+    columns = "(stock_id, date DESC) INCLUDE (close)"
+    with conn.cursor() as cur:
+        if _relkind(cur, "stock_prices") != "p":
+            _create_index_concurrently(cur, "stock_prices_screen_idx", f"stock_prices {columns}")
+        else:
+            cur.execute(f"CREATE INDEX IF NOT EXISTS stock_prices_screen_idx ON ONLY stock_prices {columns}")
+            for part in _partitions(cur, "stock_prices"):
+                _create_index_concurrently(cur, f"{part}_screen_idx", f"{part} {columns}")
+                cur.execute(f"ALTER INDEX stock_prices_screen_idx ATTACH PARTITION {part}_screen_idx")
+        # Index Only Scan은 visibility map이 채워져야 효과가 있음 → 이관/인덱스 생성 직후 한 번 VACUUM
+        cur.execute("VACUUM (ANALYZE) stock_prices")
+
+
+def _m005_stock_indicators(conn):
+    """
+    일별 지표 (worker/indicators.py가 가격 저장 트랜잭션 안에서 유지)
+    지표를 추가할 때는 이 테이블에 컬럼을 더하는 마이그레이션을 추가
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS stock_indicators (
+                stock_id   integer NOT NULL REFERENCES stock_info (id),
+                date       date    NOT NULL,
+                ma20       double precision,
+                di20       double precision,
+                di20_p07   double precision,  -- 최근 252봉 DI20의 7% 분위수
+                updated_at timestamptz NOT NULL DEFAULT now(),
+                PRIMARY KEY (stock_id, date)
+            )
+        """)
+
+
+MIGRATIONS = [
+    Migration(1, "base_tables", _m001_base_tables),
+    Migration(2, "unique_keys", _m002_unique_keys, transactional=False),
+    Migration(3, "partition_stock_prices", _m003_partition_stock_prices, transactional=False, heavy=True),
+    Migration(4, "screen_covering_index", _m004_screen_covering_index, transactional=False, heavy=True),
+    Migration(5, "stock_indicators", _m005_stock_indicators),
+]
+
+
+def _applied_versions(cur) -> set[int]:
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version     integer PRIMARY KEY,
+            name        text NOT NULL,
+            applied_at  timestamptz NOT NULL DEFAULT now(),
+            duration_ms integer
+        )
+    """)
+    cur.execute("SELECT version FROM schema_migrations")
+    return {r[0] for r in cur.fetchall()}
+
+
+def upgrade(heavy: bool = True) -> list[int]:
+    """
+    미적용 마이그레이션을 순서대로 실행. return: 이번에 적용한 버전들
+    heavy: False면 heavy 마이그레이션은 건너뜀 (시작 시 자동 실행)
+    """
+    conn = get_connection()
+    conn.autocommit = True
+    done = []
+    try:
+        with conn.cursor() as cur:
+            # 세션 단위 advisory lock: 다른 프로세스는 여기서 기다렸다가 적용된 상태를 보고 지나감
+            cur.execute("SELECT pg_advisory_lock(%s)", (_LOCK_KEY,))
+            applied = _applied_versions(cur)
+
+        for m in MIGRATIONS:
+            if m.version in applied:
+                continue
+            if m.heavy and not heavy:
+                logger.warning("heavy 마이그레이션 %03d_%s 건너뜀 (python -m db.migrations upgrade 또는 "
+                               "DB_AUTO_MIGRATE_HEAVY=1)", m.version, m.name)
+                continue
+            logger.info("마이그레이션 %03d_%s 시작", m.version, m.name)
+            started = time.perf_counter()
+            if m.transactional:
+                conn.autocommit = False
+                with conn:
+                    m.fn(conn)
+                    _record(conn, m, started)
+                conn.autocommit = True
+            else:
+                m.fn(conn)
+                _record(conn, m, started)
+            logger.info("마이그레이션 %03d_%s 완료 (%.1fs)", m.version, m.name, time.perf_counter() - started)
+            done.append(m.version)
+
+        try:
+            ensure_partitions(conn)
+        except Exception:
+            # 스키마는 적용됐으므로 실패로 올리지 않음 (예약 잡이 다시 시도)
+            logger.exception("연도 파티션 점검 실패")
+    finally:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_unlock(%s)", (_LOCK_KEY,))
+        except psycopg2.Error:
+            pass
+        conn.close()
+    return done
+
+
+def _record(conn, m: Migration, started: float):
+    with conn.cursor() as cur:
+        cur.execute("INSERT INTO schema_migrations (version, name, duration_ms) VALUES (%s, %s, %s)",
+                    (m.version, m.name, int((time.perf_counter() - started) * 1000)))
+
+
+def status() -> list[tuple[Migration, bool]]:
+    """[(마이그레이션, 적용 여부), ...]"""
+    conn = get_connection()
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            applied = _applied_versions(cur)
+    finally:
+        conn.close()
+    return [(m, m.version in applied) for m in MIGRATIONS]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s",
+                        datefmt="%Y-%m-%d %H:%M:%S")
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if command == "upgrade":
+        upgrade()
+    elif command == "partitions":
+        maintain_partitions()
+    elif command == "drop-old":
+        drop_old_table()
+    for m, is_applied in status():
+        print(f"{m.version:03d}_{m.name:<24} {'적용됨' if is_applied else '대기'}{' (heavy)' if m.heavy else ''}")
@@ -0,0 +1,5 @@
+# 저장소 루트를 import 경로에 추가 (pytest를 어느 위치에서 실행해도 worker/db 패키지를 찾도록)
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
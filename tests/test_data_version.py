@@ -0,0 +1,81 @@
+# 스크리너 결과 캐시의 무효화: 시장별 데이터 버전, 프로세스 간 수집 이벤트, 재계산 판단
+import threading
+from datetime import datetime
+
+import pytest
+
+from worker import data_version, event_bridge, universe
+from worker.events import PriceIngested
+
+
+def test_bump_only_touches_given_markets():
+    us, kr, total = data_version.current("US"), data_version.current("KR"), data_version.current()
+    version = data_version.bump(["US"])
+    assert version == data_version.current() == total + 1
+    assert data_version.current("US") == version > us
+    assert data_version.current("KR") == kr  # 다른 시장 캐시는 그대로
+    assert data_version.current("XX") == 0
+
+    # 시장 없이 올리면 전체 버전만
+    data_version.bump()
+    assert data_version.current() == version + 1
+    assert data_version.current("US") == version
+
+
+def test_concurrent_bumps_are_unique():
+    start = data_version.current()
+    seen: list[int] = []
+    lock = threading.Lock()
+
+    def work():
+        for _ in range(200):
+            v = data_version.bump(["KR"])
+            with lock:
+                seen.append(v)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(seen) == list(range(start + 1, start + 801))
+    assert data_version.current("KR") == data_version.current() == start + 800
+
+
+def test_notify_payload_round_trip(monkeypatch):
+    event = PriceIngested("US", ["AAPL", "MSFT", "NVDA"], ["AAPL"], 4)
+    got = event_bridge._to_event(event_bridge._payload(event))
+    assert (got.market, got.changed_tickers, got.rows_changed) == ("US", ["AAPL"], 4)
+
+    # payload 한도를 넘으면 티커 목록 없이 → 받는 쪽은 시장 전체가 바뀐 것으로
+    many = [f"T{i:05d}" for i in range(2000)]
+    payload = event_bridge._payload(PriceIngested("KR", many, many, 2000))
+    assert len(payload.encode()) <= event_bridge._PAYLOAD_LIMIT
+    monkeypatch.setattr(universe, "market_members", lambda market: [f"{market}-ALL"])
+    got = event_bridge._to_event(payload)
+    assert (got.market, got.changed_tickers, got.rows_changed) == ("KR", ["KR-ALL"], 2000)
+
+
+def test_needs_screen(monkeypatch):
+    bot = pytest.importorskip("worker.alert_stock_info_by_discord", exc_type=ImportError)
+    monkeypatch.setattr(bot, "_screen_cache", {})
+    new_bars = []
+    monkeypatch.setattr(bot.market_calendar, "has_new_bars", lambda market, since: bool(new_bars))
+
+    assert bot._needs_screen("US", True, None)  # 아직 계산한 적 없음
+    bot._screen_cache["US"] = {"version": data_version.current("US"), "marker": "m1",
+                               "at": datetime(2025, 3, 14), "result": {}}
+    assert not bot._needs_screen("US", True, "m1")
+    assert not bot._needs_screen("US", True, None)  # 표식 조회 실패 → 버전으로만
+    assert bot._needs_screen("US", True, "m2")      # 다른 프로세스가 저장
+
+    # 다른 시장 수집은 영향 없음
+    data_version.bump(["KR"])
+    assert not bot._needs_screen("US", True, "m1")
+
+    # 버전이 올라가도 주기 실행은 새 봉이 있을 때만, 수집 이벤트(use_calendar=False)는 바로
+    data_version.bump(["US"])
+    assert not bot._needs_screen("US", True, "m1")
+    assert bot._needs_screen("US", False, "m1")
+    new_bars.append(1)
+    assert bot._needs_screen("US", True, "m1")
@@ -0,0 +1,75 @@
+# 커넥션 풀: 동시 체크아웃이 minconn을 넘어도 반납된 커넥션을 닫지 않고 재사용하는지
+# psycopg2.connect를 가짜 커넥션으로 바꿔서 DB 없이 확인
+import threading
+
+import psycopg2
+import pytest
+from psycopg2 import extensions
+
+from db.db import ConnectionPool
+
+
+class FakeInfo:
+    transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.info = FakeInfo()
+
+    def close(self):
+        self.closed = 1
+
+    def rollback(self):
+        pass
+
+    def set_session(self, **kwargs):
+        pass
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    created = []
+
+    def connect(*args, **kwargs):
+        conn = FakeConnection()
+        created.append(conn)
+        return conn
+
+    monkeypatch.setattr(psycopg2, "connect", connect)
+    return created
+
+
+def test_parallel_checkouts_reuse_connections(connections):
+    workers, rounds = 6, 20
+    pool = ConnectionPool(minconn=1, maxconn=workers, timeout=5, health_check_sec=3600)
+    barrier = threading.Barrier(workers)
+
+    def worker():
+        for _ in range(rounds):
+            # 모든 스레드가 동시에 커넥션을 잡고 있는 구간을 만들어 minconn을 넘김
+            with pool.connection():
+                barrier.wait()
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = pool.stats.snapshot()
+    assert stats["checkouts"] == workers * rounds
+    assert stats["connections_created"] <= workers
+    assert not any(c.closed for c in connections)
+    pool.close()
+
+
+def test_closed_connection_is_replaced(connections):
+    pool = ConnectionPool(minconn=1, maxconn=2, timeout=5, health_check_sec=3600)
+    with pool.connection() as conn:
+        conn.close()
+    with pool.connection() as conn:
+        assert not conn.closed
+    assert pool.stats.snapshot()["connections_created"] == 2
+    pool.close()
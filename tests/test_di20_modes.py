@@ -0,0 +1,112 @@
+# 스크리닝 방식(loop / bulk / state / table)이 같은 패널에서 같은 결과를 내는지
+# DI20_SCREEN_MODE 기본값이 바뀌어도 결과가 달라지지 않아야 한다. DB 없이 각 방식의 계산 경로만 비교
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from worker.di20_engine import panel_to_array, screen_low_di20
+from worker.di20_state import Di20State, LOOKBACK
+from worker.get_low_di20_stocks import _is_low_di20
+from worker.indicators import compute_indicators
+
+
+def make_panel(n_tickers: int = 40, days: int = 320, seed: int = 7) -> pd.DataFrame:
+    """
+    (date x ticker) 종가 패널
+    거래정지(중간 NaN 구간), 신규 상장(앞쪽 NaN), 20봉 미만 종목, 마지막 봉 급락(조건 충족) 종목 포함
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2024-01-02", periods=days)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (days, n_tickers)), axis=0))
+    closes[-1, : n_tickers // 4] *= 0.8           # 급락 → DI20 하위 7% 안쪽
+    closes[100:140, 1] = np.nan                    # 긴 거래정지
+    closes[-30:-25, 2] = np.nan                    # 최근 거래정지
+    closes[::9, 3] = np.nan                        # 띄엄띄엄 빈 봉
+    closes[: days - 150, 4] = np.nan               # 신규 상장 (252봉 미만)
+    closes[: days - 15, 5] = np.nan                # 20봉 미만 → 어느 방식에서도 제외
+    return pd.DataFrame(closes, index=dates, columns=[f"T{i:02d}" for i in range(n_tickers)])
+
+
+def last_bars(panel: pd.DataFrame, ticker: str, bars: int = LOOKBACK) -> pd.Series:
+    """DB 경로와 같은 종목별 최근 bars봉 (ORDER BY date DESC LIMIT bars)"""
+    return panel[ticker].dropna().iloc[-bars:]
+
+
+def screen_loop(panel):
+    hits = []
+    for t in panel.columns:
+        close = last_bars(panel, t)
+        if close.empty:
+            continue
+        curr, p, is_low = _is_low_di20(close.reset_index(drop=True))
+        if is_low:
+            hits.append((t, curr, p))
+    return hits
+
+
+def screen_bulk(panel):
+    return screen_low_di20(*panel_to_array(panel))
+
+
+def screen_state(panel):
+    hits = []
+    for t in panel.columns:
+        close = last_bars(panel, t)
+        st = Di20State.from_bars(list(zip(close.index, close.to_numpy())))
+        curr, p = st.current(), st.quantile()
+        if curr <= p:
+            hits.append((t, curr, p))
+    return hits
+
+
+def screen_table(panel):
+    # 지표 테이블의 종목별 최신 행 = 전체 이력으로 계산한 마지막 날짜 값
+    hits = []
+    for t in panel.columns:
+        close = panel[t].dropna().to_numpy()
+        if len(close) == 0:
+            continue
+        _, di, p = compute_indicators(close, start=len(close) - 1)
+        if di[-1] <= p[-1]:
+            hits.append((t, di[-1], p[-1]))
+    return hits
+
+
+@pytest.fixture(scope="module")
+def panel():
+    return make_panel()
+
+
+@pytest.fixture(scope="module")
+def expected(panel):
+    hits = screen_loop(panel)
+    assert hits, "패널에 조건 충족 종목이 있어야 비교 의미가 있음"
+    return hits
+
+
+@pytest.mark.parametrize("screen", [screen_bulk, screen_state, screen_table], ids=["bulk", "state", "table"])
+def test_modes_match_loop(panel, expected, screen):
+    got = screen(panel)
+    assert [t for t, _, _ in got] == [t for t, _, _ in expected]
+    for (_, curr, p), (_, exp_curr, exp_p) in zip(got, expected):
+        assert math.isclose(curr, exp_curr, rel_tol=1e-9, abs_tol=1e-9)
+        assert math.isclose(p, exp_p, rel_tol=1e-9, abs_tol=1e-9)
+
+
+def test_short_history_excluded(panel, expected):
+    assert "T05" not in {t for t, _, _ in expected}
+    assert "T05" not in {t for t, _, _ in screen_bulk(panel)}
+
+
+def test_incremental_state_matches_rebuild(panel):
+    # 한 봉씩 반영하면서 장중 수정(마지막 봉 재반영)을 섞어도 전체 재구성과 같아야 함
+    close = panel["T00"].dropna()
+    st = Di20State()
+    for d, c in zip(close.index, close.to_numpy()):
+        assert st.apply(d, c * 1.01)
+        assert st.apply(d, c)
+    rebuilt = Di20State.from_bars(list(zip(close.index, close.to_numpy())))
+    assert math.isclose(st.current(), rebuilt.current(), rel_tol=1e-9)
+    assert math.isclose(st.quantile(), rebuilt.quantile(), rel_tol=1e-9)
@@ -0,0 +1,76 @@
+# DI20 증분 상태 저장/복원: 파일로 저장했다가 다시 읽어도 같은 상태에서 이어서 갱신되는지
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from worker.di20_state import Di20State, Di20StateStore
+
+
+def make_bars(days: int, seed: int) -> list[tuple]:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2024-01-02", periods=days)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+    return [(d.date(), float(c)) for d, c in zip(dates, closes)]
+
+
+@pytest.fixture
+def bars():
+    # stock_id → 이력 (20봉 미만 종목 포함)
+    return {1: make_bars(300, 1), 2: make_bars(120, 2), 3: make_bars(10, 3)}
+
+
+def assert_same(a: Di20State, b: Di20State):
+    assert a.to_dict() == b.to_dict()
+    for x, y in ((a.current(), b.current()), (a.quantile(), b.quantile())):
+        assert (math.isnan(x) and math.isnan(y)) or x == y
+
+
+def assert_close(a: Di20State, b: Di20State):
+    # 증분 갱신은 이동 합계를 쓰므로 새로 만든 상태와 마지막 자리까지 같지는 않음
+    assert a.last_date == b.last_date
+    assert list(a.closes) == list(b.closes)
+    assert np.allclose(list(a.di20), list(b.di20), rtol=1e-9, atol=1e-9)
+    assert np.allclose([a.current(), a.quantile()], [b.current(), b.quantile()],
+                       rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+def test_save_load_round_trip(tmp_path, bars):
+    store = Di20StateStore(str(tmp_path / "state.json"))
+    store.states = {sid: Di20State.from_bars(b[:-5]) for sid, b in bars.items()}
+    store.save()
+
+    loaded = Di20StateStore(store.path)
+    loaded.load()
+    assert loaded.states.keys() == store.states.keys()
+    for sid in bars:
+        assert_same(loaded.states[sid], store.states[sid])
+        assert loaded.states[sid].sorted_di20 == sorted(loaded.states[sid].di20)
+
+    # 복원한 상태에 남은 봉을 반영하면 전체 이력으로 만든 상태와 같아야 함
+    rows = [(sid, d, c) for sid, b in bars.items() for d, c in b[-5:]]
+    assert loaded.apply_rows(rows) == len(rows)
+    for sid, b in bars.items():
+        assert_close(loaded.states[sid], Di20State.from_bars(b))
+
+
+def test_past_bar_revision_drops_state(tmp_path, bars):
+    store = Di20StateStore(str(tmp_path / "state.json"))
+    store.states = {1: Di20State.from_bars(bars[1])}
+    d, c = bars[1][-10]
+    assert store.apply_rows([(1, d, c * 1.1)]) == 0
+    assert 1 not in store.states
+
+
+def test_reload_if_changed_picks_up_other_writer(tmp_path, bars):
+    path = str(tmp_path / "state.json")
+    reader = Di20StateStore(path)
+    reader.reload_if_changed()  # 파일이 아직 없으면 그대로
+    assert reader.states == {}
+
+    writer = Di20StateStore(path)
+    writer.states = {1: Di20State.from_bars(bars[1])}
+    writer.save()
+    reader.reload_if_changed()
+    assert_same(reader.states[1], writer.states[1])
@@ -0,0 +1,80 @@
+# 이벤트 버스: 일반 함수 구독자는 발행한 스레드에서, 코루틴 구독자는 자기 이벤트 루프에서
+import asyncio
+import threading
+
+from worker.events import PRICE_INGESTED, EventBus, PriceIngested
+
+
+def event(market: str = "US") -> PriceIngested:
+    return PriceIngested(market, ["AAPL", "MSFT"], ["AAPL"], 3)
+
+
+def test_sync_subscribers_called_in_publisher_thread():
+    bus = EventBus()
+    got = []
+
+    def handler(e):
+        got.append((e.market, threading.get_ident()))
+
+    bus.subscribe(PRICE_INGESTED, handler)
+    bus.subscribe("other", lambda e: got.append("other"))
+    assert bus.publish(PRICE_INGESTED, event()) == 1
+    assert got == [("US", threading.get_ident())]
+
+    bus.unsubscribe(PRICE_INGESTED, handler)
+    assert bus.publish(PRICE_INGESTED, event()) == 0
+    assert bus.publish("no-subscribers", event()) == 0
+
+
+def test_failing_subscriber_does_not_block_others():
+    bus = EventBus()
+    got = []
+
+    def broken(e):
+        raise RuntimeError("screening failed")
+
+    bus.subscribe(PRICE_INGESTED, broken)
+    bus.subscribe(PRICE_INGESTED, lambda e: got.append(e.rows_changed))
+    assert bus.publish(PRICE_INGESTED, event()) == 2
+    assert got == [3]
+
+
+def test_coroutine_subscriber_runs_on_its_loop():
+    bus = EventBus()
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        received: asyncio.Queue = asyncio.Queue()
+
+        async def handler(e):
+            assert asyncio.get_running_loop() is loop
+            await received.put(e.market)
+
+        bus.subscribe(PRICE_INGESTED, handler)  # 지금 실행 중인 루프에 묶임
+        # 수집 스레드에서 발행
+        publisher = threading.Thread(target=bus.publish, args=(PRICE_INGESTED, event("KR")))
+        publisher.start()
+        market = await asyncio.wait_for(received.get(), 5)
+        publisher.join()
+        return market
+
+    assert asyncio.run(main()) == "KR"
+
+
+def test_closed_loop_subscriber_skipped():
+    bus = EventBus()
+    loop = asyncio.new_event_loop()
+    loop.close()
+    got = []
+
+    async def handler(e):
+        got.append(e)
+
+    bus.subscribe(PRICE_INGESTED, handler, loop=loop)
+    bus.subscribe(PRICE_INGESTED, got.append)
+    assert bus.publish(PRICE_INGESTED, event()) == 2
+    assert len(got) == 1
+
+
+def test_price_ingested_repr():
+    assert repr(event()) == "PriceIngested(US, 2종목, 변경 1종목/3행)"
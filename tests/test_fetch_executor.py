@@ -0,0 +1,155 @@
+# yfinance 호출 실행기: 토큰 버킷, AIMD 동시 실행 제한, 재시도/백오프
+import threading
+
+import pytest
+
+from worker import fetch_executor
+from worker.fetch_executor import (AdaptiveLimiter, FetchExecutor, ThrottledError, TokenBucket,
+                                   is_retryable_error, is_throttle_error, is_throttle_message)
+
+
+class FakeClock:
+    """time.monotonic / time.sleep 대체: sleep하면 시계만 앞으로"""
+    def __init__(self):
+        self.now = 1000.0
+        self.slept: list[float] = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, sec):
+        self.slept.append(sec)
+        self.now += sec
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = FakeClock()
+    monkeypatch.setattr(fetch_executor.time, "monotonic", c.monotonic)
+    monkeypatch.setattr(fetch_executor.time, "sleep", c.sleep)
+    monkeypatch.setattr(fetch_executor.random, "uniform", lambda a, b: 1.0)
+    return c
+
+
+def test_token_bucket_burst_then_rate(clock):
+    bucket = TokenBucket(rate=4, capacity=8)
+    started = clock.now
+    for _ in range(8):
+        bucket.acquire()
+    assert clock.now == started  # 버스트만큼은 대기 없음
+    for _ in range(4):
+        bucket.acquire()
+    assert clock.now - started == pytest.approx(1.0)  # 이후는 초당 4개
+
+
+def test_limiter_halves_on_throttle_and_grows_on_success():
+    limiter = AdaptiveLimiter(initial=8, minimum=1, maximum=8)
+    limiter.on_throttle()
+    assert limiter.limit == 4
+    limiter.on_throttle()
+    limiter.on_throttle()
+    limiter.on_throttle()
+    assert limiter.limit == 1  # 최소값 아래로 내려가지 않음
+
+    # 현재 상한만큼 연속 성공하면 +1 (1 → 2는 1번, 2 → 3은 2번)
+    limiter.on_success()
+    assert limiter.limit == 2
+    limiter.on_success()
+    assert limiter.limit == 2
+    limiter.on_success()
+    assert limiter.limit == 3
+
+    # 요청 제한이 나면 연속 성공 횟수도 초기화
+    limiter.on_success()
+    limiter.on_throttle()
+    assert limiter.limit == 1
+    limiter.on_success()
+    assert limiter.limit == 2
+
+
+def test_limiter_blocks_at_limit():
+    limiter = AdaptiveLimiter(initial=1, minimum=1, maximum=2)
+    limiter.acquire()
+    entered = threading.Event()
+
+    def second():
+        limiter.acquire()
+        entered.set()
+        limiter.release()
+
+    t = threading.Thread(target=second)
+    t.start()
+    assert not entered.wait(0.1)
+    limiter.release()
+    assert entered.wait(1)
+    t.join()
+
+
+def test_call_retries_throttle_with_backoff(clock):
+    executor = FetchExecutor(rate=1000, burst=10, max_concurrency=8, min_concurrency=1, retries=3, backoff_sec=1.0)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ThrottledError("429")
+        return "ok"
+
+    assert executor.call(flaky) == "ok"
+    assert len(attempts) == 3
+    assert executor.limiter.limit == 2  # 8 → 4 → 2, 마지막 성공 1번으로는 아직 안 늘어남
+    assert clock.slept == [1.0, 2.0]  # 지수 백오프 (지터 1.0 고정)
+
+
+def test_call_does_not_retry_other_errors(clock):
+    executor = FetchExecutor(rate=1000, burst=10, retries=3, backoff_sec=1.0)
+    attempts = []
+
+    def broken():
+        attempts.append(1)
+        raise ValueError("bad symbol")
+
+    with pytest.raises(ValueError):
+        executor.call(broken)
+    assert len(attempts) == 1
+    assert executor.limiter.limit == executor.limiter.maximum
+    assert executor.limiter.in_flight == 0
+
+
+def test_call_gives_up_after_retries(clock):
+    executor = FetchExecutor(rate=1000, burst=10, max_concurrency=4, retries=2, backoff_sec=0.5)
+
+    def always_timeout():
+        raise TimeoutError("read timed out")
+
+    with pytest.raises(TimeoutError):
+        executor.call(always_timeout)
+    assert clock.slept == [0.5, 1.0]
+    assert executor.limiter.limit == 4  # 타임아웃은 재시도만, 감속은 요청 제한일 때만
+
+
+def test_charge_consumes_tokens(clock):
+    executor = FetchExecutor(rate=2, burst=1, retries=0)
+    started = clock.now
+    executor.call(lambda: executor.charge(2))  # 요청 3번 = 토큰 3개
+    assert clock.now - started == pytest.approx(1.0)
+
+
+def test_throttle_classification():
+    assert is_throttle_error(ThrottledError())
+    assert is_retryable_error(ThrottledError())
+    assert is_retryable_error(ConnectionError())
+    assert not is_retryable_error(KeyError("x"))
+    assert is_throttle_message("['AAPL']: ThrottledError('429')")
+    assert is_throttle_message("['AAPL']: YFRateLimitError('Too Many Requests. Rate limited.')")
+    assert not is_throttle_message("['AAPL']: YFTzMissingError('possibly delisted')")
+
+    class Response:
+        status_code = 429
+
+    class HTTPError(Exception):
+        response = Response()
+
+    assert is_throttle_error(HTTPError())
+    if fetch_executor.YFRateLimitError is not None:
+        assert is_throttle_error(fetch_executor.YFRateLimitError())
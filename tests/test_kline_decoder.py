@@ -0,0 +1,72 @@
+# kline 디코더: 빠른 경로(선필터 + 정규식, 배치 병합)가 json.loads 기준과 같은 결과를 내는지
+import json
+
+import pytest
+
+from bench.bench_kline_decode import baseline, coalesce, synth_frames
+from coin.kline_decoder import Kline, KlineDecoder, decode, stream_symbol
+
+
+def kline_frame(symbol: str, start: int, q: str, closed: bool = False, stream: str | None = None,
+                reorder: bool = False) -> str:
+    k = {"t": start, "T": start + 3_599_999, "s": symbol, "i": "1h", "f": 1, "L": 2,
+         "o": "1.0", "c": "1.1", "h": "1.2", "l": "0.9", "v": "10.0", "n": 3,
+         "x": closed, "q": q, "V": "5.0", "Q": "5.5", "B": "0"}
+    if reorder:
+        # 필드 순서가 바뀐 메시지 → 정규식이 안 맞아서 json.loads로 대체되는 경로
+        k = dict(reversed(list(k.items())))
+    data = {"e": "kline", "E": start + 1000, "s": symbol, "k": k}
+    stream = f"{symbol.lower()}@kline_1h" if stream is None else stream
+    return json.dumps({"stream": stream, "data": data}, separators=(",", ":"))
+
+
+@pytest.mark.parametrize("frame", [
+    kline_frame("BTCUSDT", 1_760_000_400_000, "12345.67890000"),
+    kline_frame("ETHUSDT", 1_760_004_000_000, "0.5", closed=True),
+    kline_frame("1000PEPEUSDT", 1_760_004_000_000, "99", reorder=True),
+])
+def test_decode_matches_json(frame):
+    assert decode(frame) == baseline([frame], {json.loads(frame)["data"]["s"]})[0]
+
+
+def test_non_kline_messages():
+    assert decode('{"result":null,"id":1}') is None
+    assert stream_symbol('{"result":null,"id":1}') is None
+    assert stream_symbol(kline_frame("BTCUSDT", 0, "1")) == "btcusdt"
+
+
+def test_batch_matches_baseline_on_synthetic_stream():
+    frames, watch = synth_frames(20_000, n_symbols=60, n_watch=15, seed=1)
+    decoder = KlineDecoder(watch)
+    batch = 250
+    got, expected = [], []
+    for i in range(0, len(frames), batch):
+        klines, filtered, other = decoder.decode_batch(frames[i:i + batch])
+        got += klines
+        expected += coalesce(baseline(frames[i:i + batch], watch))
+    assert got == expected
+    assert got
+
+
+def test_batch_counts_and_coalescing():
+    decoder = KlineDecoder({"BTCUSDT"})
+    frames = [
+        kline_frame("BTCUSDT", 1, "1.0"),
+        kline_frame("ETHUSDT", 1, "2.0"),                   # 감시 목록 밖
+        '{"result":null,"id":7}',                           # 구독 응답
+        kline_frame("BTCUSDT", 2, "3.0"),
+        kline_frame("BTCUSDT", 1, "4.0", closed=True),      # 같은 봉 → 마지막 값, 마지막 순서
+        kline_frame("BTCUSDT", 2, "5.0", stream="btcusdt"),  # 스트림 이름에 "@" 없음 → 전체 파싱
+    ]
+    klines, filtered, other = decoder.decode_batch(frames)
+    assert klines == [Kline("BTCUSDT", 1, 4.0, True), Kline("BTCUSDT", 2, 5.0, False)]
+    assert (filtered, other) == (1, 1)
+
+
+def test_bytes_frames_and_watchlist_change():
+    watch = {"BTCUSDT"}
+    decoder = KlineDecoder(watch)
+    frame = kline_frame("ETHUSDT", 1, "1.0").encode()
+    assert decoder.decode_batch([frame])[1] == 1
+    decoder.set_watchlist({"BTCUSDT", "ETHUSDT"})
+    assert decoder.decode_batch([frame])[0] == [Kline("ETHUSDT", 1, 1.0, False)]
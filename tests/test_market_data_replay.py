@@ -0,0 +1,73 @@
+# ReplayProvider: 시드 고정 합성 데이터, yf.download와 같은 모양, 실패/요청 제한 주입, 녹화 파일 재생
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from worker.fetch_executor import ThrottledError
+from worker.market_data import PRICE_FIELDS, ReplayProvider, missing_tickers, period_days
+
+END = date(2025, 3, 14)
+
+
+def test_period_days():
+    assert period_days("10d") == 10
+    assert period_days("2wk") == 14
+    assert period_days("6mo") == 186
+    assert period_days("2y") == 732
+    with pytest.raises(ValueError):
+        period_days("max")
+
+
+def test_shape_matches_yf_download():
+    df = ReplayProvider(end=END).download(["AAPL", "005930.KS"], period="1mo")
+    assert isinstance(df.columns, pd.MultiIndex)
+    assert list(pd.unique(df.columns.get_level_values(0))) == ["AAPL", "005930.KS"]
+    assert list(df["AAPL"].columns) == PRICE_FIELDS
+    assert df.index.name == "Date"
+    assert df.index[-1] == pd.Timestamp(END)
+    assert (df.index.dayofweek < 5).all()
+    assert df.notna().all().all()
+    assert missing_tickers(df, ["AAPL", "005930.KS", "MSFT"]) == ["MSFT"]
+
+
+def test_synthetic_frames_are_deterministic():
+    a = ReplayProvider(end=END).download(["AAPL", "MSFT"], period="6mo")
+    b = ReplayProvider(end=END).download(["MSFT", "AAPL"], period="6mo")
+    pd.testing.assert_frame_equal(a["AAPL"], b["AAPL"])
+    # 구간을 다르게 받아도 같은 날짜는 같은 값 (재실행 시 upsert가 변경 없음)
+    c = ReplayProvider(end=END).download(["AAPL"], start="2025-03-03")
+    pd.testing.assert_frame_equal(c["AAPL"], a["AAPL"].loc["2025-03-03":])
+    # 시드가 다르면 다른 값
+    d = ReplayProvider(end=END, seed=1).download(["AAPL"], period="6mo")
+    assert not d["AAPL"]["Close"].equals(a["AAPL"]["Close"])
+
+
+def test_failure_rate_drops_tickers():
+    tickers = [f"T{i}" for i in range(200)]
+    df = ReplayProvider(end=END, failure_rate=0.5, seed=3).download(tickers, period="10d")
+    missing = missing_tickers(df, tickers)
+    assert 0 < len(missing) < len(tickers)
+    assert ReplayProvider(end=END, failure_rate=1.0).download(tickers, period="10d").empty
+
+
+def test_throttle_rate_raises():
+    with pytest.raises(ThrottledError):
+        ReplayProvider(end=END, throttle_rate=1.0).download(["AAPL"], period="10d")
+    with pytest.raises(ThrottledError):
+        ReplayProvider(throttle_rate=1.0).fetch_info("AAPL")
+
+
+def test_recorded_csv_and_info(tmp_path):
+    recorded = ReplayProvider(end=END).download(["AAPL"], period="1mo")["AAPL"]
+    recorded.to_csv(tmp_path / "AAPL.csv", index_label="Date")
+    (tmp_path / "stock_info.json").write_text('{"AAPL": ["Apple Inc.", "NMS", "United States", 3000]}')
+
+    provider = ReplayProvider(root=str(tmp_path), end=END, seed=9)
+    df = provider.download(["AAPL", "MSFT"], start="2025-03-10")
+    # 녹화 파일이 있으면 시드와 상관없이 그 값을, 없으면 합성 데이터를
+    pd.testing.assert_frame_equal(df["AAPL"], recorded.loc["2025-03-10":], check_freq=False)
+    assert df["MSFT"].notna().all().all()
+    assert provider.fetch_info("AAPL") == ("AAPL", "Apple Inc.", "NMS", "United States", 3000)
+    assert provider.fetch_info("000660.KS")[2:4] == ("KSC", "South Korea")
+    assert provider.fetch_marketcap("AAPL") == ("AAPL", 3000)
@@ -0,0 +1,109 @@
+# 잡 오케스트레이션: DAG 실행 순서, 앞 단계 실패 시 건너뛰기, 같은 잡 겹침 방지, 실행 기록
+import json
+import threading
+
+import pytest
+
+from worker import orchestrator
+from worker.orchestrator import FAILED, OK, OVERLAP, SKIPPED, Dag, Orchestrator, Task
+
+
+@pytest.fixture
+def runs_file(tmp_path, monkeypatch):
+    path = tmp_path / "job_runs.jsonl"
+    monkeypatch.setattr(orchestrator, "RUNS_FILE", str(path))
+    return path
+
+
+def test_tasks_run_in_dependency_order():
+    order = []
+
+    def step(name, value):
+        def fn(ctx):
+            order.append(name)
+            return value(ctx)
+        return fn
+
+    # 선언 순서와 상관없이 의존 순서대로, 앞 단계 결과는 ctx[이름]
+    dag = Dag("d", [
+        Task("screen", step("screen", lambda ctx: ctx["prices"] * 2), deps=("prices",)),
+        Task("prices", step("prices", lambda ctx: ctx["info"] + 1), deps=("info",)),
+        Task("info", step("info", lambda ctx: 1)),
+    ])
+    ctx = {}
+    outcomes = dag.run(ctx)
+    assert order == ["info", "prices", "screen"]
+    assert ctx == {"info": 1, "prices": 2, "screen": 4}
+    assert [o for o, _ in outcomes.values()] == [OK, OK, OK]
+
+
+def test_failed_dependency_skips_downstream():
+    ran = []
+
+    def boom(ctx):
+        raise RuntimeError("download failed")
+
+    dag = Dag("d", [
+        Task("info", lambda ctx: ran.append("info")),
+        Task("prices", boom, deps=("info",)),
+        Task("screen", lambda ctx: ran.append("screen"), deps=("prices",)),
+        Task("partitions", lambda ctx: ran.append("partitions"), deps=("info",)),
+    ])
+    ctx = {}
+    outcomes = dag.run(ctx)
+    assert {k: o for k, (o, _) in outcomes.items()} == {
+        "info": OK, "prices": FAILED, "screen": SKIPPED, "partitions": OK}
+    assert ran == ["info", "partitions"]
+    assert "download failed" in ctx["errors"]["prices"]
+
+
+def test_invalid_dag():
+    with pytest.raises(ValueError, match="순환"):
+        Dag("d", [Task("a", lambda ctx: 0, deps=("b",)), Task("b", lambda ctx: 0, deps=("a",))])
+    with pytest.raises(ValueError, match="없는 단계"):
+        Dag("d", [Task("a", lambda ctx: 0, deps=("missing",))])
+
+
+def test_run_records_outcome(runs_file):
+    orch = Orchestrator()
+    ok = Dag("d", [Task("prices", lambda ctx: [3, 4])])
+    record = orch.run("cycle:us", ok, ctx={}, window_sec=60, rows_fn=lambda ctx: sum(ctx["prices"]))
+    assert (record.outcome, record.rows_changed) == (OK, 7)
+    assert list(record.stages) == ["prices"]
+
+    failing = Dag("d", [Task("prices", lambda ctx: 1 / 0)])
+    assert orch.run("cycle:us", failing).outcome == FAILED
+
+    assert [r.outcome for r in orch.records("cycle:us")] == [OK, FAILED]
+    assert orch.records("cycle:kr") == []
+    summary = orch.summary("cycle:us")
+    assert (summary["runs"], summary["outcomes"], summary["over_window"]) == (2, {OK: 1, FAILED: 1}, 0)
+
+    lines = [json.loads(line) for line in runs_file.read_text(encoding="utf-8").splitlines()]
+    assert [(r["job"], r["outcome"], r["rows_changed"]) for r in lines] == [
+        ("cycle:us", OK, 7), ("cycle:us", FAILED, 0)]
+    assert lines[0]["stages"]["prices"][0] == OK
+
+
+def test_overlapping_run_is_skipped(runs_file):
+    orch = Orchestrator()
+    entered, release = threading.Event(), threading.Event()
+
+    def slow(ctx):
+        entered.set()
+        release.wait(5)
+
+    first: list = []
+    t = threading.Thread(target=lambda: first.append(orch.run("cycle:us", Dag("d", [Task("s", slow)]))))
+    t.start()
+    assert entered.wait(5)
+
+    # 같은 잡은 기다리지 않고 OVERLAP, 다른 잡은 그대로 실행
+    assert orch.run("cycle:us", Dag("d", [Task("s", lambda ctx: None)])).outcome == OVERLAP
+    assert orch.run("cycle:kr", Dag("d", [Task("s", lambda ctx: None)])).outcome == OK
+
+    release.set()
+    t.join(5)
+    assert first[0].outcome == OK
+    assert orch.summary("cycle:us")["runs"] == 1
+    assert orch.summary("cycle:us")["outcomes"] == {OVERLAP: 1, OK: 1}
@@ -0,0 +1,100 @@
+# frame_to_price_rows(벡터화)가 기존 행 단위 변환(itertuples)과 같은 행을 만드는지
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from worker.update_stock_info_by_yfinance import frame_to_price_rows
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def legacy_rows(df: pd.DataFrame, stock_id_map: dict[str, int], batch: list[str]) -> list[tuple]:
+    """벡터화 이전 stock_price_sync의 행 생성 로직 (비교 기준)"""
+    rows = []
+    if isinstance(df.columns, pd.MultiIndex) and df.columns.nlevels == 2:
+        frames = [(t, df[t]) for t in pd.unique(df.columns.get_level_values(0))]
+    else:
+        frames = [(batch[0], df)]
+
+    for t, sub in frames:
+        sid = stock_id_map.get(t)
+        if sid is None:
+            continue
+        for dt, rec in sub.iterrows():
+            if isinstance(dt, pd.Timestamp) and dt.tz is not None:
+                dt = dt.tz_localize(None)
+            vol = rec.get("Volume")
+            vol_out = None if pd.isna(vol) else int(vol)
+            rows.append((sid, dt, rec.get("Open"), rec.get("High"), rec.get("Low"), rec.get("Close"), vol_out))
+    return rows
+
+
+def normalize(rows: list[tuple]) -> list[tuple]:
+    """NaN → None, 숫자는 float, 날짜는 naive datetime으로 맞춰 비교"""
+    def cell(v):
+        if v is None or (isinstance(v, float) and math.isnan(v)):
+            return None
+        return float(v)
+
+    return sorted(
+        (sid, pd.Timestamp(dt).to_pydatetime(), *(cell(v) for v in prices), vol)
+        for sid, dt, *prices, vol in rows
+    )
+
+
+def drop_empty_bars(rows: list[tuple]) -> list[tuple]:
+    # 새 변환은 OHLCV가 전부 빈 봉(미거래일)을 의도적으로 제외
+    return [r for r in rows if any(v is not None for v in r[2:])]
+
+
+def make_frame(tickers: list[str], days: int = 15, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2025-03-03", periods=days, freq="B", tz="America/New_York", name="Date")
+    parts = {}
+    for t in tickers:
+        close = 50 + rng.normal(0, 1, days).cumsum()
+        parts[t] = pd.DataFrame({
+            "Open": close + rng.normal(0, 0.1, days),
+            "High": close + 1,
+            "Low": close - 1,
+            "Close": close,
+            "Volume": rng.integers(1_000, 1_000_000, days).astype(float),
+        }, index=dates)
+    return pd.concat(parts, axis=1)
+
+
+@pytest.fixture
+def stock_id_map():
+    return {"AAA": 1, "BBB": 2, "CCC": 3}
+
+
+def test_multi_ticker_matches_legacy(stock_id_map):
+    tickers = ["AAA", "BBB", "CCC", "ZZZ"]   # ZZZ: DB에 없는 티커
+    df = make_frame(tickers)
+    df.loc[df.index[2], ("AAA", "Open")] = np.nan          # 일부 칸만 빈 봉
+    df.loc[df.index[4], ("BBB", "Volume")] = np.nan
+    df.loc[df.index[6], "CCC"] = np.nan                    # 전부 빈 봉 (거래정지)
+    df.loc[df.index[7], ("AAA", "Volume")] = 1234.9        # 볼륨 소수 → 버림
+
+    got = normalize(frame_to_price_rows(df, stock_id_map))
+    expected = drop_empty_bars(normalize(legacy_rows(df, stock_id_map, tickers)))
+    assert got == expected
+    assert len(expected) == 3 * 15 - 1
+
+
+def test_single_level_matches_legacy(stock_id_map):
+    df = make_frame(["BBB"])["BBB"]
+    df.iloc[0, :] = np.nan
+
+    got = normalize(frame_to_price_rows(df, stock_id_map, fallback_ticker="BBB"))
+    expected = drop_empty_bars(normalize(legacy_rows(df, stock_id_map, ["BBB"])))
+    assert got == expected
+    assert {r[0] for r in got} == {2}
+
+
+def test_unknown_or_empty_frame(stock_id_map):
+    assert frame_to_price_rows(pd.DataFrame(), stock_id_map) == []
+    df = make_frame(["ZZZ"])
+    assert frame_to_price_rows(df, stock_id_map) == []
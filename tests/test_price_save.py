@@ -0,0 +1,126 @@
+# 가격 저장: 행 수에 따른 execute_values / COPY 선택, COPY용 CSV 스트림
+import csv
+import io
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+
+from worker import update_stock_info_by_yfinance as prices
+from worker.update_stock_info_by_yfinance import _CsvRowStream, save_price_to_db
+
+
+def make_rows(n: int) -> list[tuple]:
+    return [(i % 7 + 1, date(2025, 1, 1 + i % 28), 1.5, 2.25, 1.0, 2.0, None if i % 5 == 0 else 1000 + i)
+            for i in range(n)]
+
+
+class FakeCursor:
+    """COPY 경로용: 실행한 SQL과 COPY로 받은 CSV를 기록"""
+    def __init__(self):
+        self.executed: list[str] = []
+        self.copied = ""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, vars=None):
+        self.executed.append(" ".join(query.split()))
+
+    def copy_expert(self, sql, file, size=8192):
+        self.executed.append(sql)
+        while chunk := file.read(size):
+            self.copied += chunk
+
+    def fetchall(self):
+        # DISTINCT ON (stock_id, date) … ctid DESC: 같은 키는 마지막 행
+        staged = {}
+        for r in csv.reader(io.StringIO(self.copied)):
+            staged[(r[0], r[1])] = tuple(r)
+        return list(staged.values())
+
+
+class FakeConnection:
+    def __init__(self):
+        self.cur = FakeCursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return self.cur
+
+
+@pytest.fixture
+def saved(monkeypatch):
+    """_save_price_rows가 고른 저장 방식과 DB에 보낸 것을 기록 (지표/상태/버전 갱신은 생략)"""
+    log = {"methods": [], "conns": []}
+
+    @contextmanager
+    def db_connection(*args, **kwargs):
+        conn = FakeConnection()
+        log["conns"].append(conn)
+        yield conn
+
+    def values(cur, rows, page_size=1000):
+        log["methods"].append(("values", len(rows), page_size))
+        return []
+
+    monkeypatch.setattr(prices, "db_connection", db_connection)
+    monkeypatch.setattr(prices, "_upsert_prices_values", values)
+    monkeypatch.setattr(prices, "indicators_ready", lambda: False)
+    monkeypatch.setattr(prices, "apply_price_rows", lambda rows: None)
+    monkeypatch.setattr(prices.price_store, "apply_rows", lambda rows: None)
+    monkeypatch.setattr(prices, "get_registry", lambda: type("R", (), {"tickers": lambda self, ids: {}})())
+    monkeypatch.setattr(prices.data_version, "bump", lambda markets: None)
+    return log
+
+
+def test_method_follows_threshold(saved, monkeypatch):
+    monkeypatch.setattr(prices, "PRICE_COPY_THRESHOLD", 100)
+    assert save_price_to_db([]) == 0
+    assert saved["conns"] == []  # 빈 배치는 커넥션도 안 꺼냄
+
+    save_price_to_db(make_rows(99), page_size=500)
+    assert saved["methods"] == [("values", 99, 500)]
+
+    # 임계값 이상 → COPY + 스테이징 테이블
+    assert save_price_to_db(make_rows(100)) == len({(r[0], r[1]) for r in make_rows(100)})
+    assert saved["methods"] == [("values", 99, 500)]
+    executed = saved["conns"][-1].cur.executed
+    assert executed[0] == "DROP TABLE IF EXISTS pg_temp.stock_prices_stage"
+    assert executed[1].startswith("CREATE TEMP TABLE stock_prices_stage ON COMMIT DROP")
+    assert executed[2].startswith("COPY stock_prices_stage")
+    assert "DISTINCT ON (stock_id, date)" in executed[3] and "RETURNING" in executed[3]
+
+    # 직접 지정하면 행 수와 상관없이
+    save_price_to_db(make_rows(5), method="copy")
+    assert saved["conns"][-1].cur.executed[2].startswith("COPY")
+    save_price_to_db(make_rows(200), method="values")
+    assert saved["methods"][-1] == ("values", 200, 1000)
+
+
+@pytest.mark.parametrize("size", [-1, 1, 7, 64, 8192])
+def test_csv_stream_matches_csv_writer(size):
+    rows = make_rows(2500)
+    expected = io.StringIO()
+    csv.writer(expected, lineterminator="\n").writerows(rows)
+
+    stream = _CsvRowStream(rows)
+    out = ""
+    while chunk := stream.read(size):
+        assert size < 0 or len(chunk) <= size
+        out += chunk
+    assert out == expected.getvalue()
+    # None은 빈 값(COPY csv의 NULL)
+    assert out.splitlines()[0] == "1,2025-01-01,1.5,2.25,1.0,2.0,"
+
+
+def test_csv_stream_empty():
+    assert _CsvRowStream([]).read(8192) == ""
@@ -0,0 +1,91 @@
+# plan_price_sync: 저장된 구간(coverage) → 다운로드 구간별 티커 묶음, 구멍 백필 기록
+from datetime import date, timedelta
+
+import pytest
+
+from worker import update_stock_info_by_yfinance as sync
+from worker.update_stock_info_by_yfinance import (SYNC_HOLE_RETRY_SEC, SYNC_HOLE_TOLERANCE, _hole_already_tried,
+                                                  _load_hole_attempts, _save_hole_attempts, plan_price_sync)
+
+TODAY = date(2025, 3, 14)
+NOW = 1_000_000.0
+
+
+def days_ago(n: int) -> date:
+    return TODAY - timedelta(days=n)
+
+
+@pytest.fixture
+def coverage(monkeypatch):
+    """{stock_id: (first, last, 저장된 봉 수, 있어야 할 봉 수)} - DB 대신"""
+    cov: dict[int, tuple] = {}
+    monkeypatch.setattr(sync, "get_price_coverage", lambda stock_ids, since: cov)
+    return cov
+
+
+def test_groups_by_gap_tier(coverage):
+    ids = {"NEW": 1, "FRESH": 2, "STALE": 3, "OLD": 4, "EDGE": 5}
+    coverage.update({
+        2: (days_ago(700), days_ago(1), 480, 480),
+        3: (days_ago(700), days_ago(20), 470, 470 + SYNC_HOLE_TOLERANCE),  # 허용치 안의 구멍
+        4: (days_ago(900), days_ago(400), 300, 300),                      # 가장 긴 갭보다 오래됨
+        5: (days_ago(700), days_ago(7), 475, 475),                        # 갭 = 구간 경계
+    })
+    plan = plan_price_sync(ids, "2y", today=TODAY, now=NOW)
+    # 마지막 저장 봉도 다시 받도록 tier + 1일 전부터
+    assert plan == {
+        None: ["NEW", "OLD"],
+        days_ago(8).isoformat(): ["FRESH", "EDGE"],
+        days_ago(32).isoformat(): ["STALE"],
+    }
+
+
+def test_hole_backfilled_once_then_skipped(coverage):
+    ids = {"HOLE": 1}
+    coverage[1] = (days_ago(700), days_ago(1), 470, 480)
+    attempts: dict[str, dict] = {}
+
+    assert plan_price_sync(ids, "2y", today=TODAY, attempts=attempts, now=NOW) == {None: ["HOLE"]}
+    assert attempts == {"HOLE": {"missing": 10, "tried": NOW}}
+
+    # 백필해도 안 채워진 같은 구멍 → SYNC_HOLE_RETRY_SEC 동안은 증분만
+    later = NOW + 3600
+    assert plan_price_sync(ids, "2y", today=TODAY, attempts=attempts, now=later) == {days_ago(8).isoformat(): ["HOLE"]}
+    assert attempts["HOLE"]["tried"] == NOW
+
+    # 구멍이 늘었으면 새로 생긴 것 → 다시 백필
+    coverage[1] = (days_ago(700), days_ago(1), 469, 480)
+    assert plan_price_sync(ids, "2y", today=TODAY, attempts=attempts, now=later) == {None: ["HOLE"]}
+    assert attempts["HOLE"] == {"missing": 11, "tried": later}
+
+    # 재시도 간격이 지나면 다시 백필
+    retry = later + SYNC_HOLE_RETRY_SEC
+    assert plan_price_sync(ids, "2y", today=TODAY, attempts=attempts, now=retry) == {None: ["HOLE"]}
+
+    # 채워지면 기록 삭제
+    coverage[1] = (days_ago(700), days_ago(1), 480, 480)
+    assert plan_price_sync(ids, "2y", today=TODAY, attempts=attempts, now=retry) == {days_ago(8).isoformat(): ["HOLE"]}
+    assert attempts == {}
+
+
+def test_hole_already_tried():
+    attempt = {"missing": 10, "tried": NOW}
+    assert not _hole_already_tried(None, 10, NOW)
+    assert _hole_already_tried(attempt, 10, NOW + 1)
+    assert _hole_already_tried(attempt, 8, NOW + 1)
+    assert not _hole_already_tried(attempt, 11, NOW + 1)
+    assert not _hole_already_tried(attempt, 10, NOW + SYNC_HOLE_RETRY_SEC)
+
+
+def test_hole_attempts_merge_per_market(tmp_path):
+    path = str(tmp_path / "holes.json")
+    assert _load_hole_attempts(path) == {}
+    _save_hole_attempts({"AAPL": {"missing": 5, "tried": NOW}}, ["AAPL", "MSFT"], path)
+    # 다른 시장 동기화는 자기 티커 몫만 반영
+    _save_hole_attempts({"005930.KS": {"missing": 4, "tried": NOW}}, ["005930.KS"], path)
+    assert _load_hole_attempts(path).keys() == {"AAPL", "005930.KS"}
+    _save_hole_attempts({}, ["AAPL"], path)
+    assert _load_hole_attempts(path).keys() == {"005930.KS"}
+
+    (tmp_path / "broken.json").write_text("{")
+    assert _load_hole_attempts(str(tmp_path / "broken.json")) == {}
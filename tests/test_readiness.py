@@ -0,0 +1,69 @@
+# 준비 상태: 등록/상태 변경/대기 (다른 스레드에서 set해도 이벤트 루프의 대기가 깨어나는지)
+import asyncio
+import threading
+
+from worker.startup import FAILED, PENDING, READY, RUNNING, Readiness, market_key
+
+
+def test_register_set_snapshot():
+    r = Readiness()
+    r.register("db", market_key("US"))
+    r.register("db")  # 다시 등록해도 상태 유지
+    r.set("db", READY)
+    r.register("db")
+    assert r.state("db") == READY
+    assert r.state("market:US") == PENDING
+    assert r.state("unknown") is None
+
+    snapshot = r.snapshot()
+    assert {k: s for k, (s, _) in snapshot.items()} == {"db": READY, "market:US": PENDING}
+    assert all(elapsed >= 0 for _, elapsed in snapshot.values())
+
+
+def test_wait_returns_immediately_when_settled():
+    r = Readiness()
+    r.register("db", "market:US")
+    r.set("db", READY)
+    r.set("market:US", FAILED)
+
+    async def main():
+        return await r.wait("db"), await r.wait("market:US"), await r.wait("unknown")
+
+    assert asyncio.run(main()) == (READY, FAILED, None)
+
+
+def test_wait_woken_by_other_thread():
+    r = Readiness()
+    r.register("market:US", "market:KR")
+
+    async def main():
+        waiters = [asyncio.ensure_future(r.wait("market:US")) for _ in range(2)]
+        waiters.append(asyncio.ensure_future(r.wait("market:KR")))
+        await asyncio.sleep(0)
+
+        def work():
+            r.set("market:US", RUNNING)  # 진행 중으로 바뀌는 것만으로는 안 깨어남
+            r.set("market:KR", FAILED)
+            r.set("market:US", READY)
+
+        t = threading.Thread(target=work)
+        t.start()
+        results = await asyncio.wait_for(asyncio.gather(*waiters), 5)
+        t.join()
+        return results
+
+    assert asyncio.run(main()) == [READY, READY, FAILED]
+
+
+def test_wait_timeout_returns_current_state():
+    r = Readiness()
+    r.register("market:US")
+    r.set("market:US", RUNNING)
+
+    async def main():
+        state = await r.wait("market:US", timeout=0.05)
+        # 시간 초과 뒤에 준비돼도 다음 대기는 정상
+        r.set("market:US", READY)
+        return state, await r.wait("market:US", timeout=0.05)
+
+    assert asyncio.run(main()) == (RUNNING, READY)
@@ -0,0 +1,67 @@
+# 티커 레지스트리: register=False 조회에서 모르는 티커가 있을 때의 다시 로드 횟수
+import pytest
+
+from worker import ticker_registry
+from worker.ticker_registry import TickerRegistry
+
+
+class FakeDb:
+    """SELECT id, ticker FROM stock_info 만 흉내 (로드 횟수 기록)"""
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.loads = 0
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        self.loads += 1
+
+    def fetchall(self):
+        return list(self.rows)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDb([(1, "AAA"), (2, "BBB")])
+    monkeypatch.setattr(ticker_registry, "db_connection", fake)
+    return fake
+
+
+def test_unknown_ticker_reloads_once_per_interval(db, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(ticker_registry.time, "monotonic", lambda: clock[0])
+    registry = TickerRegistry()
+
+    assert registry.ids(["AAA", "ZZZ"], register=False) == {"AAA": 1}
+    assert db.loads == 1  # 첫 로드에서 바로 없다고 확인
+
+    for _ in range(5):
+        registry.ids(["AAA", "ZZZ"], register=False)
+    assert db.loads == 1
+
+    # 다른 프로세스가 등록한 뒤 간격이 지나면 한 번 다시 로드해서 찾음
+    db.rows.append((3, "ZZZ"))
+    clock[0] += ticker_registry.TICKER_RELOAD_SEC
+    assert registry.ids(["AAA", "ZZZ"], register=False) == {"AAA": 1, "ZZZ": 3}
+    assert db.loads == 2
+
+
+def test_new_unknown_ticker_triggers_reload(db):
+    registry = TickerRegistry()
+    registry.ids(["AAA", "ZZZ"], register=False)
+    db.rows.append((4, "YYY"))
+    # 처음 보는 티커는 간격과 관계없이 다시 로드
+    assert registry.ids(["YYY", "ZZZ"], register=False) == {"YYY": 4}
+    assert db.loads == 2
+    registry.ids(["YYY", "ZZZ"], register=False)
+    assert db.loads == 2
@@ -1,12 +1,103 @@
 from dotenv import load_dotenv
 import os
+import asyncio
+import logging
 import discord
+from concurrent.futures import ThreadPoolExecutor
 from discord.ext import tasks
-from worker.get_low_di20_stocks import get_today_low_di20_stocks
-from worker.format_utils import format_low_di20_stocks
+from worker.get_low_di20_stocks import get_low_di20_stocks_by_market
+from worker.format_utils import format_market_report
+from worker import data_version, market_calendar
+from worker.indicators import last_updated
+from worker.events import get_bus, PRICE_INGESTED, PriceIngested
+from worker.universe import market_members, universes_of
+from worker.startup import get_readiness, market_key, FAILED
 # .Env파일 환경변수로 등록
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+MARKETS = list(market_calendar.MARKET_TZ)
+
+# 스크리너(pandas + psycopg2, 블로킹)는 이벤트 루프 밖 전용 스레드에서 실행
+# → 같은 루프를 쓰는 코인 웹소켓이 멈추지 않음. 시장별로 동시에 실행
+_screen_executor = ThreadPoolExecutor(max_workers=len(MARKETS), thread_name_prefix="di20-screener")
+
+# 시장별 스크리너 결과 캐시
+# - DB 변경 표식(그 시장 종목 최신 지표의 updated_at)이 바뀌었으면 항상 재계산
+#   → 다른 프로세스의 수집(역할 분리, NOTIFY 유실)도 놓치지 않음
+# - 그 시장의 가격 데이터 버전이 같으면 재계산하지 않음
+# - 주기 실행은 마지막 계산 이후 정규장이 열린 적이 없으면(주말/장 마감 후) 새 봉이 있을 수 없으므로 재계산하지 않음
+_screen_cache: dict[str, dict] = {}
+# 같은 시장을 동시에 두 번 계산/전송하지 않도록 (수집 이벤트 + 주기 실행)
+_market_locks = {m: asyncio.Lock() for m in MARKETS}
+
+
+def _db_marker(market: str):
+    """시장의 DB 변경 표식. 조회 실패 시 None (표식 없이 데이터 버전/장 시간으로만 판단)"""
+    try:
+        return last_updated(market_members(market))
+    except Exception:
+        logger.warning("[%s] DB 변경 표식 조회 실패", market, exc_info=True)
+        return None
+
+
+def _needs_screen(market: str, use_calendar: bool, marker) -> bool:
+    cached = _screen_cache.get(market)
+    if cached is None:
+        return True
+    if marker is not None and marker != cached["marker"]:
+        return True
+    if cached["version"] == data_version.current(market):
+        return False
+    return not use_calendar or market_calendar.has_new_bars(market, cached["at"])
+
+
+async def _screen_market(market: str, universes: list[str] | None, use_calendar: bool):
+    # 시작 직후에는 이 시장의 초기화(가격 동기화/지표 테이블)가 끝날 때까지만 대기
+    state = await get_readiness().wait(market_key(market))
+    if state == FAILED:
+        logger.warning("[%s] 초기화 실패 상태. 기존 데이터로 스크리닝", market)
+    async with _market_locks[market]:
+        # 표식은 계산 전에 읽음 → 계산 중에 저장된 변경은 다음 번에 다시 계산됨
+        loop = asyncio.get_running_loop()
+        marker = await loop.run_in_executor(_screen_executor, _db_marker, market)
+        if not _needs_screen(market, use_calendar, marker):
+            return None
+        version = data_version.current(market)
+        started = market_calendar.now(market)
+        result = await loop.run_in_executor(_screen_executor, get_low_di20_stocks_by_market, market, None, universes)
+        # 일부 유니버스만 다시 계산했으면 나머지는 이전 결과 유지 (종목이 안 바뀌었으므로 결과도 같음)
+        # 계산 중에 버전이 올라갔다면 다음 번에 다시 계산됨
+        merged = dict(_screen_cache.get(market, {}).get("result") or {})
+        merged.update(result)
+        _screen_cache[market] = {"version": version, "marker": marker, "at": started, "result": merged}
+        return result
+
+
+async def get_low_di20_stocks_cached(markets: list[str] | None = None, universes: list[str] | None = None,
+                                     use_calendar: bool = True):
+    """
+    markets: 대상 시장 (기본 전체), universes: 다시 계산할 유니버스 (기본 시장 전체)
+    use_calendar: False면 장 시간과 관계없이 데이터 버전/DB 변경 표식만 보고 판단 (수집 완료 이벤트)
+    return: {시장: {유니버스: 결과}} - 이번에 새로 계산한 시장만
+    """
+    markets = markets or MARKETS
+    results = await asyncio.gather(
+        *(_screen_market(m, universes, use_calendar) for m in markets),
+        return_exceptions=True,
+    )
+
+    fresh = {}
+    for market, result in zip(markets, results):
+        if isinstance(result, BaseException):
+            logger.error("[%s] DI20 스크리닝 실패", market, exc_info=result)
+        elif result is None:
+            logger.info("[%s] 새 봉 없음(데이터 버전 %d / 장 미개장). 스크리닝 생략",
+                        market, data_version.current(market))
+        else:
+            fresh[market] = result
+    return fresh
 
 
 async def run_discord_bot(token: str, channel_id: int):
@@ -14,10 +105,31 @@ async def run_discord_bot(token: str, channel_id: int):
     intents.message_content = True
     client = discord.Client(intents=intents)
 
+    async def send_report(fresh):
+        # 새로 계산된 시장들을 한 번에 (시장 → 유니버스별 섹션)
+        as_of = {m: market_calendar.last_trading_day(m) for m in fresh}
+        channel = client.get_channel(channel_id)
+        await channel.send("20일선 이격도 과대낙폭 종목 리스트:")
+        for chunk in format_market_report(fresh, as_of):
+            await channel.send(f"```\n{chunk}\n```")
+
+    async def on_price_ingested(event: PriceIngested):
+        # 수집 완료 즉시, 바뀐 종목이 속한 유니버스만 스크리닝
+        if not event.rows_changed:
+            logger.info("[%s] 수집 완료, 변경 없음. 스크리닝 생략", event.market)
+            return
+        universes = sorted({u for t in event.changed_tickers for u in universes_of(t)})
+        fresh = await get_low_di20_stocks_cached([event.market], universes, use_calendar=False)
+        if fresh:
+            await send_report(fresh)
+
     @client.event
     async def on_ready():
         print(f'Logged in as {client.user}')
-        check_low_di20_stock.start()
+        # on_ready는 재연결 때마다 다시 불릴 수 있음
+        if not check_low_di20_stock.is_running():
+            get_bus().subscribe(PRICE_INGESTED, on_price_ingested)
+            check_low_di20_stock.start()
 
     @client.event
     async def on_message(message):
@@ -26,14 +138,14 @@ async def run_discord_bot(token: str, channel_id: int):
         if message.content == 'ping':
             await message.channel.send('pong!')
 
+    # 보조 주기 실행: 이벤트를 못 받은 경우(봇 접속 전 수집, NOTIFY 유실 등 다른 프로세스의 수집)를 따라잡음
+    # 이 프로세스의 데이터 버전은 다른 프로세스의 저장을 모르므로 DB 변경 표식으로 판단
     @tasks.loop(minutes = 30)
     async def check_low_di20_stock():
-        channel = client.get_channel(channel_id)
-        low_di20_stocks = get_today_low_di20_stocks()
-        if not low_di20_stocks:
-            await channel.send("해당 조건에 맞는 종목이 없습니다.")
-        else:
-            msg = format_low_di20_stocks(low_di20_stocks)
-            await channel.send(f"20일선 이격도 과대낙폭 종목 리스트:\n```\n{msg}\n```")
+        fresh = await get_low_di20_stocks_cached()
+        if not fresh:
+            # 새 가격이 없으면 결과도 같으므로 재전송하지 않음
+            return
+        await send_report(fresh)
 
-    await client.start(token)
\ No newline at end of file
+    await client.start(token)
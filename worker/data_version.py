@@ -0,0 +1,25 @@
+# 가격 데이터 버전: save_price_to_db가 실제로 행을 바꿀 때마다 올라간다.
+# 스크리너 결과 캐시의 키로 사용 → 새 가격이 없으면 재계산하지 않는다.
+# 전체 버전과 시장별 버전을 같이 유지 → 한 시장 수집이 다른 시장 캐시를 무효화하지 않음
+import threading
+from typing import Iterable
+
+_lock = threading.Lock()
+_version = 0
+_market_versions: dict[str, int] = {}
+
+
+def bump(markets: Iterable[str] = ()) -> int:
+    global _version
+    with _lock:
+        _version += 1
+        for market in markets:
+            _market_versions[market] = _version
+        return _version
+
+
+def current(market: str | None = None) -> int:
+    with _lock:
+        if market is None:
+            return _version
+        return _market_versions.get(market, 0)
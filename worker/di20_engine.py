@@ -0,0 +1,75 @@
+# 유니버스 전체 종가를 (종목 x 날짜) 2차원 배열 하나로 들고 MA20 / DI20 / 분위수를 한 번에 계산한다.
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def panel_to_array(panel: pd.DataFrame) -> tuple[list[str], np.ndarray]:
+    """(date x ticker) 패널 → (tickers, (종목 x 날짜) float 배열)"""
+    return list(panel.columns), panel.to_numpy(dtype=float).T
+
+
+def right_align(closes: np.ndarray) -> np.ndarray:
+    """
+    종목별 유효 값을 오른쪽 끝으로 모은다(순서 유지, NaN은 앞으로).
+    신규 상장 종목이나 거래정지로 빈 날짜가 있는 종목도 자기 봉끼리 연속으로 붙어서
+    종목별 DataFrame에 rolling을 돌린 것과 같은 결과가 나온다.
+    """
+    valid = ~np.isnan(closes)
+    order = np.argsort(valid, axis=1, kind="stable")
+    return np.take_along_axis(closes, order, axis=1)
+
+
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    """행 방향 이동평균. 창 안에 NaN이 있으면 NaN (pandas rolling(window).mean()과 동일)"""
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] >= window:
+        out[:, window - 1:] = sliding_window_view(x, window, axis=1).mean(axis=-1)
+    return out
+
+
+def nan_quantile(x: np.ndarray, q: float) -> np.ndarray:
+    """행별 NaN 제외 분위수(linear 보간, pandas Series.quantile과 동일)"""
+    s = np.sort(x, axis=1)  # NaN은 뒤로 정렬됨
+    n = (~np.isnan(x)).sum(axis=1)
+
+    pos = np.maximum(n - 1, 0) * q
+    lo = np.floor(pos).astype(np.intp)
+    hi = np.minimum(lo + 1, np.maximum(n - 1, 0))
+    t = pos - lo
+
+    a = np.take_along_axis(s, lo[:, None], axis=1)[:, 0]
+    b = np.take_along_axis(s, hi[:, None], axis=1)[:, 0]
+    # numpy의 linear 보간식과 같은 형태로 계산(경계값 오차 방지)
+    diff = b - a
+    out = np.where(t >= 0.5, b - diff * (1 - t), a + diff * t)
+    out[n == 0] = np.nan
+    return out
+
+
+def compute_di20(closes: np.ndarray, window: int = 20) -> np.ndarray:
+    """(종목 x 날짜) 종가 → DI20 = (종가 - MA20) / MA20 * 100"""
+    ma = rolling_mean(closes, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (closes - ma) / ma * 100
+
+
+def screen_low_di20(tickers: list[str], closes: np.ndarray, q: float = 0.07,
+                    lookback: int = 252, window: int = 20) -> list[tuple[str, float, float]]:
+    """
+    tickers: 행 순서의 티커 리스트
+    closes: (종목 x 날짜) 종가, 날짜 오름차순, 빈 칸은 NaN
+    return: 현재 DI20이 최근 lookback 봉 DI20의 q 분위수 이하인 [(ticker, curr, quant), ...]
+    """
+    if closes.size == 0:
+        return []
+
+    aligned = right_align(np.asarray(closes, dtype=float))[:, -lookback:]
+    di20 = compute_di20(aligned, window)
+
+    quant = nan_quantile(di20, q)
+    curr = di20[:, -1]
+
+    # NaN 비교는 False → 데이터가 부족한 종목은 자동 제외
+    hits = np.flatnonzero(curr <= quant)
+    return [(tickers[i], curr[i], quant[i]) for i in hits]
@@ -0,0 +1,295 @@
+# 종목별 MA20 / DI20 분위수 증분 상태
+# 새 봉이 추가되거나 마지막 봉이 수정될 때 전체 재계산 없이 갱신하고, 파일로 저장해 재시작 시 이어서 사용한다.
+# 갱신 비용: MA20은 O(1), 분위수용 정렬 리스트는 위치 찾기 O(log n) + 삽입/삭제 O(n) (n ≤ 233, 리스트 이동은 memmove)
+import bisect
+import json
+import logging
+import math
+import os
+import threading
+from collections import deque
+from datetime import date, datetime
+
+from db.db import db_connection
+from worker.ticker_registry import get_registry
+
+STATE_PATH = os.getenv("DI20_STATE_PATH", "cache/di20_state.json")
+WINDOW = 20
+LOOKBACK = 252
+QUANTILE = 0.07
+
+logger = logging.getLogger(__name__)
+
+
+def _to_date_str(d) -> str:
+    if isinstance(d, datetime):
+        d = d.date()
+    if isinstance(d, date):
+        return d.isoformat()
+    return str(d)[:10]
+
+
+class Di20State:
+    """
+    종목 하나의 증분 지표 상태
+    - closes: 최근 WINDOW개 종가 + 합계(running sum) → MA20
+    - di20: 최근 LOOKBACK개 종가 구간의 DI20 (시간순), sorted_di20: 같은 값의 정렬본 → 분위수
+    """
+    def __init__(self, window: int = WINDOW, lookback: int = LOOKBACK):
+        self.window = window
+        self.lookback = lookback
+        self.last_date: str | None = None
+        self.closes: deque[float] = deque()
+        self.close_sum = 0.0
+        self.di20: deque[float] = deque()
+        self.sorted_di20: list[float] = []
+
+    @property
+    def max_di20(self) -> int:
+        # 최근 lookback개 종가 중 DI20이 계산되는 봉 수
+        return self.lookback - self.window + 1
+
+    def _calc_di20(self) -> float:
+        ma = self.close_sum / self.window
+        return (self.closes[-1] - ma) / ma * 100
+
+    def _push_di20(self, value: float):
+        self.di20.append(value)
+        bisect.insort(self.sorted_di20, value)
+        if len(self.di20) > self.max_di20:
+            self._remove_sorted(self.di20.popleft())
+
+    def _remove_sorted(self, value: float):
+        i = bisect.bisect_left(self.sorted_di20, value)
+        del self.sorted_di20[i]
+
+    def append(self, d, close: float):
+        """새 봉 추가"""
+        self.closes.append(close)
+        self.close_sum += close
+        if len(self.closes) > self.window:
+            self.close_sum -= self.closes.popleft()
+        if len(self.closes) == self.window:
+            self._push_di20(self._calc_di20())
+        self.last_date = _to_date_str(d)
+
+    def revise_last(self, close: float):
+        """마지막 봉 종가 수정(장중 갱신)"""
+        self.close_sum += close - self.closes[-1]
+        self.closes[-1] = close
+        if len(self.closes) == self.window:
+            self._remove_sorted(self.di20.pop())
+            self._push_di20(self._calc_di20())
+
+    def apply(self, d, close: float) -> bool:
+        """봉 하나 반영. 마지막 봉보다 과거 날짜가 수정된 경우 False(전체 재구성 필요)"""
+        ds = _to_date_str(d)
+        if self.last_date is None or ds > self.last_date:
+            self.append(ds, close)
+        elif ds == self.last_date:
+            self.revise_last(close)
+        else:
+            return False
+        return True
+
+    def current(self) -> float:
+        if len(self.closes) < self.window or not self.di20:
+            return math.nan
+        return self.di20[-1]
+
+    def quantile(self, q: float = QUANTILE) -> float:
+        """linear 보간 분위수 (pandas Series.quantile과 동일)"""
+        s = self.sorted_di20
+        n = len(s)
+        if n == 0:
+            return math.nan
+        pos = (n - 1) * q
+        lo = math.floor(pos)
+        hi = min(lo + 1, n - 1)
+        t = pos - lo
+        a, b = s[lo], s[hi]
+        diff = b - a
+        return b - diff * (1 - t) if t >= 0.5 else a + diff * t
+
+    def to_dict(self) -> dict:
+        return {"last_date": self.last_date, "closes": list(self.closes), "di20": list(self.di20)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Di20State":
+        st = cls()
+        st.last_date = data["last_date"]
+        st.closes = deque(data["closes"])
+        st.close_sum = math.fsum(st.closes)
+        st.di20 = deque(data["di20"])
+        st.sorted_di20 = sorted(st.di20)
+        return st
+
+    @classmethod
+    def from_bars(cls, bars: list[tuple]) -> "Di20State":
+        """[(date, close), ...] 날짜 오름차순 이력으로 생성"""
+        st = cls()
+        for d, close in bars[-st.lookback:]:
+            st.append(d, float(close))
+        return st
+
+
+class Di20StateStore:
+    """stock_id → Di20State, JSON 파일로 저장/복원"""
+    def __init__(self, path: str = STATE_PATH):
+        self.path = path
+        self.states: dict[int, Di20State] = {}
+        self.lock = threading.Lock()
+        self._mtime = None
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.states = {int(sid): Di20State.from_dict(st) for sid, st in data.items()}
+        self._mtime = os.path.getmtime(self.path)
+        logger.info("DI20 상태 로드: %d종목 (%s)", len(self.states), self.path)
+
+    def reload_if_changed(self):
+        """다른 프로세스가 파일을 바꿨으면 다시 읽음. apply_rows/save와 같은 락 → 반영 중인 배치와 섞이지 않음"""
+        with self.lock:
+            if os.path.exists(self.path) and os.path.getmtime(self.path) != self._mtime:
+                self.load()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({str(sid): st.to_dict() for sid, st in self.states.items()}, f)
+        os.replace(tmp, self.path)  # 원자적 교체
+        self._mtime = os.path.getmtime(self.path)
+
+    def apply_rows(self, rows: list[tuple]) -> int:
+        """
+        rows: [(stock_id, date, close), ...] save_price_to_db에서 실제 반영된 행
+        상태가 있는 종목만 갱신, 과거 봉이 바뀐 종목은 상태를 버려서 다음 스크리닝 때 재구성
+        return: 갱신된 행 수
+        """
+        applied = 0
+        for sid, d, close in sorted(rows, key=lambda r: (r[0], _to_date_str(r[1]))):
+            st = self.states.get(sid)
+            if st is None or close is None:
+                continue
+            if st.apply(d, float(close)):
+                applied += 1
+            else:
+                logger.info("DI20 상태 무효화(과거 봉 수정): stock_id=%s date=%s", sid, d)
+                del self.states[sid]
+        return applied
+
+
+_store: Di20StateStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> Di20StateStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = Di20StateStore()
+            _store.load()
+        else:
+            _store.reload_if_changed()
+        return _store
+
+
+def apply_price_rows(rows: list[tuple]):
+    """save_price_to_db 후크: 반영된 (stock_id, date, close) 행을 상태에 적용하고 저장"""
+    if not rows:
+        return
+    store = get_store()
+    with store.lock:
+        if store.apply_rows(rows):
+            store.save()
+
+
+def _get_ticker_ids(tickers: list[str]) -> dict[str, int]:
+    return get_registry().ids(tickers, register=False)
+
+
+def _get_history_by_ids(stock_ids: list[int], days: int) -> dict[int, list[tuple]]:
+    """stock_id별 최근 N개 (date, close), 날짜 오름차순"""
+    with db_connection(readonly=True, autocommit=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT s.id, sp.date, sp.close
+                FROM unnest(%s::int[]) AS s(id)
+                CROSS JOIN LATERAL (
+                    SELECT p.date, p.close
+                    FROM stock_prices p
+                    WHERE p.stock_id = s.id
+                    ORDER BY p.date DESC
+                    LIMIT %s
+                ) sp
+            """, (list(stock_ids), days))
+            rows = cur.fetchall()
+
+    history: dict[int, list[tuple]] = {}
+    for sid, d, close in rows:
+        history.setdefault(sid, []).append((d, close))
+    for bars in history.values():
+        bars.sort(key=lambda b: b[0])
+    return history
+
+
+def get_low_di20_stocks_incremental(tickers: list[str]) -> list[tuple[str, float, float]]:
+    """증분 상태로 스크리닝. 상태가 없는 종목만 DB에서 한 번 재구성한다."""
+    ids = _get_ticker_ids(tickers)
+    store = get_store()
+    with store.lock:
+        missing = [sid for sid in ids.values() if sid not in store.states]
+        if missing:
+            for sid, bars in _get_history_by_ids(missing, LOOKBACK).items():
+                store.states[sid] = Di20State.from_bars(bars)
+            store.save()
+            logger.info("DI20 상태 재구성: %d종목", len(missing))
+
+        result = []
+        for ticker in tickers:
+            st = store.states.get(ids.get(ticker))
+            if st is None:
+                continue
+            curr, p = st.current(), st.quantile()
+            if curr <= p:
+                result.append((ticker, curr, p))
+        return result
+
+
+def verify_against_pandas(tickers: list[str], tol: float = 1e-9) -> list[tuple[str, float, float, float, float]]:
+    """
+    증분 상태와 기존 pandas 계산(DB 최근 252봉)을 비교한다.
+    return: 불일치 [(ticker, 상태 curr, pandas curr, 상태 quant, pandas quant), ...]
+    """
+    from worker.get_low_di20_stocks import get_close_panel, _is_low_di20
+
+    get_low_di20_stocks_incremental(tickers)  # 없는 상태 채우기
+    ids = _get_ticker_ids(tickers)
+    panel = get_close_panel(tickers, LOOKBACK)
+    store = get_store()
+
+    mismatches = []
+    for ticker in panel.columns:
+        st = store.states.get(ids.get(ticker))
+        close = panel[ticker].dropna()
+        if st is None or close.empty:
+            continue
+        curr, p, _ = _is_low_di20(close)
+        s_curr, s_p = st.current(), st.quantile()
+        if not (math.isclose(curr, s_curr, abs_tol=tol) or (math.isnan(curr) and math.isnan(s_curr))) \
+                or not (math.isclose(p, s_p, abs_tol=tol) or (math.isnan(p) and math.isnan(s_p))):
+            mismatches.append((ticker, s_curr, curr, s_p, p))
+
+    logger.info("DI20 상태 검증: %d종목 중 불일치 %d", len(panel.columns), len(mismatches))
+    return mismatches
+
+
+if __name__ == "__main__":
+    from nasdaq_100 import nasdaq_100
+    logging.basicConfig(level=logging.INFO)
+    for m in verify_against_pandas(nasdaq_100):
+        print(m)
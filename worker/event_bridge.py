@@ -0,0 +1,99 @@
+# 프로세스 간 이벤트 전달 (PostgreSQL LISTEN/NOTIFY)
+# 역할별로 프로세스를 나누면(worker.main_worker --role) 수집(ingest)과 스크리너(bot)가 다른 프로세스에 있으므로
+# 수집 완료 이벤트를 NOTIFY로 보내고, 받는 쪽은 시장별 데이터 버전을 올린 뒤 로컬 이벤트 버스로 다시 발행한다.
+import asyncio
+import json
+import logging
+import os
+
+from db.db import db_connection, get_connection
+from worker import data_version
+from worker.events import get_bus, PRICE_INGESTED, PriceIngested
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = os.getenv("EVENTS_NOTIFY_CHANNEL", "price_ingested")
+# NOTIFY payload 한도(8000바이트) 안쪽. 넘으면 티커 목록 없이 보냄 → 받는 쪽은 시장 전체 스크리닝
+_PAYLOAD_LIMIT = 7800
+_RECONNECT_SEC = 5
+
+
+def _payload(event: PriceIngested) -> str:
+    body = {"market": event.market, "rows": event.rows_changed,
+            "tickers": len(event.tickers), "changed": event.changed_tickers}
+    payload = json.dumps(body, separators=(",", ":"))
+    if len(payload.encode()) > _PAYLOAD_LIMIT:
+        body["changed"] = None
+        payload = json.dumps(body, separators=(",", ":"))
+    return payload
+
+
+def notify_ingested(event: PriceIngested):
+    """이벤트 버스 구독자: 수집 완료를 NOTIFY로 전달 (수집 프로세스에서 등록)"""
+    with db_connection(autocommit=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_notify(%s, %s)", (CHANNEL, _payload(event)))
+
+
+def enable_notify():
+    get_bus().subscribe(PRICE_INGESTED, notify_ingested)
+
+
+def _to_event(payload: str) -> PriceIngested:
+    body = json.loads(payload)
+    changed = body.get("changed")
+    if changed is None:
+        # 목록이 잘렸으면 시장 전체가 바뀐 것으로 취급
+        from worker.universe import market_members
+        changed = market_members(body["market"])
+    return PriceIngested(body["market"], [], changed, body["rows"])
+
+
+def _listen_connection():
+    conn = get_connection()
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {CHANNEL}")
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+
+async def listen():
+    """
+    수집 완료 NOTIFY를 받아 로컬 버스로 발행 (스크리너 프로세스의 이벤트 루프에서 실행)
+    전용 커넥션을 루프의 reader로 등록해서 블로킹 없이 대기, 끊기면 다시 연결
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        conn = None
+        try:
+            # 연결 + LISTEN은 블로킹 → DB가 느려도 이벤트 루프(봇)가 멈추지 않도록 스레드에서
+            conn = await asyncio.to_thread(_listen_connection)
+            logger.info("이벤트 수신 대기: LISTEN %s", CHANNEL)
+
+            ready = asyncio.Event()
+            loop.add_reader(conn.fileno(), ready.set)
+            try:
+                while True:
+                    await ready.wait()
+                    ready.clear()
+                    conn.poll()
+                    while conn.notifies:
+                        event = _to_event(conn.notifies.pop(0).payload)
+                        if event.rows_changed:
+                            # 다른 프로세스가 바꾼 데이터 → 이 프로세스의 스크리너 캐시 무효화
+                            data_version.bump([event.market])
+                        get_bus().publish(PRICE_INGESTED, event)
+            finally:
+                loop.remove_reader(conn.fileno())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("이벤트 수신 실패. %ds 후 다시 연결", _RECONNECT_SEC)
+            await asyncio.sleep(_RECONNECT_SEC)
+        finally:
+            if conn is not None:
+                conn.close()
@@ -0,0 +1,86 @@
+# 프로세스 내 이벤트 버스
+# 가격 수집이 끝나면 "시장 X 수집 완료, N행 변경"을 발행하고 스크리너가 구독해서 바로 실행한다.
+# 발행은 수집 스레드(스케줄러/실행기)에서, 코루틴 구독자는 구독할 때의 이벤트 루프에서 실행된다.
+import asyncio
+import logging
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# 토픽
+PRICE_INGESTED = "price_ingested"
+
+
+class PriceIngested:
+    """
+    market: 시장 (US / KR)
+    tickers: 이번 실행에서 수집한 이 시장의 티커
+    changed_tickers: 실제로 행이 바뀐 티커
+    rows_changed: 반영(INSERT+UPDATE)된 행 수
+    """
+    def __init__(self, market: str, tickers: list[str], changed_tickers: list[str], rows_changed: int):
+        self.market = market
+        self.tickers = tickers
+        self.changed_tickers = changed_tickers
+        self.rows_changed = rows_changed
+
+    def __repr__(self):
+        return (f"PriceIngested({self.market}, {len(self.tickers)}종목, "
+                f"변경 {len(self.changed_tickers)}종목/{self.rows_changed}행)")
+
+
+class EventBus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 토픽 → [(handler, loop)], loop가 있으면 코루틴 구독자
+        self._subscribers: dict[str, list[tuple[Callable, asyncio.AbstractEventLoop | None]]] = {}
+
+    def subscribe(self, topic: str, handler: Callable, loop: asyncio.AbstractEventLoop | None = None):
+        """
+        handler: 일반 함수(발행한 스레드에서 바로 호출) 또는 코루틴 함수
+        코루틴 함수는 loop(기본: 지금 실행 중인 루프)에서 실행된다.
+        """
+        if asyncio.iscoroutinefunction(handler):
+            loop = loop or asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers.setdefault(topic, []).append((handler, loop))
+
+    def unsubscribe(self, topic: str, handler: Callable):
+        with self._lock:
+            self._subscribers[topic] = [(h, l) for h, l in self._subscribers.get(topic, []) if h is not handler]
+
+    def publish(self, topic: str, event) -> int:
+        """어느 스레드에서든 호출 가능. 구독자 예외는 로그만 남긴다. return: 전달한 구독자 수"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, []))
+        logger.info("이벤트 발행 %s: %r → 구독자 %d", topic, event, len(subscribers))
+        for handler, loop in subscribers:
+            try:
+                if loop is None:
+                    handler(event)
+                elif loop.is_closed():
+                    logger.warning("이벤트 루프가 닫힌 구독자 건너뜀: %s", handler.__qualname__)
+                else:
+                    future = asyncio.run_coroutine_threadsafe(handler(event), loop)
+                    future.add_done_callback(_log_failure)
+            except Exception:
+                logger.exception("이벤트 구독자 실패: %s", handler.__qualname__)
+        return len(subscribers)
+
+
+def _log_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("이벤트 구독자 실패", exc_info=future.exception())
+
+
+_bus: EventBus | None = None
+_bus_lock = threading.Lock()
+
+
+def get_bus() -> EventBus:
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            _bus = EventBus()
+        return _bus
@@ -0,0 +1,180 @@
+# yfinance 호출 전용 장수명 실행기
+# - 토큰 버킷으로 초당 요청 수 제한 (call 1번에 1개, 한 함수가 여러 번 요청하면 charge()로 추가 차감)
+# - 429/타임아웃이 나면 동시 실행 수를 절반으로 줄이고, 정상 응답이 이어지면 하나씩 늘림(AIMD)
+# - 재시도 간격은 지수 백오프 + 지터
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+YF_RATE_PER_SEC = float(os.getenv("YF_RATE_PER_SEC", "4"))
+YF_BURST = int(os.getenv("YF_BURST", "8"))
+YF_MAX_CONCURRENCY = int(os.getenv("YF_MAX_CONCURRENCY", "8"))
+YF_MIN_CONCURRENCY = int(os.getenv("YF_MIN_CONCURRENCY", "1"))
+YF_RETRIES = int(os.getenv("YF_RETRIES", "3"))
+YF_BACKOFF_SEC = float(os.getenv("YF_BACKOFF_SEC", "1.0"))
+
+
+class ThrottledError(RuntimeError):
+    """원격에서 요청 제한(429 등)을 받았을 때"""
+
+
+try:
+    from yfinance.exceptions import YFRateLimitError
+    _THROTTLE_TYPES: tuple[type, ...] = (ThrottledError, YFRateLimitError)
+except ImportError:  # YFRateLimitError가 없는 yfinance
+    YFRateLimitError = None
+    _THROTTLE_TYPES = (ThrottledError,)
+
+
+def is_throttle_error(e: BaseException) -> bool:
+    """요청 제한 예외 (YFRateLimitError / ThrottledError / 응답 코드 429인 HTTP 예외)"""
+    if isinstance(e, _THROTTLE_TYPES):
+        return True
+    response = getattr(e, "response", None)
+    return getattr(response, "status_code", None) == 429
+
+
+def is_throttle_message(message: str) -> bool:
+    """yf.download가 예외 대신 로그로 남기는 종목별 오류 문자열(예외의 repr)이 요청 제한인지"""
+    return any(t.__name__ in message for t in _THROTTLE_TYPES) or "Too Many Requests" in message
+
+
+def is_retryable_error(e: BaseException) -> bool:
+    if is_throttle_error(e) or isinstance(e, (TimeoutError, ConnectionError)):
+        return True
+    text = f"{type(e).__name__} {e}".lower()
+    return "timeout" in text or "timed out" in text or "connection" in text
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveLimiter:
+    """동시 실행 수 상한을 상황에 따라 조절하는 세마포어"""
+    def __init__(self, initial: int, minimum: int, maximum: int):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.in_flight = 0
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        with self._cond:
+            self._successes += 1
+            # 현재 상한만큼 연속 성공하면 +1
+            if self._successes >= self.limit and self.limit < self.maximum:
+                self.limit += 1
+                self._successes = 0
+                self._cond.notify_all()
+
+    def on_throttle(self):
+        with self._cond:
+            self._successes = 0
+            new_limit = max(self.minimum, self.limit // 2)
+            if new_limit != self.limit:
+                logger.warning("요청 제한 감지: 동시 실행 %d → %d", self.limit, new_limit)
+            self.limit = new_limit
+
+
+class FetchExecutor:
+    """fetch_many_stock_info와 가격 다운로더가 같이 쓰는 실행기 (배치마다 새로 만들지 않음)"""
+    def __init__(self, rate: float = YF_RATE_PER_SEC, burst: int = YF_BURST,
+                 max_concurrency: int = YF_MAX_CONCURRENCY, min_concurrency: int = YF_MIN_CONCURRENCY,
+                 retries: int = YF_RETRIES, backoff_sec: float = YF_BACKOFF_SEC):
+        self.bucket = TokenBucket(rate, burst)
+        self.limiter = AdaptiveLimiter(max_concurrency, min_concurrency, max_concurrency)
+        self.retries = retries
+        self.backoff_sec = backoff_sec
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="yf-fetch")
+
+    def call(self, fn: Callable, *args, **kwargs) -> Any:
+        """호출 스레드에서 제한/재시도를 적용해 바로 실행"""
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            try:
+                self.bucket.acquire()
+                result = fn(*args, **kwargs)
+                self.limiter.on_success()
+                return result
+            except Exception as e:
+                if is_throttle_error(e):
+                    self.limiter.on_throttle()
+                if attempt >= self.retries or not is_retryable_error(e):
+                    raise
+                error = e
+            finally:
+                self.limiter.release()
+
+            delay = self.backoff_sec * (2 ** attempt) * random.uniform(0.5, 1.5)
+            logger.info("재시도 %d/%d (%.1fs 후): %s", attempt + 1, self.retries, delay, error)
+            time.sleep(delay)
+
+    def charge(self, requests: int = 1):
+        """call()로 실행 중인 함수가 원격 요청을 추가로 보낼 때 그만큼 토큰 차감 (첫 요청은 call()이 차감)"""
+        for _ in range(requests):
+            self.bucket.acquire()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        return self._pool.submit(self.call, fn, *args, **kwargs)
+
+    def map(self, fn: Callable, items: Iterable) -> tuple[list, dict]:
+        """
+        items 각각에 fn 실행
+        return: (성공 결과 리스트, {실패 item: 에러 메시지})
+        """
+        futures = {self.submit(fn, item): item for item in items}
+        results, failures = [], {}
+        for fut in as_completed(futures):
+            try:
+                results.append(fut.result())
+            except Exception as e:
+                failures[futures[fut]] = f"{type(e).__name__}: {e}"
+        return results, failures
+
+
+_executor: FetchExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_fetch_executor() -> FetchExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = FetchExecutor()
+        return _executor
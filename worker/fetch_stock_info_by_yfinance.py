@@ -1,8 +1,9 @@
 import yfinance as yf
 import time, logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from nasdaq_100 import nasdaq_100
-from typing import Optional, Tuple, List
+from typing import Callable, Dict, Optional, Tuple, List
+from worker.fetch_executor import get_fetch_executor, is_retryable_error
+from worker.market_data import get_provider
 
 logging.basicConfig(
     level=logging.INFO,  # 필요시 DEBUG로 변경 가능
@@ -14,70 +15,89 @@ def _safe_int(x) -> Optional[int]:
         return int(x)
     except Exception:
         return None
-    
+
+def _raise_if_retryable(e: Exception):
+    # 요청 제한/타임아웃은 삼키지 않고 실행기까지 올려서 백오프/재시도하게 함
+    if is_retryable_error(e):
+        raise e
+
 def fetch_stock_info_one(ticker: str) -> Tuple[str, Optional[str], Optional[str], Optional[str], Optional[int]]:
+    """
+    원격 요청을 여러 번 보내므로 두 번째 요청부터 실행기 토큰을 추가로 차감 (첫 요청은 실행기가 차감)
+    일부 필드만 실패하면 받은 값으로 반환, 아무것도 못 받았으면 첫 예외를 올려서 실패로 집계
+    """
+    executor = get_fetch_executor()
     t = yf.Ticker(ticker)
+    errors = []
 
     # 1) get_info: 이름/국가
     info = {}
     try:
         info = t.get_info() or {}
-    except Exception:
-        pass
+    except Exception as e:
+        _raise_if_retryable(e)
+        errors.append(e)
     fullname = info.get("longName") or info.get("shortName") or info.get("displayName")
     country  = info.get("country")    # 예: "United States" (없을 수 있음)
 
     # 2) 거래소: metadata 우선, 없으면 info에서 대체
     exchange = None
     try:
+        executor.charge()
         meta = t.get_history_metadata() or {}
         exchange = meta.get("exchangeName") or meta.get("fullExchangeName")
-    except Exception:
-        pass
+    except Exception as e:
+        _raise_if_retryable(e)
+        errors.append(e)
     if not exchange:
         exchange = info.get("fullExchangeName") or info.get("exchange")  # 예: "NasdaqGS" / "NMS"
 
     # 3) 시가총액: fast_info 우선 → info → 종가×발행주식수
     marketcap = None
     try:
+        executor.charge()
         marketcap = _safe_int(t.fast_info["market_cap"])
-    except Exception:
-        pass
+    except Exception as e:
+        _raise_if_retryable(e)
+        errors.append(e)
     if marketcap is None:
         marketcap = _safe_int(info.get("marketCap"))
 
     if marketcap is None:
-        # 종가 × 발행주식수로 보강
+        # 종가 × 발행주식수로 보강 (요청 2번)
         try:
+            executor.charge(2)
             last_close = float(t.history(period="1d", auto_adjust=False)["Close"].iloc[-1])
             shares = int(t.get_shares_full().iloc[-1])
             marketcap = _safe_int(last_close * shares)
-        except Exception:
-            pass
+        except Exception as e:
+            _raise_if_retryable(e)
+            errors.append(e)
 
+    if errors and not (fullname or exchange or country or marketcap is not None):
+        raise errors[0]
     return (ticker, fullname, exchange, country, marketcap)
 
-def fetch_many_stock_info(tickers: List[str], max_workers: int = 8, batch_size: int = 50):
-    """배치 사이즈만 도입: 티커를 batch_size로 쪼개 순차 처리"""
-    rows: List[Tuple[str, Optional[str], Optional[str], Optional[str], Optional[int]]] = []
-    n = len(tickers)
-    logging.info("yfinance 종목 정보 가져오기 시작 (총 %d)", n)
-
-    for start in range(0, n, batch_size):
-        batch = tickers[start:start + batch_size]
-        logging.info("배치 처리: %d~%d (크기 %d)", start + 1, start + len(batch), len(batch))
-
-        with ThreadPoolExecutor(max_workers=max_workers) as ex:
-            futures = [ex.submit(fetch_stock_info_one, t) for t in batch]
-            for fut in as_completed(futures):
-                try:
-                    rows.append(fut.result())
-                except Exception as e:
-                    # 개별 실패는 건너뛰고 계속
-                    logging.warning("개별 요청 실패: %s", e)
-
-    logging.info("주식 정보 가져오기 끝 (수집 %d)", len(rows))
-    return rows
+def fetch_marketcap_one(ticker: str) -> Tuple[str, Optional[int]]:
+    """시가총액만 가장 싼 호출(fast_info)로 조회. 실패는 실행기가 재시도/실패 집계"""
+    return (ticker, _safe_int(yf.Ticker(ticker).fast_info["market_cap"]))
+
+def fetch_many_stock_info(tickers: List[str],
+                          fetch_fn: Optional[Callable[[str], tuple]] = None) -> Tuple[List[tuple], Dict[str, str]]:
+    """
+    공용 실행기(속도 제한 + 적응형 동시성 + 재시도)로 티커별 조회
+    fetch_fn: 기본은 현재 시세 공급자의 fetch_info
+    return: (수집 행 리스트, {실패 티커: 에러 메시지})
+    """
+    fetch_fn = fetch_fn or get_provider().fetch_info
+    logging.info("yfinance 종목 정보 가져오기 시작 (총 %d)", len(tickers))
+
+    rows, failures = get_fetch_executor().map(fetch_fn, tickers)
+    for ticker, error in failures.items():
+        logging.warning("개별 요청 실패: %s (%s)", ticker, error)
+
+    logging.info("주식 정보 가져오기 끝 (수집 %d / 실패 %d)", len(rows), len(failures))
+    return rows, failures
 
 
 if __name__ == "__main__":
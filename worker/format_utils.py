@@ -5,4 +5,39 @@ def format_low_di20_stocks(stocks):
     for ticker, curr, quant in stocks:
         # float64 → float 변환 및 소수점 2자리 포맷
         lines.append(f"{ticker:<6} | {float(curr):>10.2f} | {float(quant):>11.2f}")
-    return "\n".join(lines)
\ No newline at end of file
+    return "\n".join(lines)
+
+
+# 디스코드 메시지 길이 제한 (코드블록 여유 포함)
+DISCORD_MESSAGE_LIMIT = 1900
+
+
+def format_market_report(results, as_of=None):
+    """
+    results: {시장: {유니버스: [(ticker, curr, quant), ...]}}
+    as_of: {시장: 기준 거래일}
+    return: 시장별 섹션을 이어 붙인 보고서 (메시지 길이 제한에 맞게 나눈 리스트)
+    """
+    sections = []
+    for market, by_universe in results.items():
+        day = f" ({as_of[market]})" if as_of and market in as_of else ""
+        lines = [f"[{market}]{day}"]
+        for universe, stocks in by_universe.items():
+            lines.append(f"■ {universe}: {len(stocks)}종목")
+            if stocks:
+                lines.append(format_low_di20_stocks(stocks))
+        sections.append("\n".join(lines))
+    return split_message("\n\n".join(sections))
+
+
+def split_message(text, limit=DISCORD_MESSAGE_LIMIT):
+    """줄 단위로 limit 이하 조각으로 나눔"""
+    chunks, current = [], ""
+    for line in text.split("\n"):
+        if current and len(current) + len(line) + 1 > limit:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        chunks.append(current)
+    return chunks
@@ -1,12 +1,33 @@
-from nasdaq_100 import nasdaq_100
-from db.db import get_connection
+from db.db import db_connection
+from worker.di20_engine import panel_to_array, screen_low_di20
+from worker.di20_state import get_low_di20_stocks_incremental
+from worker.indicators import get_low_di20_stocks_from_table, table_ready
+from worker.universe import members, universes_in
+from common import metrics
+from worker import price_store
 from datetime import date
 from decimal import Decimal
+import os
 import pandas as pd
 
-def get_stock_price_by_days(ticker : str, days : int) -> list[tuple[date, Decimal]]:
-    conn = get_connection()
+# 스크리닝 방식: table(stock_indicators 최신 행) / state(증분 상태) / bulk(일괄 조회 + NumPy 엔진) / loop(종목별 조회)
+# table인데 지표 테이블이 아직 없으면(마이그레이션 005 미적용) bulk로 계산
+SCREEN_MODE = os.getenv("DI20_SCREEN_MODE", "table")
+# 종가 패널 출처: store(로컬 mmap 가격 저장소, 없거나 빠진 종목이 있으면 DB) / db
+PANEL_SOURCE = os.getenv("DI20_PANEL_SOURCE", "store")
+
+SCREEN_SEC = metrics.histogram("screen_seconds", "DI20 스크리닝 시간", ["scope", "mode"])
+SCREEN_HITS = metrics.gauge("screen_hits", "마지막 스크리닝의 조건 충족 종목 수", ["universe"])
+
+
+def _resolve_mode(mode: str | None) -> str:
+    mode = mode or SCREEN_MODE
+    if mode == "table" and not table_ready():
+        return "bulk"
+    return mode
+
 
+def get_stock_price_by_days(ticker : str, days : int) -> list[tuple[date, Decimal]]:
     sql = """
         SELECT sp.date, sp.close
         FROM stock_info si
@@ -16,21 +37,104 @@ def get_stock_price_by_days(ticker : str, days : int) -> list[tuple[date, Decima
         LIMIT %s
     """
 
-    with conn.cursor() as cur:
-        cur.execute(sql, (ticker, days))
-        result = cur.fetchall()
+    with db_connection(readonly=True, autocommit=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, (ticker, days))
+            result = cur.fetchall()
 
-    conn.close()    
     return result
 
 
+def get_stock_prices_bulk(tickers: list[str], days: int) -> list[tuple[str, date, Decimal]]:
+    """
+    유니버스 전체의 최근 N개 종가를 쿼리 1번으로 가져온다.
+    return: [(ticker, date, close), ...]
+    """
+    if not tickers:
+        return []
+
+    # 티커별 LIMIT은 LATERAL 서브쿼리로 처리 → (stock_id, date) 인덱스를 그대로 탄다
+    sql = """
+        SELECT si.ticker, sp.date, sp.close
+        FROM stock_info si
+        CROSS JOIN LATERAL (
+            SELECT p.date, p.close
+            FROM stock_prices p
+            WHERE p.stock_id = si.id
+            ORDER BY p.date DESC
+            LIMIT %s
+        ) sp
+        WHERE si.ticker = ANY(%s::text[])
+    """
+
+    with db_connection(readonly=True, autocommit=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, (days, list(tickers)))
+            return cur.fetchall()
+
+
+def get_close_panel(tickers: list[str], days: int, source: str | None = None) -> pd.DataFrame:
+    """
+    최근 N개 종가를 (date x ticker) 패널로 반환한다.
+    종목마다 거래일이 다르면 해당 칸은 NaN으로 채워진다.
+    """
+    if (source or PANEL_SOURCE) == "store":
+        panel = price_store.close_panel(tickers, days)
+        if panel is not None:
+            return panel
+
+    rows = get_stock_prices_bulk(tickers, days)
+    if not rows:
+        return pd.DataFrame(dtype=float)
+
+    # long → wide 변환을 pivot 한 번으로 처리, 컬럼은 요청한 티커 순서 유지
+    panel = (
+        pd.DataFrame(rows, columns=['ticker', 'date', 'close'])
+        .astype({'close': float})
+        .pivot(index='date', columns='ticker', values='close')
+        .sort_index()
+    )
+    return panel[[t for t in dict.fromkeys(tickers) if t in panel.columns]]
+
+
+def _is_low_di20(close: pd.Series):
+    """종가 시리즈(날짜 오름차순)로 (현재 DI20, 7% 분위수 DI20, 조건 충족 여부)를 계산"""
+    ma20 = close.rolling(20).mean()
+    di20 = (close - ma20) / ma20 * 100
+
+    p = di20.quantile(0.07)
+    curr = di20.iloc[-1]
+    return curr, p, curr <= p
+
+
 # 오늘의 과대 낙폭 종목 리스트를 반환하는 함수
-def get_today_low_di20_stocks() -> list[tuple[str, float,float]]:
+def get_today_low_di20_stocks(universe: str = "nasdaq_100", mode: str | None = None) -> list[tuple[str, float,float]]:
+    mode = _resolve_mode(mode)
+    with SCREEN_SEC.labels(universe, mode).time():
+        result = _get_today_low_di20_stocks(universe, mode)
+    SCREEN_HITS.labels(universe).set(len(result))
+    return result
+
+
+def _get_today_low_di20_stocks(universe: str, mode: str) -> list[tuple[str, float,float]]:
     # 결과 값을 담을 리스트
     low_di20_stocks = []
 
     # 종목 리스트
-    stock_list = nasdaq_100
+    stock_list = members(universe)
+
+    if mode == "table":
+        # 가격 저장 때 같이 계산해 둔 지표를 SELECT 1번으로 조회
+        return get_low_di20_stocks_from_table(stock_list)
+
+    if mode == "state":
+        # 종목별 증분 상태 사용 (상태가 없는 종목만 DB에서 재구성)
+        return get_low_di20_stocks_incremental(stock_list)
+
+    if mode == "bulk":
+        # 유니버스 전체를 쿼리 1번으로 가져와서 (종목 x 날짜) 배열로 한 번에 계산
+        tickers, closes = panel_to_array(get_close_panel(stock_list, 252))
+        return screen_low_di20(tickers, closes)
 
     for ticker in stock_list:
         # DB 가격 데이터 가져오기
@@ -42,18 +146,51 @@ def get_today_low_di20_stocks() -> list[tuple[str, float,float]]:
             .astype({'close': float})
             .sort_values('date')
         )
-        df['ma20'] = df['close'].rolling(20).mean()
-        df['di20'] = (df['close'] - df['ma20']) / df['ma20'] * 100
+        if df.empty:
+            continue
 
-        p = df['di20'].quantile(0.07)
+        curr, p, is_low = _is_low_di20(df['close'])
+        if is_low:
+            low_di20_stocks.append((ticker, curr, p))
 
-        if df['di20'].iloc[-1] <= p:
-            low_di20_stocks.append((ticker, df['di20'].iloc[-1], p))
-    
     return low_di20_stocks
 
 
+def get_low_di20_stocks_by_universe(universes: dict[str, list[str]],
+                                    mode: str | None = None) -> dict[str, list[tuple[str, float, float]]]:
+    """
+    여러 유니버스를 한 번에 스크리닝한다. (예: nasdaq_100, SNP_500, KOSPI_50, KOSDAQ_150)
+    겹치는 종목은 한 번만 조회/계산하고 결과를 유니버스별로 나눠서 반환
+    """
+    union = list(dict.fromkeys(t for tickers in universes.values() for t in tickers))
+    mode = _resolve_mode(mode)
+    if mode == "table":
+        found = get_low_di20_stocks_from_table(union)
+    elif mode == "state":
+        found = get_low_di20_stocks_incremental(union)
+    else:
+        found = screen_low_di20(*panel_to_array(get_close_panel(union, 252)))
+    hits = {ticker: (ticker, curr, quant) for ticker, curr, quant in found}
+
+    return {
+        name: [hits[t] for t in members if t in hits]
+        for name, members in universes.items()
+    }
+
+
+def get_low_di20_stocks_by_market(market: str, mode: str | None = None,
+                                  universes: list[str] | None = None) -> dict[str, list[tuple[str, float, float]]]:
+    """시장에 속한 유니버스 전체 (예: US → nasdaq_100 + SNP_500), universes를 주면 그 중 일부만"""
+    names = [n for n in universes_in(market) if universes is None or n in universes]
+    mode = _resolve_mode(mode)
+    with SCREEN_SEC.labels(market, mode).time():
+        result = get_low_di20_stocks_by_universe({name: members(name) for name in names}, mode)
+    for name, hits in result.items():
+        SCREEN_HITS.labels(name).set(len(hits))
+    return result
+
+
 
 
 if __name__ == "__main__":
-    get_today_low_di20_stocks()
\ No newline at end of file
+    get_today_low_di20_stocks()
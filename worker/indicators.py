@@ -0,0 +1,197 @@
+# 일별 지표 테이블(stock_indicators) 유지
+# save_price_to_db가 RETURNING으로 돌려준 (stock_id, date) 중 종목별 가장 이른 날짜부터만 다시 계산해서
+# 가격 upsert와 같은 트랜잭션에서 upsert한다. 스크리너는 종목별 최신 행 하나만 읽으면 된다.
+#
+# 계산 정의는 스크리너와 같음: 날짜 t의 값은 t까지 최근 LOOKBACK봉 구간 안에서 계산
+# - ma20 / di20: 구간 안 20봉 이동평균, (종가 - MA20) / MA20 * 100
+# - di20_p07: 같은 구간 DI20(앞 19봉은 NaN)의 7% 분위수
+import logging
+import threading
+import time
+from datetime import date
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from psycopg2.extras import execute_values
+
+from db.db import db_connection
+from worker.di20_engine import nan_quantile, rolling_mean
+from worker.di20_state import LOOKBACK, QUANTILE, WINDOW
+
+logger = logging.getLogger(__name__)
+
+# 테이블이 없을 때(마이그레이션 005 미적용) 다시 확인하는 간격(초). 한 번 있으면 계속 있는 것으로 봄
+_TABLE_RECHECK_SEC = 60
+_table_lock = threading.Lock()
+_table_exists = False
+_table_checked_at = 0.0
+
+_UPSERT_SQL = """
+    INSERT INTO stock_indicators (stock_id, date, ma20, di20, di20_p07)
+    VALUES %s
+    ON CONFLICT (stock_id, date) DO UPDATE
+    SET ma20       = EXCLUDED.ma20,
+        di20       = EXCLUDED.di20,
+        di20_p07   = EXCLUDED.di20_p07,
+        updated_at = now()
+"""
+
+
+def table_ready() -> bool:
+    """
+    stock_indicators 테이블이 있는지 (마이그레이션 005)
+    없으면 스크리너는 bulk로, 가격 저장은 지표 갱신 없이 진행 → 매번 실패하는 쿼리를 보내지 않음
+    """
+    global _table_exists, _table_checked_at
+    with _table_lock:
+        if _table_exists or (_table_checked_at and time.monotonic() - _table_checked_at < _TABLE_RECHECK_SEC):
+            return _table_exists
+        with db_connection(readonly=True, autocommit=True) as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT to_regclass('stock_indicators') IS NOT NULL")
+                _table_exists = cur.fetchone()[0]
+        _table_checked_at = time.monotonic()
+        if not _table_exists:
+            logger.warning("stock_indicators 테이블 없음 (마이그레이션 005 미적용). 지표 테이블 없이 진행")
+        return _table_exists
+
+
+def compute_indicators(closes: np.ndarray, start: int = 0, window: int = WINDOW,
+                       lookback: int = LOOKBACK, q: float = QUANTILE) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    closes: 한 종목의 종가 (날짜 오름차순)
+    return: closes[start:] 각 날짜의 (ma20, di20, di20 분위수)
+    """
+    closes = np.asarray(closes, dtype=float)
+    ma = rolling_mean(closes[None, :], window)[0]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        di = (closes - ma) / ma * 100
+
+    # t의 분위수 구간: 최근 lookback봉 중 DI20이 정의되는 뒤쪽 (lookback - window + 1)봉
+    # (구간 앞 19봉은 구간 밖 종가가 필요해서 스크리너에서도 NaN)
+    span = lookback - window + 1
+    padded = np.concatenate([np.full(span - 1, np.nan), di])
+    windows = sliding_window_view(padded, span)[start:]
+    quant = nan_quantile(windows, q) if len(windows) else np.array([])
+    return ma[start:], di[start:], quant
+
+
+def _load_closes(cur, since_by_id: dict[int, date], lookback: int) -> dict[int, list[tuple]]:
+    """종목별 since 이전 (lookback - 1)봉 + since 이후 전체 (date, close), 날짜 오름차순"""
+    cur.execute("""
+        SELECT c.stock_id, p.date, p.close
+        FROM unnest(%s::int[], %s::date[]) AS c(stock_id, since)
+        CROSS JOIN LATERAL (
+            (SELECT date, close FROM stock_prices
+             WHERE stock_id = c.stock_id AND date < c.since
+             ORDER BY date DESC LIMIT %s)
+            UNION ALL
+            (SELECT date, close FROM stock_prices
+             WHERE stock_id = c.stock_id AND date >= c.since)
+        ) p
+        ORDER BY c.stock_id, p.date
+    """, (list(since_by_id), list(since_by_id.values()), lookback - 1))
+    bars: dict[int, list[tuple]] = {}
+    for sid, d, close in cur.fetchall():
+        bars.setdefault(sid, []).append((d, close))
+    return bars
+
+
+def _nullable(x: float):
+    return None if np.isnan(x) else float(x)
+
+
+def recompute(cur, since_by_id: dict[int, date], page_size: int = 1000) -> int:
+    """
+    since_by_id: {stock_id: 이 날짜 이후 지표를 다시 계산}
+    과거 봉이 바뀌면 그 뒤 lookback봉의 분위수도 바뀌므로 since 이후 전체를 다시 쓴다. (보통은 마지막 몇 봉)
+    return: upsert한 지표 행 수
+    """
+    if not since_by_id:
+        return 0
+    out = []
+    for sid, bars in _load_closes(cur, since_by_id, LOOKBACK).items():
+        dates = [d for d, _ in bars]
+        closes = np.array([np.nan if c is None else float(c) for _, c in bars])
+        start = next((i for i, d in enumerate(dates) if d >= since_by_id[sid]), len(dates))
+        ma, di, quant = compute_indicators(closes, start)
+        out += [(sid, d, _nullable(m), _nullable(x), _nullable(p))
+                for d, m, x, p in zip(dates[start:], ma.tolist(), di.tolist(), quant.tolist())]
+    if out:
+        execute_values(cur, _UPSERT_SQL, out, page_size=page_size)
+    return len(out)
+
+
+def apply_changed_rows(cur, changed: list[tuple]) -> int:
+    """save_price_to_db 후크: RETURNING 행 [(stock_id, date, ...)]의 종목별 가장 이른 날짜부터 재계산"""
+    since_by_id: dict[int, date] = {}
+    for sid, d, *_ in changed:
+        if sid not in since_by_id or d < since_by_id[sid]:
+            since_by_id[sid] = d
+    return recompute(cur, since_by_id)
+
+
+def ensure_indicators(tickers: list[str]) -> int:
+    """지표가 한 행도 없는 종목(테이블 도입 전 저장분)을 전체 구간으로 계산"""
+    if not table_ready():
+        return 0
+    with db_connection() as conn, conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT si.id
+                FROM stock_info si
+                WHERE si.ticker = ANY(%s::text[])
+                  AND EXISTS (SELECT 1 FROM stock_prices p WHERE p.stock_id = si.id)
+                  AND NOT EXISTS (SELECT 1 FROM stock_indicators i WHERE i.stock_id = si.id)
+            """, (list(tickers),))
+            missing = [r[0] for r in cur.fetchall()]
+            count = recompute(cur, {sid: date.min for sid in missing})
+    if missing:
+        logger.info("지표 초기 계산: %d종목 %d행", len(missing), count)
+    return count
+
+
+def last_updated(tickers: list[str]):
+    """
+    종목들의 최신 지표 행 중 가장 늦은 updated_at (없으면 None)
+    가격이 바뀌면 같은 트랜잭션에서 그 날짜 이후 지표가 전부 다시 upsert되므로 최신 행만 보면 됨
+    → 어느 프로세스가 저장했든 DB 쪽 데이터 변경 표식으로 사용
+    """
+    if not table_ready():
+        return None
+    with db_connection(readonly=True, autocommit=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT max(i.updated_at)
+                FROM stock_info si
+                CROSS JOIN LATERAL (
+                    SELECT updated_at
+                    FROM stock_indicators
+                    WHERE stock_id = si.id
+                    ORDER BY date DESC
+                    LIMIT 1
+                ) i
+                WHERE si.ticker = ANY(%s::text[])
+            """, (list(tickers),))
+            return cur.fetchone()[0]
+
+
+def get_low_di20_stocks_from_table(tickers: list[str]) -> list[tuple[str, float, float]]:
+    """종목별 최신 지표 행으로 스크리닝 (SELECT 1번, (stock_id, date) PK 역순 스캔)"""
+    with db_connection(readonly=True, autocommit=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT si.ticker, i.di20, i.di20_p07
+                FROM stock_info si
+                CROSS JOIN LATERAL (
+                    SELECT di20, di20_p07
+                    FROM stock_indicators
+                    WHERE stock_id = si.id
+                    ORDER BY date DESC
+                    LIMIT 1
+                ) i
+                WHERE si.ticker = ANY(%s::text[]) AND i.di20 <= i.di20_p07
+            """, (list(tickers),))
+            hits = {t: (t, di, p) for t, di, p in cur.fetchall()}
+    # 요청한 티커 순서 유지
+    return [hits[t] for t in dict.fromkeys(tickers) if t in hits]
@@ -1,18 +1,18 @@
+# 실행 역할(role)
+# - all (기본): 수집 + 디스코드 봇 + 코인 알람을 한 프로세스에서
+# - ingest: 스케줄러/초기화/가격 수집 (수집 완료 이벤트는 NOTIFY로 다른 프로세스에 전달)
+# - bot: 디스코드 봇 + DI20 스크리닝 (NOTIFY로 수집 완료 이벤트 수신)
+# - coin: 코인 웹소켓 알람 (yfinance/pandas/discord를 import하지 않음 → 빠른 시작)
+# 역할마다 필요한 모듈만 함수 안에서 import한다. 여러 역할을 자식 프로세스로 띄우는 것은 worker.supervisor
+import argparse
 import os, asyncio
 import logging
-import traceback
-import pytz
 from datetime import datetime
 from dotenv import load_dotenv
-from apscheduler.schedulers.asyncio import AsyncIOScheduler  # 변경 포인트
-from coin.main_coin_alert import main_coin_alert
-from nasdaq_100 import nasdaq_100, SNP_500
-from worker.alert_stock_info_by_discord import run_discord_bot
-from worker.update_stock_info_by_yfinance import (
-    stock_price_update_by_yfinance_run,
-    stock_info_update_run
-)
-from kr_index import KOSPI_50, KOSDAQ_150
+from worker.universe import market_tickers, US, KR
+from worker.market_calendar import NY_TZ, KR_TZ
+from common import metrics
+from worker.profiling import profiled
 
 # 로깅 설정
 logging.basicConfig(
@@ -25,94 +25,167 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 TOKEN = os.getenv("DISCORD_TOKEN")
-CHANNEL_ID = int(os.getenv("DISCORD_STOCK_CHANNEL"))
+CHANNEL_ID = os.getenv("DISCORD_STOCK_CHANNEL")
+
+ROLES = ("ingest", "bot", "coin")
+ROLE = os.getenv("WORKER_ROLE", "all")
+# 코인 알람 전용 CPU (예: "0"), 수집 프로세스 nice 값 - 역할별 프로세스로 띄웠을 때만 적용
+COIN_CPUS = os.getenv("COIN_CPUS", "")
+INGEST_NICE = int(os.getenv("INGEST_NICE", "5"))
 
-# 뉴욕 시간대
-NY_TZ = pytz.timezone("America/New_York")
-# 한국 시간대
-KR_TZ = pytz.timezone("Asia/Seoul")
+# 정기 사이클 주기(초): 이 시간을 넘기면 다음 트리거와 겹친다는 경고
+CYCLE_WINDOW_SEC = int(os.getenv("JOB_CYCLE_WINDOW_SEC", "3600"))
 
+
+def run_market_cycle(market: str):
+    """시장 사이클(종목 정보 → 가격 수집 → 스크리닝 알림) 한 번, 실행 기록은 orchestrator에"""
+    from worker.orchestrator import get_orchestrator, market_cycle_dag, cycle_job, ingested_rows
+    return get_orchestrator().run(
+        cycle_job(market), market_cycle_dag(market),
+        {"market": market, "tickers": market_tickers(market)},
+        window_sec=CYCLE_WINDOW_SEC, rows_fn=ingested_rows,
+    )
+
+
+@profiled("job")
 def job():
     now = datetime.now(NY_TZ)
     logger.info(f"[JOB] 실행: {now}")
-    try:
-        logger.info("나스닥 가격 업데이트 JOB 실행")
-        stock_price_update_by_yfinance_run(nasdaq_100, "10d")
-        logger.info("S&P500 가격 정보 업데이트 JOB 실행")
-        stock_price_update_by_yfinance_run(SNP_500, "10d")
-
-    except Exception:
-        logger.error("[JOB] 예외 발생:\n%s", traceback.format_exc())
+    # 나스닥100 + S&P500 합집합을 한 번에 (겹치는 종목은 한 번만)
+    logger.info("미국 주식(나스닥100 + S&P500) 가격 업데이트 JOB 실행")
+    run_market_cycle(US)
 
+@profiled("korea_stock_update_job")
 def korea_stock_update_job():
     now = datetime.now(KR_TZ)
     logger.info(f"한국 주식 업데이트 [JOB] 실행 : {now}")
-    try:
-        logger.info("코스피 50 가격 업데이트 JOB 실행")
-        stock_price_update_by_yfinance_run(KOSPI_50, "10d")
-        logger.info("코스닥 150 가격 업데이트 JOB 실행")
-        stock_price_update_by_yfinance_run(KOSDAQ_150, "10d")
-    except Exception:
-        logger.error("한국 주식 업데이트 [JOB] 오류 발생")
+    logger.info("한국 주식(코스피50 + 코스닥150) 가격 업데이트 JOB 실행")
+    run_market_cycle(KR)
 
-async def main():
-    logger.info("main_worker 실행")
+def partition_job():
+    from worker.orchestrator import get_orchestrator, partition_dag, PARTITION_JOB
+    get_orchestrator().run(PARTITION_JOB, partition_dag())
+
+def build_scheduler():
+    """
+    스케줄러: asyncio 루프에 붙임
+    동기 잡은 스케줄러 스레드 풀에서 실행 → 미국/한국 사이클은 병렬, 같은 잡은 max_instances=1 + coalesce
+    """
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler  # 변경 포인트
+    from worker.orchestrator import get_orchestrator, PARTITION_JOB
 
-    # 스케줄러: asyncio 루프에 붙임
     scheduler = AsyncIOScheduler(timezone=NY_TZ)
-    scheduler.add_job(job, 'cron', day_of_week='mon-fri', hour=9, minute=30)
-    scheduler.add_job(job, 'cron', day_of_week='mon-fri', hour='10-15', minute=30)
+    orchestrator = get_orchestrator()
+    orchestrator.add_cron(scheduler, "us_cycle", job, day_of_week='mon-fri', hour=9, minute=30, id="us_open")
+    orchestrator.add_cron(scheduler, "us_cycle", job, day_of_week='mon-fri', hour='10-15', minute=30, id="us_hours")
 
-        # ── 한국장: 잡 트리거에 timezone=KR_TZ 지정 ──
+    # ── 한국장: 잡 트리거에 timezone=KR_TZ 지정 ──
     # 장 시작/정각 업데이트 (예: 09:00, 10:00~15:00)
-    scheduler.add_job(
-        korea_stock_update_job, 'cron',
-        day_of_week='mon-fri', hour=9, minute=0, timezone=KR_TZ, id="kr_open", replace_existing=True
+    orchestrator.add_cron(
+        scheduler, "kr_cycle", korea_stock_update_job,
+        day_of_week='mon-fri', hour=9, minute=0, timezone=KR_TZ, id="kr_open"
     )
-    scheduler.add_job(
-        korea_stock_update_job, 'cron',
-        day_of_week='mon-fri', hour='10-15', minute=0, timezone=KR_TZ, id="kr_hours", replace_existing=True
+    orchestrator.add_cron(
+        scheduler, "kr_cycle", korea_stock_update_job,
+        day_of_week='mon-fri', hour='10-15', minute=0, timezone=KR_TZ, id="kr_hours"
     )
     # 장마감 시점 처리(15:30)
-    scheduler.add_job(
-        korea_stock_update_job, 'cron',
-        day_of_week='mon-fri', hour=15, minute=30, timezone=KR_TZ, id="kr_close", replace_existing=True
+    orchestrator.add_cron(
+        scheduler, "kr_cycle", korea_stock_update_job,
+        day_of_week='mon-fri', hour=15, minute=30, timezone=KR_TZ, id="kr_close"
     )
+    # 연도 파티션 점검 (매일, 미국장 마감 후 ~ 한국장 시작 전)
+    orchestrator.add_cron(scheduler, PARTITION_JOB, partition_job, hour=18, minute=0, id="partitions")
+    return scheduler
 
 
-    scheduler.start()
+async def run_ingest(notify: bool):
+    """정기 수집 + 초기화. notify: 수집 완료 이벤트를 NOTIFY로 다른 프로세스(bot)에 전달"""
+    from db import migrations
+    from worker.startup import warm_up
 
-    # 초기 실행(동기 함수면 스레드 풀로 넘기기)
-    loop = asyncio.get_running_loop()
+    if notify:
+        from worker.event_bridge import enable_notify
+        enable_notify()
+    build_scheduler().start()
 
-    logger.info("코스피 종목 정보 초기 업데이트")
-    await loop.run_in_executor(None, stock_info_update_run, KOSPI_50)
+    # 시장별 합집합으로 종목당 한 번만 처리
+    tickers_by_market = {KR: market_tickers(KR), US: market_tickers(US)}
+    # 초기화(마이그레이션 → 시장별 정보/가격/저장소/지표)는 시장별로 동시에
+    # DI20 스크리닝은 자기 시장 초기화가 끝날 때까지만 대기 (worker.startup 준비 상태)
+    await warm_up(tickers_by_market, migrate=migrations.AUTO_MIGRATE)
+    # 이후로는 스케줄러가 같은 루프에서 실행
+    await asyncio.Event().wait()
 
-    logger.info("나스닥 종목 정보 초기 업데이트")
-    await loop.run_in_executor(None, stock_info_update_run, nasdaq_100)
 
-    logger.info("코스닥 종목 정보 초기 업데이트")
-    await loop.run_in_executor(None, stock_info_update_run, KOSDAQ_150)
+async def run_bot(listen: bool):
+    """디스코드 봇. listen: 다른 프로세스(ingest)의 수집 완료 이벤트를 LISTEN으로 받음"""
+    from worker.alert_stock_info_by_discord import run_discord_bot
 
-    logger.info("S&P500 종목 정보 초기 업데이트")
-    await loop.run_in_executor(None, stock_info_update_run, SNP_500)
+    tasks = [run_discord_bot(TOKEN, int(CHANNEL_ID))]
+    if listen:
+        from worker.event_bridge import listen as listen_events
+        tasks.append(listen_events())
+    await asyncio.gather(*tasks)
 
 
-    # 가격 정보 초기 업데이트
-    logger.info("나스닥 가격 정보 초기 업데이트")
-    await loop.run_in_executor(None, stock_price_update_by_yfinance_run, nasdaq_100, "10d")
-    logger.info("코스피 가격 정보 초기 업데이트")
-    await loop.run_in_executor(None, stock_price_update_by_yfinance_run, KOSPI_50, "2y")
-    logger.info("코스닥 가격 정보 초기 업데이트")
-    await loop.run_in_executor(None, stock_price_update_by_yfinance_run, KOSDAQ_150, "2y")
-    logger.info("S&P500 가격 정보 초기 업데이트")
-    await loop.run_in_executor(None, stock_price_update_by_yfinance_run, SNP_500, "2y")
+async def run_coin():
+    from coin.main_coin_alert import main_coin_alert
+    await main_coin_alert()
+
+
+def tune_process(role: str):
+    """역할별 프로세스 설정: 코인 알람은 전용 CPU, 수집은 낮은 우선순위 + 코인 CPU 제외"""
+    coin_cpus = {int(c) for c in COIN_CPUS.split(",") if c.strip()}
+    if not hasattr(os, "sched_setaffinity"):
+        coin_cpus = set()
+    try:
+        if role == "coin" and coin_cpus:
+            os.sched_setaffinity(0, coin_cpus)
+            logger.info("[coin] CPU 고정: %s", sorted(coin_cpus))
+        elif role == "ingest":
+            os.nice(INGEST_NICE)
+            others = os.sched_getaffinity(0) - coin_cpus if coin_cpus else set()
+            if others:
+                os.sched_setaffinity(0, others)
+            logger.info("[ingest] nice +%d, CPU %s", INGEST_NICE, sorted(others) or "전체")
+    except OSError:
+        logger.exception("[%s] 프로세스 설정 실패 (무시)", role)
+
+
+async def main(roles: tuple[str, ...] = ROLES):
+    """
+    roles 중 지정한 역할만 실행. 한 프로세스에 ingest와 bot이 같이 있으면 이벤트는 프로세스 내 버스로,
+    따로 있으면 NOTIFY/LISTEN으로 전달
+    """
+    logger.info("main_worker 실행: %s", "+".join(roles))
+    # 지표 엔드포인트/덤프: 역할별 프로세스면 METRICS_PORT + (역할 순서 + 1)
+    single = len(roles) == 1
+    metrics.start_from_env(ROLES.index(roles[0]) + 1 if single else 0, roles[0] if single else "all")
+    split = not {"ingest", "bot"} <= set(roles)
+    # 봇/코인 알람은 초기화를 기다리지 않고 바로 시작
+    runners = {
+        "ingest": lambda: run_ingest(notify=split),
+        "bot": lambda: run_bot(listen=split),
+        "coin": run_coin,
+    }
+    await asyncio.gather(*(runners[r]() for r in roles))
+
+
+def parse_roles(value: str) -> tuple[str, ...]:
+    if value == "all":
+        return ROLES
+    roles = tuple(r.strip() for r in value.split(",") if r.strip())
+    unknown = [r for r in roles if r not in ROLES]
+    if unknown:
+        raise ValueError(f"알 수 없는 역할: {', '.join(unknown)} (가능: all, {', '.join(ROLES)})")
+    return roles
 
-    logger.info("디스코드 봇 & 코인 알람 동시 실행")
-    await asyncio.gather(
-        run_discord_bot(TOKEN, CHANNEL_ID),  # 디스코드 봇
-        main_coin_alert(),                          # 코인 알람
-    )
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="main_worker")
+    parser.add_argument("--role", default=ROLE, help="all / ingest / bot / coin (쉼표로 여러 개)")
+    roles = parse_roles(parser.parse_args().role)
+    if len(roles) == 1:
+        tune_process(roles[0])
+    asyncio.run(main(roles))
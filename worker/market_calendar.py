@@ -0,0 +1,88 @@
+# 시장별 거래 달력
+# 정규장 시간(현지 시각)과 주말/휴장일로 "그 사이에 새 봉이 생길 수 있었는지"를 판단한다.
+# 휴장일은 MARKET_HOLIDAYS_US / MARKET_HOLIDAYS_KR (YYYY-MM-DD,쉼표 구분)로 추가
+import os
+from datetime import date, datetime, time, timedelta
+
+import pytz
+
+from worker.universe import US, KR
+
+# 뉴욕 시간대
+NY_TZ = pytz.timezone("America/New_York")
+# 한국 시간대
+KR_TZ = pytz.timezone("Asia/Seoul")
+
+MARKET_TZ = {US: NY_TZ, KR: KR_TZ}
+
+# 정규장 (개장, 마감) 현지 시각
+SESSION_HOURS = {
+    US: (time(9, 30), time(16, 0)),
+    KR: (time(9, 0), time(15, 30)),
+}
+
+# 마감 후에도 이 시간까지는 마지막 수집분이 들어올 수 있다고 본다 (분)
+CLOSE_GRACE_MIN = int(os.getenv("MARKET_CLOSE_GRACE_MIN", "60"))
+
+
+def _parse_holidays(value: str) -> set[date]:
+    return {date.fromisoformat(s.strip()) for s in value.split(",") if s.strip()}
+
+
+HOLIDAYS = {m: _parse_holidays(os.getenv(f"MARKET_HOLIDAYS_{m}", "")) for m in MARKET_TZ}
+
+
+def is_trading_day(market: str, d: date) -> bool:
+    return d.weekday() < 5 and d not in HOLIDAYS[market]
+
+
+def session(market: str, d: date) -> tuple[datetime, datetime]:
+    """d일 정규장 (개장, 마감 + 유예) - 시장 시간대 aware datetime"""
+    tz = MARKET_TZ[market]
+    open_, close = SESSION_HOURS[market]
+    return (tz.localize(datetime.combine(d, open_)),
+            tz.localize(datetime.combine(d, close)) + timedelta(minutes=CLOSE_GRACE_MIN))
+
+
+def now(market: str) -> datetime:
+    return datetime.now(MARKET_TZ[market])
+
+
+def is_open(market: str, at: datetime | None = None) -> bool:
+    at = at or now(market)
+    local = at.astimezone(MARKET_TZ[market])
+    if not is_trading_day(market, local.date()):
+        return False
+    start, end = session(market, local.date())
+    return start <= local < end
+
+
+def has_new_bars(market: str, since: datetime | None, at: datetime | None = None) -> bool:
+    """
+    (since, at] 사이에 정규장(+유예)이 한 번이라도 걸쳐 있으면 True
+    since가 None(아직 한 번도 계산 안 함)이면 항상 True
+    """
+    if since is None:
+        return True
+    at = at or now(market)
+    tz = MARKET_TZ[market]
+    d = since.astimezone(tz).date()
+    last = at.astimezone(tz).date()
+    while d <= last:
+        if is_trading_day(market, d):
+            start, end = session(market, d)
+            if start < at and end > since:
+                return True
+        d += timedelta(days=1)
+    return False
+
+
+def last_trading_day(market: str, at: datetime | None = None) -> date:
+    """at 시점 기준 마지막(진행 중 포함) 거래일"""
+    local = (at or now(market)).astimezone(MARKET_TZ[market])
+    d = local.date()
+    if local < session(market, d)[0]:
+        d -= timedelta(days=1)
+    while not is_trading_day(market, d):
+        d -= timedelta(days=1)
+    return d
@@ -0,0 +1,275 @@
+# 시세/메타데이터 공급자 인터페이스
+# - YFinanceProvider: 기존 yfinance 호출
+# - ReplayProvider: 로컬 파일(녹화본) 또는 합성 OHLCV를 돌려줌. 지연/실패 주입 가능 → 네트워크 없이 수집/DB 저장 부하 테스트
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import date, timedelta
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from worker.fetch_executor import ThrottledError, is_throttle_message
+from worker.stock_info_cache import StockInfoRow
+
+logger = logging.getLogger(__name__)
+
+PRICE_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+_PERIOD_UNIT_DAYS = {"d": 1, "wk": 7, "mo": 31, "y": 366}
+
+
+def period_days(period: str) -> int:
+    """yfinance period 문자열("10d", "6mo", "2y") → 일 수"""
+    for unit, days in _PERIOD_UNIT_DAYS.items():
+        if period.endswith(unit) and period[:-len(unit)].isdigit():
+            return int(period[:-len(unit)]) * days
+    raise ValueError(f"지원하지 않는 period: {period}")
+
+
+class MarketDataProvider(ABC):
+    name = "base"
+
+    @abstractmethod
+    def download(self, tickers: list[str], period: Optional[str] = None,
+                 start: Optional[str] = None) -> pd.DataFrame:
+        """
+        일봉 OHLCV 일괄 다운로드
+        return: yf.download(group_by="ticker")와 같은 모양 (index=Date, columns=(ticker, OHLCV))
+        """
+
+    @abstractmethod
+    def fetch_info(self, ticker: str) -> StockInfoRow:
+        """(ticker, fullname, exchange, country, marketcap)"""
+
+    @abstractmethod
+    def fetch_marketcap(self, ticker: str) -> Tuple[str, Optional[int]]:
+        """(ticker, marketcap) - 가장 싼 호출로"""
+
+
+class _ErrorCapture(logging.Handler):
+    """
+    이 스레드에서 남긴 yfinance ERROR 로그만 모음
+    yf.download는 종목별 실패를 예외 대신 "['AAPL', ...]: YFRateLimitError(...)" 로그로만 알린다.
+    (오류 dict는 버전마다 위치가 다름: 0.2.x는 yfinance.shared._ERRORS, 1.x는 호출별 내부 컨텍스트)
+    """
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.thread = threading.get_ident()
+        self.messages: list[str] = []
+
+    def emit(self, record):
+        if record.thread == self.thread:
+            self.messages.append(record.getMessage())
+
+
+def missing_tickers(df: pd.DataFrame, tickers: list[str]) -> list[str]:
+    """yf.download(group_by="ticker") 결과에서 값이 하나도 없는 종목"""
+    if df is None or df.empty:
+        return list(tickers)
+    if not isinstance(df.columns, pd.MultiIndex):
+        return [] if df.notna().any().any() else list(tickers)
+    present = df.notna().any(axis=0).groupby(level=0).any()
+    return [t for t in tickers if not present.get(t, False)]
+
+
+class YFinanceProvider(MarketDataProvider):
+    name = "yfinance"
+
+    def __init__(self):
+        import yfinance as yf
+        self._yf = yf
+        self._yf_logger = logging.getLogger("yfinance")
+        # yfinance 0.2.x의 yf.download는 결과/오류를 모듈 전역 dict(yfinance.shared)에 모아서 동시에 호출하면 섞인다.
+        # (1.x는 호출별 컨텍스트라 안전하지만 버전을 고정하지 않으므로 직렬화 유지)
+        self._download_lock = threading.Lock()
+
+    def download(self, tickers, period=None, start=None):
+        kwargs = {"period": period} if start is None else {"start": start}
+        capture = _ErrorCapture()
+        self._yf_logger.addHandler(capture)
+        try:
+            with self._download_lock:
+                # threads=False: yfinance 내부 스레딩 비활성 (오류 로그가 이 스레드에서 남음)
+                df = self._yf.download(
+                    tickers=tickers, **kwargs,
+                    auto_adjust=True, rounding=True, progress=False,
+                    group_by="ticker", threads=False
+                )
+        finally:
+            self._yf_logger.removeHandler(capture)
+        # 요청 제한 오류가 있었으면 빠진 종목을 예외로 올려서 재시도 (AdaptiveLimiter가 감속)
+        if any(is_throttle_message(msg) for msg in capture.messages):
+            missing = missing_tickers(df, list(tickers))
+            raise ThrottledError(f"요청 제한으로 실패한 종목 {len(missing)}개: {', '.join(missing[:5])}")
+        return df
+
+    def fetch_info(self, ticker):
+        from worker.fetch_stock_info_by_yfinance import fetch_stock_info_one
+        return fetch_stock_info_one(ticker)
+
+    def fetch_marketcap(self, ticker):
+        from worker.fetch_stock_info_by_yfinance import fetch_marketcap_one
+        return fetch_marketcap_one(ticker)
+
+
+_SYNTHETIC_ORIGIN = date(2000, 1, 3)
+
+
+def _ticker_seed(ticker: str, seed: int) -> int:
+    return int.from_bytes(hashlib.sha1(f"{seed}:{ticker}".encode()).digest()[:4], "little")
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    root/<ticker>.csv (Date,Open,High,Low,Close,Volume) 가 있으면 그 파일을, 없으면 티커별로 고정된 랜덤워크를 돌려준다.
+    root/stock_info.json ({ticker: [fullname, exchange, country, marketcap]}) 이 있으면 메타데이터로 사용
+    - latency_sec (+ 0~latency_jitter_sec): 호출마다 지연
+    - failure_rate: 종목별로 데이터를 빼고(yfinance의 개별 실패처럼) 돌려줄 확률
+    - throttle_rate: 호출 전체를 ThrottledError로 실패시킬 확률
+    - end: 마지막 거래일 (기본 오늘)
+    """
+    name = "replay"
+
+    def __init__(self, root: Optional[str] = None, latency_sec: float = 0.0, latency_jitter_sec: float = 0.0,
+                 failure_rate: float = 0.0, throttle_rate: float = 0.0, seed: int = 0,
+                 end: Optional[date] = None):
+        self.root = root
+        self.latency_sec = latency_sec
+        self.latency_jitter_sec = latency_jitter_sec
+        self.failure_rate = failure_rate
+        self.throttle_rate = throttle_rate
+        self.seed = seed
+        self.end = end
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._frames: dict[str, Optional[pd.DataFrame]] = {}
+        self._info = self._load_info()
+
+    def _load_info(self) -> dict:
+        path = os.path.join(self.root, "stock_info.json") if self.root else None
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        return {}
+
+    def _random(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+    def _inject(self):
+        delay = self.latency_sec + self.latency_jitter_sec * self._random()
+        if delay > 0:
+            time.sleep(delay)
+        if self.throttle_rate and self._random() < self.throttle_rate:
+            raise ThrottledError("replay: 429 Too Many Requests (주입)")
+
+    def _recorded(self, ticker: str) -> Optional[pd.DataFrame]:
+        if ticker in self._frames:
+            return self._frames[ticker]
+        path = os.path.join(self.root, f"{ticker}.csv") if self.root else None
+        frame = None
+        if path and os.path.exists(path):
+            frame = pd.read_csv(path, index_col="Date", parse_dates=["Date"])[PRICE_FIELDS]
+        self._frames[ticker] = frame
+        return frame
+
+    def _synthetic(self, ticker: str, dates: pd.DatetimeIndex) -> pd.DataFrame:
+        # 티커별 시드 고정, 기준일부터 이어지는 랜덤워크 → 같은 날짜는 항상 같은 값 (재실행 시 upsert가 변경 없음으로 처리됨)
+        rng = np.random.default_rng(_ticker_seed(ticker, self.seed))
+        n = len(dates)
+        total = int(np.busday_count(_SYNTHETIC_ORIGIN, dates[0].date())) + n if n else 0
+        close = 50 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, total)))
+        noise = rng.normal(0, 0.01, (3, total))
+        volume = rng.integers(10_000, 5_000_000, total).astype(float)
+        close, noise, volume = close[total - n:], noise[:, total - n:], volume[total - n:]
+        open_ = close * (1 + noise[0] / 2)
+        return pd.DataFrame({
+            "Open": open_,
+            "High": np.maximum(open_, close) * (1 + np.abs(noise[1])),
+            "Low": np.minimum(open_, close) * (1 - np.abs(noise[2])),
+            "Close": close,
+            "Volume": volume,
+        }, index=dates).round(2)
+
+    def download(self, tickers, period=None, start=None):
+        self._inject()
+        end = pd.Timestamp(self.end or date.today())
+        begin = pd.Timestamp(start) if start is not None else end - timedelta(days=period_days(period or "1mo"))
+        dates = pd.bdate_range(begin, end, name="Date")
+
+        frames = {}
+        for ticker in tickers:
+            if self.failure_rate and self._random() < self.failure_rate:
+                continue
+            recorded = self._recorded(ticker)
+            frames[ticker] = (recorded.loc[begin:end] if recorded is not None
+                              else self._synthetic(ticker, dates))
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1)
+
+    def fetch_info(self, ticker):
+        self._inject()
+        if ticker in self._info:
+            fullname, exchange, country, marketcap = self._info[ticker]
+            return (ticker, fullname, exchange, country, marketcap)
+        korea = ticker.endswith((".KS", ".KQ"))
+        exchange = {".KS": "KSC", ".KQ": "KOE"}.get(ticker[-3:], "NMS")
+        return (ticker, f"{ticker} (replay)", exchange, "South Korea" if korea else "United States",
+                _ticker_seed(ticker, self.seed) * 1000)
+
+    def fetch_marketcap(self, ticker):
+        return (ticker, self.fetch_info(ticker)[4])
+
+
+def record_frames(tickers: list[str], period: str, root: str, provider: Optional[MarketDataProvider] = None):
+    """공급자(기본 yfinance)에서 받은 OHLCV를 ReplayProvider가 읽을 수 있는 파일로 저장"""
+    provider = provider or YFinanceProvider()
+    os.makedirs(root, exist_ok=True)
+    df = provider.download(tickers, period=period)
+    recorded = pd.unique(df.columns.get_level_values(0))
+    for ticker in recorded:
+        df[ticker].dropna(how="all").to_csv(os.path.join(root, f"{ticker}.csv"), index_label="Date")
+    logger.info("녹화 완료: %d종목 → %s", len(recorded), root)
+
+
+_provider: Optional[MarketDataProvider] = None
+_provider_lock = threading.Lock()
+
+
+def _provider_from_env() -> MarketDataProvider:
+    kind = os.getenv("MARKET_DATA_PROVIDER", "yfinance")
+    if kind == "replay":
+        return ReplayProvider(
+            root=os.getenv("REPLAY_DIR"),
+            latency_sec=float(os.getenv("REPLAY_LATENCY_SEC", "0")),
+            latency_jitter_sec=float(os.getenv("REPLAY_LATENCY_JITTER_SEC", "0")),
+            failure_rate=float(os.getenv("REPLAY_FAILURE_RATE", "0")),
+            throttle_rate=float(os.getenv("REPLAY_THROTTLE_RATE", "0")),
+        )
+    if kind != "yfinance":
+        raise ValueError(f"알 수 없는 MARKET_DATA_PROVIDER: {kind}")
+    return YFinanceProvider()
+
+
+def get_provider() -> MarketDataProvider:
+    """MARKET_DATA_PROVIDER(yfinance / replay)로 고른 공급자. set_provider로 교체 가능"""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = _provider_from_env()
+            logger.info("시세 공급자: %s", _provider.name)
+        return _provider
+
+
+def set_provider(provider: MarketDataProvider):
+    global _provider
+    with _provider_lock:
+        _provider = provider
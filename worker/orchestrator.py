@@ -0,0 +1,260 @@
+# 잡 오케스트레이션 (APScheduler 위)
+# - 시장별 사이클을 DAG로 실행: 종목 정보 → 가격 수집 → 스크리닝 알림(수집 완료 이벤트 발행)
+#   앞 단계가 실패하면 뒤 단계는 건너뜀
+# - 시장별 락: 같은 시장 사이클은 한 번에 하나 (이전 실행이 안 끝났으면 이번 트리거는 건너뜀),
+#   다른 시장끼리는 병렬 (스케줄러 스레드 풀)
+# - APScheduler: max_instances=1 + coalesce → 밀린 트리거는 한 번으로 합침
+# - 실행 기록: 소요 시간 / 반영 행 수 / 결과를 메모리(최근 N개)와 JSONL 파일에 남기고,
+#   사이클이 주기(window)를 넘기면 경고
+import json
+import logging
+import os
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable
+
+from common import metrics
+
+logger = logging.getLogger(__name__)
+
+# 실행 기록 파일 (빈 문자열이면 파일에 남기지 않음)
+RUNS_FILE = os.getenv("JOB_RUNS_FILE", "cache/job_runs.jsonl")
+RUNS_KEEP = int(os.getenv("JOB_RUNS_KEEP", "500"))
+# 스케줄러가 늦게 깨어났을 때 이 시간(초) 안이면 실행
+MISFIRE_GRACE_SEC = int(os.getenv("JOB_MISFIRE_GRACE_SEC", "600"))
+
+OK = "ok"
+FAILED = "failed"
+SKIPPED = "skipped"      # 앞 단계 실패로 건너뜀
+OVERLAP = "overlap"      # 이전 실행이 아직 진행 중
+
+JOB_RUNS = metrics.counter("job_runs_total", "잡 실행 수", ["job", "outcome"])
+JOB_SEC = metrics.histogram("job_run_seconds", "잡 실행 시간", ["job"],
+                            buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200))
+JOB_ROWS = metrics.counter("job_rows_changed_total", "잡이 반영한 가격 행 수", ["job"])
+
+
+class Task:
+    """
+    fn(ctx) → 결과. ctx에는 앞 단계 결과가 ctx[이름]으로 들어 있다.
+    deps: 먼저 성공해야 하는 단계 이름들
+    """
+    def __init__(self, name: str, fn: Callable[[dict], Any], deps: tuple[str, ...] = ()):
+        self.name = name
+        self.fn = fn
+        self.deps = deps
+
+
+class Dag:
+    def __init__(self, name: str, tasks: list[Task]):
+        self.name = name
+        self.tasks = _toposort(tasks)
+
+    def run(self, ctx: dict) -> dict[str, tuple[str, float]]:
+        """return: {단계: (결과, 소요 초)}. 단계 결과값은 ctx[단계]"""
+        outcomes: dict[str, tuple[str, float]] = {}
+        for task in self.tasks:
+            blocked = [d for d in task.deps if outcomes[d][0] != OK]
+            if blocked:
+                logger.warning("[%s] %s 건너뜀 (앞 단계 실패: %s)", self.name, task.name, ", ".join(blocked))
+                outcomes[task.name] = (SKIPPED, 0.0)
+                continue
+            started = time.perf_counter()
+            try:
+                ctx[task.name] = task.fn(ctx)
+                outcomes[task.name] = (OK, time.perf_counter() - started)
+            except Exception:
+                # 트레이스백까지 남김 (스케줄러 잡 안의 예외는 그대로 두면 사라짐)
+                logger.error("[%s] %s 실패:\n%s", self.name, task.name, traceback.format_exc())
+                ctx.setdefault("errors", {})[task.name] = traceback.format_exc(limit=5)
+                outcomes[task.name] = (FAILED, time.perf_counter() - started)
+        return outcomes
+
+
+def _toposort(tasks: list[Task]) -> list[Task]:
+    by_name = {t.name: t for t in tasks}
+    ordered, state = [], {}
+
+    def visit(task: Task):
+        if state.get(task.name) == "done":
+            return
+        if state.get(task.name) == "visiting":
+            raise ValueError(f"순환 의존: {task.name}")
+        state[task.name] = "visiting"
+        for dep in task.deps:
+            if dep not in by_name:
+                raise ValueError(f"{task.name}: 없는 단계 {dep}")
+            visit(by_name[dep])
+        state[task.name] = "done"
+        ordered.append(task)
+
+    for task in tasks:
+        visit(task)
+    return ordered
+
+
+class RunRecord:
+    def __init__(self, job: str, started: datetime):
+        self.job = job
+        self.started = started
+        self.duration = 0.0
+        self.outcome = OK
+        self.rows_changed = 0
+        self.stages: dict[str, tuple[str, float]] = {}
+        self.window_sec: float | None = None
+
+    def to_dict(self) -> dict:
+        return {
+            "job": self.job,
+            "started": self.started.isoformat(timespec="seconds"),
+            "duration": round(self.duration, 3),
+            "outcome": self.outcome,
+            "rows_changed": self.rows_changed,
+            "stages": {k: [o, round(d, 3)] for k, (o, d) in self.stages.items()},
+            "window_sec": self.window_sec,
+        }
+
+
+class Orchestrator:
+    def __init__(self):
+        self._records: deque[RunRecord] = deque(maxlen=RUNS_KEEP)
+        self._records_lock = threading.Lock()
+        self._job_locks: dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def job_lock(self, job: str) -> threading.Lock:
+        """같은 잡 실행끼리 공유하는 락"""
+        with self._locks_lock:
+            return self._job_locks.setdefault(job, threading.Lock())
+
+    def run(self, job: str, dag: Dag, ctx: dict | None = None, window_sec: float | None = None,
+            rows_fn: Callable[[dict], int] | None = None, wait: bool = False) -> RunRecord:
+        """
+        dag를 한 번 실행하고 기록. 같은 job이 실행 중이면 기다리지 않고 OVERLAP으로 기록 (wait=True면 대기)
+        rows_fn(ctx): 반영 행 수 집계
+        """
+        record = RunRecord(job, datetime.now().astimezone())
+        record.window_sec = window_sec
+        lock = self.job_lock(job)
+        if not lock.acquire(blocking=wait):
+            logger.warning("[%s] 이전 실행이 아직 진행 중. 이번 실행 건너뜀", job)
+            record.outcome = OVERLAP
+            self._record(record)
+            return record
+
+        started = time.perf_counter()
+        ctx = ctx if ctx is not None else {}
+        try:
+            record.stages = dag.run(ctx)
+            if rows_fn is not None:
+                record.rows_changed = rows_fn(ctx)
+        except Exception:
+            logger.error("[%s] 실행 실패:\n%s", job, traceback.format_exc())
+            record.outcome = FAILED
+        finally:
+            lock.release()
+        record.duration = time.perf_counter() - started
+        if any(o != OK for o, _ in record.stages.values()):
+            record.outcome = FAILED
+
+        logger.info("[%s] 실행 %s: %.1fs, 반영 %d행 | %s", job, record.outcome, record.duration, record.rows_changed,
+                    " → ".join(f"{k} {o} {d:.1f}s" for k, (o, d) in record.stages.items()))
+        if window_sec and record.duration > window_sec:
+            logger.warning("[%s] 실행 시간 %.0fs가 주기 %.0fs를 넘김", job, record.duration, window_sec)
+        self._record(record)
+        return record
+
+    def _record(self, record: RunRecord):
+        JOB_RUNS.labels(record.job, record.outcome).inc()
+        if record.outcome != OVERLAP:
+            JOB_SEC.labels(record.job).observe(record.duration)
+            JOB_ROWS.labels(record.job).inc(record.rows_changed)
+        with self._records_lock:
+            self._records.append(record)
+            if RUNS_FILE:
+                try:
+                    os.makedirs(os.path.dirname(RUNS_FILE) or ".", exist_ok=True)
+                    with open(RUNS_FILE, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(record.to_dict(), ensure_ascii=False) + "\n")
+                except OSError:
+                    logger.exception("실행 기록 저장 실패: %s", RUNS_FILE)
+
+    def records(self, job: str | None = None) -> list[RunRecord]:
+        with self._records_lock:
+            return [r for r in self._records if job is None or r.job == job]
+
+    def summary(self, job: str) -> dict:
+        """최근 기록 요약: 실행 수, 결과별 수, 평균/최대 소요 시간, 주기 초과 수"""
+        runs = [r for r in self.records(job) if r.outcome != OVERLAP]
+        durations = [r.duration for r in runs]
+        outcomes: dict[str, int] = {}
+        for r in self.records(job):
+            outcomes[r.outcome] = outcomes.get(r.outcome, 0) + 1
+        return {
+            "runs": len(runs),
+            "outcomes": outcomes,
+            "avg_sec": sum(durations) / len(durations) if durations else 0.0,
+            "max_sec": max(durations, default=0.0),
+            "over_window": sum(1 for r in runs if r.window_sec and r.duration > r.window_sec),
+        }
+
+    def add_cron(self, scheduler, job: str, fn: Callable[[], Any], **trigger):
+        """겹침 방지 설정으로 cron 잡 등록 (max_instances=1, coalesce). trigger: cron 인자(id 포함 가능)"""
+        job_id = trigger.pop("id", None)
+        scheduler.add_job(
+            fn, "cron", id=job_id, name=job, replace_existing=job_id is not None,
+            max_instances=1, coalesce=True, misfire_grace_time=MISFIRE_GRACE_SEC, **trigger,
+        )
+
+
+def market_cycle_dag(market: str, backfill_period: str = "2y") -> Dag:
+    """
+    시장 사이클: info → prices → screen
+    prices는 이벤트를 발행하지 않고 결과만 돌려주고, screen 단계가 발행 → 스크리너 구독자가 실행
+    """
+    from worker.update_stock_info_by_yfinance import stock_info_update_run, stock_price_sync_run
+    from worker.events import get_bus, PRICE_INGESTED
+
+    def screen(ctx):
+        for event in ctx["prices"]:
+            get_bus().publish(PRICE_INGESTED, event)
+
+    return Dag(cycle_job(market), [
+        Task("info", lambda ctx: stock_info_update_run(ctx["tickers"])),
+        Task("prices", lambda ctx: stock_price_sync_run(ctx["tickers"], backfill_period, publish=False),
+             deps=("info",)),
+        Task("screen", screen, deps=("prices",)),
+    ])
+
+
+PARTITION_JOB = "partitions"
+
+
+def partition_dag() -> Dag:
+    """연도 파티션 점검 (다음 해 파티션을 미리 만들어 DEFAULT 파티션에 행이 쌓이지 않게)"""
+    from db.migrations import maintain_partitions
+    return Dag(PARTITION_JOB, [Task("partitions", lambda ctx: maintain_partitions())])
+
+
+def cycle_job(market: str) -> str:
+    """시장 사이클 잡 이름 (초기화도 같은 이름으로 실행 → 정기 실행과 겹치지 않음)"""
+    return f"cycle:{market}"
+
+
+def ingested_rows(ctx: dict) -> int:
+    return sum(e.rows_changed for e in ctx.get("prices") or [])
+
+
+_orchestrator: Orchestrator | None = None
+_orchestrator_lock = threading.Lock()
+
+
+def get_orchestrator() -> Orchestrator:
+    global _orchestrator
+    with _orchestrator_lock:
+        if _orchestrator is None:
+            _orchestrator = Orchestrator()
+        return _orchestrator
@@ -0,0 +1,125 @@
+# 단계별 스레드 + bounded queue 파이프라인
+# 다운로드(네트워크 대기)와 DB 저장이 겹쳐서 돌고, 큐가 차면 앞 단계가 멈춰서(backpressure) 메모리가 일정하게 유지된다.
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class Stage:
+    """
+    name: 로그용 이름
+    fn: 입력 1개 → 출력 1개. None을 반환하면 다음 단계로 넘기지 않음
+    workers: 이 단계의 동시 실행 스레드 수
+    """
+    def __init__(self, name: str, fn: Callable[[Any], Optional[Any]], workers: int = 1):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self._lock = threading.Lock()
+        self.items = 0
+        self.errors = 0
+        self.busy = 0.0      # fn 실행 시간 합
+        self.starved = 0.0   # 입력 대기 시간 합 (앞 단계가 느림)
+        self.blocked = 0.0   # 출력 큐가 가득 차서 기다린 시간 합 (뒤 단계가 느림)
+
+    def _record(self, busy: float, starved: float, blocked: float, error: bool):
+        with self._lock:
+            self.items += 1
+            self.errors += int(error)
+            self.busy += busy
+            self.starved += starved
+            self.blocked += blocked
+
+    def summary(self, elapsed: float) -> str:
+        # 단계 전체 용량(workers x 경과 시간) 중 실제 일한 비율 → 가장 높은 단계가 병목
+        util = self.busy / (self.workers * elapsed) * 100 if elapsed else 0.0
+        return (f"[{self.name}] x{self.workers} 처리 {self.items}건(실패 {self.errors}) | "
+                f"작업 {self.busy:.2f}s ({util:.0f}%) | 입력대기 {self.starved:.2f}s | 출력대기 {self.blocked:.2f}s")
+
+
+def run_pipeline(items: Iterable[Any], stages: list[Stage], queue_size: int = 2) -> list[Any]:
+    """
+    items를 stages 순서대로 흘려보내고 마지막 단계의 출력 리스트를 반환한다.
+    단계 사이 큐는 queue_size로 제한된다.
+    항목 처리 중 Exception은 로그만 남기고 계속, 워커 스레드 자체가 죽으면(BaseException) 나머지 단계를
+    정상 종료시킨 뒤 그 예외를 다시 올린다.
+    """
+    queues = [queue.Queue()]
+    queues += [queue.Queue(maxsize=max(1, queue_size)) for _ in stages[1:]]
+    queues.append(queue.Queue())  # 마지막 단계 결과
+
+    for item in items:
+        queues[0].put(item)
+    for _ in range(stages[0].workers):
+        queues[0].put(_DONE)
+
+    remaining = [s.workers for s in stages]
+    remaining_lock = threading.Lock()
+    fatal: list[BaseException] = []
+
+    def worker(i: int, stage: Stage):
+        q_in, q_out = queues[i], queues[i + 1]
+        try:
+            while True:
+                t0 = time.perf_counter()
+                item = q_in.get()
+                starved = time.perf_counter() - t0
+                if item is _DONE:
+                    break
+
+                t0 = time.perf_counter()
+                error = False
+                try:
+                    out = stage.fn(item)
+                except Exception:
+                    logger.exception("[%s] 단계 처리 중 예외 발생", stage.name)
+                    out, error = None, True
+                busy = time.perf_counter() - t0
+
+                t0 = time.perf_counter()
+                if out is not None:
+                    q_out.put(out)
+                stage._record(busy, starved, time.perf_counter() - t0, error)
+        except BaseException as e:
+            logger.exception("[%s] 워커 스레드 비정상 종료", stage.name)
+            fatal.append(e)
+            # 앞 단계가 가득 찬 큐에서 멈추지 않도록 이 워커 몫의 종료 신호까지 남은 입력을 버림
+            while q_in.get() is not _DONE:
+                pass
+        finally:
+            # 이 단계의 마지막 워커가 끝나면 다음 단계 워커 수만큼 종료 신호 전달 (비정상 종료여도 뒤 단계가 멈추지 않도록)
+            with remaining_lock:
+                remaining[i] -= 1
+                last = remaining[i] == 0
+            if last and i + 1 < len(stages):
+                for _ in range(stages[i + 1].workers):
+                    q_out.put(_DONE)
+
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=worker, args=(i, stage), name=f"{stage.name}-{k}", daemon=True)
+        for i, stage in enumerate(stages)
+        for k in range(stage.workers)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    logger.info("파이프라인 종료: %.2fs", elapsed)
+    for stage in stages:
+        logger.info(stage.summary(elapsed))
+    if fatal:
+        raise fatal[0]
+
+    results = []
+    while not queues[-1].empty():
+        results.append(queues[-1].get_nowait())
+    return results
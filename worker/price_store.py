@@ -0,0 +1,321 @@
+# 시장별 로컬 컬럼형 가격 저장소 (memory-mapped NumPy)
+# stock_prices를 매번 DB에서 다시 읽지 않고, save_price_to_db가 반영한 행만 증분으로 따라간다.
+#
+# cache/prices/<market>/
+#   index.json        : {gen, n_dates, tickers, stock_ids, synced}
+#   dates.<gen>.npy   : datetime64[D], 길이 = 날짜 용량
+#   <field>.<gen>.npy : (날짜 용량 x 종목 용량) float64, 빈 칸은 NaN
+# 날짜가 행이라 최근 N일은 파일 끝의 연속 구간 → 읽기는 mmap 슬라이스(복사 없음)
+# 용량 안에서 뒤에 날짜가 붙는 일반적인 경우는 제자리 갱신, 과거 날짜 삽입/용량 초과 시에만 새 세대로 재작성
+import json
+import logging
+import os
+import sys
+import threading
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from db.db import db_connection
+from worker.universe import ticker_market, market_members, US, KR
+from worker.ticker_registry import get_registry
+
+logger = logging.getLogger(__name__)
+
+STORE_DIR = os.getenv("PRICE_STORE_DIR", "cache/prices")
+FIELDS = ("open", "high", "low", "close", "volume")
+
+
+def _capacity(n: int, minimum: int) -> int:
+    return max(minimum, n + n // 2)
+
+
+class PriceView:
+    """한 시점의 저장소 스냅샷. 배열은 mmap 뷰라 필요한 구간만 디스크에서 읽힌다."""
+    def __init__(self, dates: np.ndarray, tickers: list[str], stock_ids: list[int], arrays: dict[str, np.ndarray]):
+        self.dates = dates
+        self.tickers = tickers
+        self.stock_ids = stock_ids
+        self.columns = {t: i for i, t in enumerate(tickers)}
+        self._arrays = arrays
+
+    def field(self, name: str) -> np.ndarray:
+        """(날짜 x 종목) 배열 (mmap 뷰)"""
+        return self._arrays[name]
+
+    def frame(self, name: str = "close", tickers: Optional[list[str]] = None,
+              days: Optional[int] = None) -> pd.DataFrame:
+        """최근 days일 (date x ticker) DataFrame. tickers를 주면 그 순서로 (없는 티커는 제외)"""
+        rows = slice(-days, None) if days else slice(None)
+        arr = self._arrays[name][rows]
+        columns = self.tickers
+        if tickers is not None:
+            columns = [t for t in tickers if t in self.columns]
+            arr = arr[:, [self.columns[t] for t in columns]]
+        return pd.DataFrame(arr, index=pd.DatetimeIndex(self.dates[rows], name="date"),
+                            columns=columns, copy=False)
+
+    def last_bars(self, name: str, tickers: list[str], bars: int) -> pd.DataFrame:
+        """
+        종목별 최근 bars봉 (date x ticker) - DB의 종목별 ORDER BY date DESC LIMIT bars와 같은 의미
+        거래정지 등으로 빈 날이 있는 종목은 창을 넓혀서 자기 봉 bars개를 채운다. 봉 = 필드 중 하나라도 있는 날
+        각 종목의 구간 밖 칸은 NaN, 어느 종목에도 봉이 없는 날짜는 제외
+        """
+        n = len(self.dates)
+        cols = [self.columns[t] for t in tickers]
+        window = min(bars, n)
+        while True:
+            rows = slice(n - window, None)
+            present = np.zeros((window, len(cols)), dtype=bool)
+            for f in FIELDS:
+                present |= ~np.isnan(self._arrays[f][rows][:, cols])
+            if window == n or not cols or present.sum(axis=0).min() >= bars:
+                break
+            window = min(n, window * 2)
+
+        # 아래(최근)부터 센 봉 순번이 bars 이하인 칸만 남김
+        from_end = np.cumsum(present[::-1], axis=0)[::-1]
+        keep = present & (from_end <= bars)
+        arr = np.where(keep, self._arrays[name][rows][:, cols], np.nan)
+        used = keep.any(axis=1)
+        return pd.DataFrame(arr[used], index=pd.DatetimeIndex(self.dates[rows][used], name="date"),
+                            columns=list(tickers))
+
+
+class MarketPriceStore:
+    def __init__(self, market: str, root: str = STORE_DIR):
+        self.market = market
+        self.dir = os.path.join(root, market)
+        self.lock = threading.Lock()  # 쓰기는 프로세스 안에서 직렬화 (쓰는 쪽은 수집 프로세스 하나)
+
+    def _path(self, name: str, gen: int) -> str:
+        return os.path.join(self.dir, f"{name}.{gen}.npy")
+
+    def _read_index(self) -> Optional[dict]:
+        try:
+            with open(os.path.join(self.dir, "index.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_index(self, index: dict):
+        os.makedirs(self.dir, exist_ok=True)
+        path = os.path.join(self.dir, "index.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp, path)  # 원자적 교체 → 읽는 쪽은 이전/새 세대 중 하나만 본다
+
+    def view(self) -> Optional[PriceView]:
+        """동기화된 적이 없으면 None"""
+        for _ in range(2):
+            index = self._read_index()
+            if not index or not index.get("synced"):
+                return None
+            n, m, gen = index["n_dates"], len(index["tickers"]), index["gen"]
+            try:
+                dates = np.load(self._path("dates", gen), mmap_mode="r")[:n]
+                arrays = {f: np.load(self._path(f, gen), mmap_mode="r")[:n, :m] for f in FIELDS}
+            except FileNotFoundError:
+                continue  # 읽는 사이 세대가 두 번 바뀜 → 인덱스부터 다시
+            return PriceView(dates, index["tickers"], index["stock_ids"], arrays)
+        return None
+
+    def mark_stale(self):
+        """증분 반영에 실패했을 때: 다음 sync 전까지 읽는 쪽이 DB를 쓰도록"""
+        with self.lock:
+            index = self._read_index()
+            if index and index.get("synced"):
+                index["synced"] = False
+                self._write_index(index)
+
+    def apply(self, rows: list[tuple], tickers_by_id: dict[int, str], rebuild: bool = False) -> int:
+        """
+        rows: [(stock_id, date, open, high, low, close, volume), ...]
+        rebuild: 기존 내용을 버리고 rows로 새로 만든다 (DB 전체 동기화)
+        return: 반영한 행 수
+        """
+        if not rows and not rebuild:
+            return 0
+        with self.lock:
+            index = self._read_index()
+            if index is None or rebuild:
+                # 재작성이어도 세대 번호는 이어서 (읽는 중인 이전 세대 파일과 겹치지 않게)
+                index = {"gen": index["gen"] if index else 0, "n_dates": 0,
+                         "tickers": [], "stock_ids": [], "synced": False}
+            gen, n = index["gen"], index["n_dates"]
+            tickers, stock_ids = list(index["tickers"]), list(index["stock_ids"])
+            m_old = len(tickers)
+
+            sids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+            row_dates = pd.to_datetime([r[1] for r in rows]).values.astype("datetime64[D]")
+            values = np.array([r[2:7] for r in rows], dtype=float).reshape(len(rows), len(FIELDS))
+
+            col_of = {sid: i for i, sid in enumerate(stock_ids)}
+            for sid in dict.fromkeys(sids.tolist()):
+                if sid not in col_of:
+                    col_of[sid] = len(stock_ids)
+                    stock_ids.append(sid)
+                    tickers.append(tickers_by_id[sid])
+
+            old_dates = np.load(self._path("dates", gen), mmap_mode="r")[:n] if n else np.array([], "datetime64[D]")
+            new_dates = np.setdiff1d(row_dates, old_dates)
+            shape = np.load(self._path("close", gen), mmap_mode="r").shape if n else (0, 0)
+
+            appendable = n == 0 or not len(new_dates) or new_dates[0] > old_dates[-1]
+            if n and appendable and n + len(new_dates) <= shape[0] and len(tickers) <= shape[1]:
+                # 제자리 갱신: 새 날짜는 뒤에 붙이고 값만 덮어씀
+                dates_arr = np.load(self._path("dates", gen), mmap_mode="r+")
+                dates_arr[n:n + len(new_dates)] = new_dates
+                all_dates = dates_arr[:n + len(new_dates)]
+                arrays = {f: np.load(self._path(f, gen), mmap_mode="r+") for f in FIELDS}
+                new_gen = gen
+            else:
+                # 새 세대로 재작성: 합친 날짜축에 기존 값을 옮겨 담음
+                all_dates = np.union1d(old_dates, new_dates)
+                rows_cap = _capacity(len(all_dates), 256)
+                cols_cap = _capacity(len(tickers), 64)
+                new_gen = gen + 1
+                os.makedirs(self.dir, exist_ok=True)
+                dates_arr = np.lib.format.open_memmap(self._path("dates", new_gen), mode="w+",
+                                                      dtype="datetime64[D]", shape=(rows_cap,))
+                dates_arr[:len(all_dates)] = all_dates
+                pos = np.searchsorted(all_dates, old_dates)
+                arrays = {}
+                for f in FIELDS:
+                    arr = np.lib.format.open_memmap(self._path(f, new_gen), mode="w+",
+                                                    dtype=np.float64, shape=(rows_cap, cols_cap))
+                    arr[:] = np.nan
+                    if n:
+                        arr[pos, :m_old] = np.load(self._path(f, gen), mmap_mode="r")[:n, :m_old]
+                    arrays[f] = arr
+
+            rpos = np.searchsorted(all_dates, row_dates)
+            cpos = np.fromiter((col_of[s] for s in sids.tolist()), dtype=np.int64, count=len(rows))
+            for i, f in enumerate(FIELDS):
+                arrays[f][rpos, cpos] = values[:, i]
+                arrays[f].flush()
+            dates_arr.flush()
+
+            self._write_index({"gen": new_gen, "n_dates": int(len(all_dates)), "tickers": tickers,
+                               "stock_ids": stock_ids, "synced": rebuild or index["synced"]})
+            if new_gen != gen:
+                # 방금 교체된 세대는 읽는 중일 수 있으니 남겨두고 그 이전 세대만 삭제
+                for name in ("dates",) + FIELDS:
+                    try:
+                        os.remove(self._path(name, gen - 1))
+                    except FileNotFoundError:
+                        pass
+                logger.info("[%s] 가격 저장소 재작성: 세대 %d, %d일 x %d종목", self.market, new_gen,
+                            len(all_dates), len(tickers))
+            return len(rows)
+
+
+_stores: dict[str, MarketPriceStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_price_store(market: str) -> MarketPriceStore:
+    with _stores_lock:
+        if market not in _stores:
+            _stores[market] = MarketPriceStore(market)
+        return _stores[market]
+
+
+def apply_rows(rows: list[tuple]):
+    """
+    save_price_to_db 후크: 반영된 (stock_id, date, open, high, low, close, volume) 행을 시장별 저장소에 적용
+    동기화된 적 없는 시장은 건너뜀 (sync_market이 DB에서 통째로 만든다)
+    """
+    if not rows:
+        return
+    tickers_by_id = get_registry().tickers(list({r[0] for r in rows}))
+    by_market: dict[str, list[tuple]] = {}
+    for r in rows:
+        ticker = tickers_by_id.get(r[0])
+        if ticker is not None:
+            by_market.setdefault(ticker_market(ticker), []).append(r)
+
+    for market, market_rows in by_market.items():
+        store = get_price_store(market)
+        if store.view() is None:
+            continue
+        try:
+            store.apply(market_rows, tickers_by_id)
+        except Exception:
+            logger.exception("[%s] 가격 저장소 증분 반영 실패. 다음 동기화 전까지 DB에서 읽음", market)
+            store.mark_stale()
+
+
+def sync_market(market: str, tickers: list[str]) -> int:
+    """DB의 해당 종목 가격 전체로 저장소를 다시 만든다. return: 적재 행 수"""
+    with db_connection(readonly=True, autocommit=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT si.id, si.ticker, sp.date, sp.open, sp.high, sp.low, sp.close, sp.volume
+                FROM stock_info si
+                JOIN stock_prices sp ON sp.stock_id = si.id
+                WHERE si.ticker = ANY(%s::text[])
+            """, (list(tickers),))
+            fetched = cur.fetchall()
+    tickers_by_id = {r[0]: r[1] for r in fetched}
+    rows = [(r[0],) + tuple(r[2:]) for r in fetched]
+    count = get_price_store(market).apply(rows, tickers_by_id, rebuild=True)
+    logger.info("[%s] 가격 저장소 동기화: %d종목 %d행", market, len(tickers_by_id), count)
+    return count
+
+
+def ensure_synced(market: str, tickers: list[str]):
+    """저장소가 없거나 stale이면 DB에서 동기화"""
+    if get_price_store(market).view() is None:
+        sync_market(market, tickers)
+
+
+def close_panel(tickers: list[str], days: int) -> Optional[pd.DataFrame]:
+    """
+    시장별 저장소에서 종목별 최근 days봉 종가 (date x ticker), 컬럼은 요청한 티커 순서
+    DB 경로(get_stock_prices_bulk)와 같은 값 → 거래정지로 빈 날이 있는 종목도 봉 수가 같다.
+    저장소가 없거나 빠진 종목이 있으면 None → 호출 쪽에서 DB 사용
+    """
+    groups: dict[str, list[str]] = {}
+    for t in dict.fromkeys(tickers):
+        groups.setdefault(ticker_market(t), []).append(t)
+
+    frames = []
+    for market, group in groups.items():
+        view = get_price_store(market).view()
+        if view is None or any(t not in view.columns for t in group):
+            return None
+        frames.append(view.last_bars("close", group, days))
+    if not frames:
+        return pd.DataFrame(dtype=float)
+    # 시장마다 거래일이 달라서 합치면 빈 칸이 생김 → 스크리너가 종목별로 오른쪽 정렬해서 처리
+    panel = frames[0] if len(frames) == 1 else pd.concat(frames, axis=1).sort_index()
+    return panel[[t for t in dict.fromkeys(tickers) if t in panel.columns]]
+
+
+if __name__ == "__main__":
+    # python -m worker.price_store sync   : DB → 저장소 전체 동기화
+    # python -m worker.price_store verify : 저장소 종가와 DB 종가 비교
+    from worker.get_low_di20_stocks import get_close_panel
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "sync"
+    for market in (US, KR):
+        tickers = market_members(market)
+        if command == "sync":
+            sync_market(market, tickers)
+        else:
+            store_panel = close_panel(tickers, 252)
+            db_panel = get_close_panel(tickers, 252, source="db")
+            if store_panel is None:
+                print(f"[{market}] 저장소 없음 (sync 먼저 실행)")
+                continue
+            # 둘 다 종목별 최근 252봉 → 날짜/종목/값이 모두 같아야 함
+            db_panel.index = pd.DatetimeIndex(db_panel.index, name="date")
+            dates = store_panel.index.union(db_panel.index)
+            store_part = store_panel.reindex(index=dates, columns=db_panel.columns)
+            mismatches = int((~np.isclose(store_part, db_panel.reindex(dates), equal_nan=True)).sum())
+            missing = [t for t in db_panel.columns if t not in store_panel.columns]
+            print(f"[{market}] {len(dates)}일 x {len(db_panel.columns)}종목 불일치 {mismatches}칸, "
+                  f"저장소에 없는 종목 {len(missing)}개")
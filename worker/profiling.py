@@ -0,0 +1,302 @@
+# 환경 변수로 켜는 프로파일링 훅
+# - PROFILE_JOBS=job,korea_stock_update_job,... (또는 all): 해당 이름으로 감싼 함수를 cProfile + tracemalloc으로 실행하고
+#   PROFILE_DIR/<이름>-<시각>.txt 에 보고서 저장 (누적 시간 상위 함수, 할당 상위 위치, 최대 메모리, 배치별 최대 메모리)
+#   cProfile은 호출한 스레드만 측정한다. 파이프라인 단계 스레드의 시간은 pipeline 로그(단계별 작업 시간)로,
+#   메모리(tracemalloc)는 프로세스 전체로 잡힌다.
+# - PROFILE_WS_SAMPLE=N: ws_loop에서 N개 메시지마다 1개의 처리 시간을 재고, 이벤트 루프 지연을 주기적으로 측정해서
+#   PROFILE_WS_REPORT_SEC 간격으로 보고서 저장
+# 꺼져 있으면 profiled()는 원래 함수를 그대로 돌려주고 batch_scope()는 공용 nullcontext → 추가 비용 없음
+import asyncio
+import cProfile
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+PROFILE_JOBS = {j.strip() for j in os.getenv("PROFILE_JOBS", "").split(",") if j.strip()}
+PROFILE_DIR = os.getenv("PROFILE_DIR", "cache/profiles")
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", "30"))
+PROFILE_TRACEMALLOC = os.getenv("PROFILE_TRACEMALLOC", "1") == "1"
+# tracemalloc이 저장할 스택 깊이 (깊을수록 느림)
+PROFILE_TRACEMALLOC_FRAMES = int(os.getenv("PROFILE_TRACEMALLOC_FRAMES", "1"))
+
+PROFILE_WS_SAMPLE = int(os.getenv("PROFILE_WS_SAMPLE", "0"))
+PROFILE_WS_REPORT_SEC = float(os.getenv("PROFILE_WS_REPORT_SEC", "300"))
+# 이벤트 루프 지연 측정 간격(초)
+PROFILE_LOOP_LAG_SEC = float(os.getenv("PROFILE_LOOP_LAG_SEC", "0.1"))
+
+_NULL_SCOPE = nullcontext()
+_local = threading.local()
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+
+def enabled(name: str) -> bool:
+    return "all" in PROFILE_JOBS or name in PROFILE_JOBS
+
+
+def _report_path(name: str) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    return os.path.join(PROFILE_DIR, f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.txt")
+
+
+def _start_tracemalloc() -> bool:
+    global _tracemalloc_users
+    if not PROFILE_TRACEMALLOC:
+        return False
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+        _tracemalloc_users += 1
+    return True
+
+
+def _stop_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+
+
+class _PeakTracker:
+    """
+    구간별 최대 메모리 (프로파일 세션, 배치)
+    tracemalloc의 최대값은 프로세스에 하나뿐이라 reset_peak 하나로 구간을 나누면 중첩/동시 구간이 서로의 최대값을 지운다.
+    → reset_peak 직전마다 지금까지의 최대값을 진행 중인 모든 구간에 반영한 뒤 초기화
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._peaks: dict[int, int] = {}
+        self._next = 0
+
+    def _fold(self):
+        peak = tracemalloc.get_traced_memory()[1]
+        for key, value in self._peaks.items():
+            if peak > value:
+                self._peaks[key] = peak
+        tracemalloc.reset_peak()
+
+    def enter(self) -> int:
+        with self._lock:
+            self._fold()
+            self._next += 1
+            self._peaks[self._next] = tracemalloc.get_traced_memory()[0]
+            return self._next
+
+    def exit(self, key: int) -> int:
+        """enter 이후 최대 메모리"""
+        with self._lock:
+            self._fold()
+            return self._peaks.pop(key)
+
+
+_peaks = _PeakTracker()
+
+
+class _Session:
+    """프로파일 한 번의 기록 (배치별 최대 메모리 포함)"""
+    def __init__(self, name: str):
+        self.name = name
+        self.batches: list[tuple[str, float, int]] = []
+        self._lock = threading.Lock()
+
+    def add_batch(self, label: str, elapsed: float, peak: int):
+        with self._lock:
+            self.batches.append((label, elapsed, peak))
+
+
+_sessions: list[_Session] = []
+_sessions_lock = threading.Lock()
+
+
+def profiled(name: str):
+    """
+    PROFILE_JOBS에 name이 있으면 cProfile + tracemalloc으로 감싼다. 없으면 원래 함수 그대로
+    같은 스레드에서 이미 프로파일 중이면(감싼 함수끼리 중첩) 안쪽은 그냥 실행
+    """
+    def decorator(fn):
+        if not enabled(name):
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if getattr(_local, "active", False):
+                return fn(*args, **kwargs)
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # 3.12+: 다른 스레드에서 이미 프로파일러가 켜져 있음
+                logger.info("[profile] %s: 다른 프로파일이 진행 중이라 건너뜀", name)
+                return fn(*args, **kwargs)
+
+            session = _Session(name)
+            with _sessions_lock:
+                _sessions.append(session)
+            tracing = _start_tracemalloc()
+            peak_key = _peaks.enter() if tracing else None
+            _local.active = True
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                profile.disable()
+                _local.active = False
+                snapshot = tracemalloc.take_snapshot() if tracing else None
+                current = tracemalloc.get_traced_memory()[0] if tracing else 0
+                peak = _peaks.exit(peak_key) if tracing else 0
+                if tracing:
+                    _stop_tracemalloc()
+                with _sessions_lock:
+                    _sessions.remove(session)
+                try:
+                    _write_report(session, elapsed, profile, snapshot, current, peak)
+                except OSError:
+                    logger.exception("[profile] %s 보고서 저장 실패", name)
+        return wrapper
+    return decorator
+
+
+def _write_report(session: _Session, elapsed: float, profile: cProfile.Profile, snapshot, current: int, peak: int):
+    out = io.StringIO()
+    out.write(f"# {session.name} @ {datetime.now().isoformat(timespec='seconds')}\n")
+    out.write(f"elapsed: {elapsed:.3f}s\n")
+    if snapshot is not None:
+        out.write(f"memory: current {current / 2**20:.1f} MiB, peak {peak / 2**20:.1f} MiB\n")
+
+    if session.batches:
+        out.write("\n## 배치별 최대 메모리 (다른 스레드의 동시 할당 포함)\n")
+        for label, batch_elapsed, batch_peak in session.batches:
+            out.write(f"{batch_peak / 2**20:>9.1f} MiB  {batch_elapsed:>8.3f}s  {label}\n")
+
+    out.write(f"\n## cProfile (누적 시간 상위 {PROFILE_TOP}, 호출 스레드)\n")
+    pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+
+    if snapshot is not None:
+        out.write(f"\n## tracemalloc (할당 상위 {PROFILE_TOP}, 종료 시점에 살아 있는 메모리)\n")
+        for stat in snapshot.statistics("lineno")[:PROFILE_TOP]:
+            out.write(f"{stat.size / 2**10:>10.1f} KiB  {stat.count:>8}  {stat.traceback}\n")
+
+    path = _report_path(session.name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(out.getvalue())
+    logger.info("[profile] %s: %.2fs, 최대 메모리 %.1f MiB → %s", session.name, elapsed, peak / 2**20, path)
+
+
+@contextmanager
+def _batch_scope(label: str):
+    peak_key = _peaks.enter()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        peak = _peaks.exit(peak_key)
+        elapsed = time.perf_counter() - started
+        with _sessions_lock:
+            sessions = list(_sessions)
+        for session in sessions:
+            session.add_batch(label, elapsed, peak)
+
+
+def batch_scope(label: str):
+    """배치 하나의 최대 메모리를 진행 중인 프로파일 보고서에 추가. 프로파일 중이 아니면 아무것도 안 함"""
+    if not _sessions or not tracemalloc.is_tracing():
+        return _NULL_SCOPE
+    return _batch_scope(label)
+
+
+class WsSampler:
+    """
+    ws_loop 샘플링: sample번에 1번 처리 시간(메시지당) + 이벤트 루프 지연
+        sampler = ws_sampler()          # 꺼져 있으면 None
+        t = sampler.start() if sampler else None
+        ... 메시지 처리 (배치면 n개) ...
+        if t is not None: sampler.stop(t, n)
+    """
+    def __init__(self, sample: int, report_sec: float, lag_interval: float):
+        self.sample = sample
+        self.report_sec = report_sec
+        self.lag_interval = lag_interval
+        self._seen = 0
+        self._costs: list[float] = []
+        self._lags: list[float] = []
+        self._since = time.time()
+        self._lag_task: asyncio.Task | None = None
+
+    def start(self) -> float | None:
+        self._seen += 1
+        if self._seen % self.sample:
+            return None
+        return time.perf_counter()
+
+    def stop(self, started: float, count: int = 1):
+        self._costs.append((time.perf_counter() - started) / max(count, 1))
+        if time.time() - self._since >= self.report_sec:
+            self.report()
+
+    def watch_loop(self):
+        """이벤트 루프 지연 측정 태스크 시작 (실행 중인 루프에서 호출)"""
+        if self._lag_task is None or self._lag_task.done():
+            self._lag_task = asyncio.get_running_loop().create_task(self._measure_lag())
+
+    async def _measure_lag(self):
+        while True:
+            expected = time.perf_counter() + self.lag_interval
+            await asyncio.sleep(self.lag_interval)
+            self._lags.append(max(0.0, time.perf_counter() - expected))
+
+    def report(self):
+        costs, lags = sorted(self._costs), sorted(self._lags)
+        window = time.time() - self._since
+        self._costs, self._lags, self._since = [], [], time.time()
+        lines = [
+            f"# ws_loop 샘플링 @ {datetime.now().isoformat(timespec='seconds')} ({window:.0f}s, 1/{self.sample} 메시지)",
+            _summary("메시지 처리 시간", costs),
+            _summary("이벤트 루프 지연", lags),
+        ]
+        text = "\n".join(lines) + "\n"
+        # stop()은 이벤트 루프에서 불림 → 파일 쓰기는 기본 executor 스레드로 넘겨 루프를 막지 않음
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            _write_ws_report(text)
+        else:
+            loop.run_in_executor(None, _write_ws_report, text)
+        logger.info("[profile] %s | %s", lines[1], lines[2])
+
+
+def _write_ws_report(text: str):
+    try:
+        with open(_report_path("ws_loop"), "w", encoding="utf-8") as f:
+            f.write(text)
+    except OSError:
+        logger.exception("[profile] ws_loop 보고서 저장 실패")
+
+
+def _percentile(values: list[float], q: float) -> float:
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def _summary(label: str, values: list[float]) -> str:
+    if not values:
+        return f"{label}: 표본 없음"
+    ms = [v * 1000 for v in values]
+    return (f"{label}: n={len(ms)} 평균 {sum(ms) / len(ms):.3f}ms p50 {_percentile(ms, 0.5):.3f}ms "
+            f"p99 {_percentile(ms, 0.99):.3f}ms 최대 {ms[-1]:.3f}ms")
+
+
+def ws_sampler() -> WsSampler | None:
+    """PROFILE_WS_SAMPLE이 0이면 None"""
+    if PROFILE_WS_SAMPLE <= 0:
+        return None
+    return WsSampler(PROFILE_WS_SAMPLE, PROFILE_WS_REPORT_SEC, PROFILE_LOOP_LAG_SEC)
@@ -0,0 +1,187 @@
+# 시작 단계 오케스트레이터 + 준비 상태(readiness)
+# 시장별 초기화(종목 정보 → 가격 동기화 → 가격 저장소 → 지표 테이블)를 제한된 스레드 수 안에서 동시에 실행하고,
+# 각 단계의 준비 상태를 이름별로 노출한다. 디스코드 봇/코인 알람은 기다리지 않고 바로 시작하고,
+# DI20 스크리닝은 자기 시장("market:US" 등)이 준비될 때까지만 기다린다.
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# 초기화 작업에 쓸 스레드 수 (시장별 작업이 이 안에서 동시에 실행됨)
+STARTUP_WORKERS = int(os.getenv("STARTUP_WORKERS", "2"))
+# 초기 가격 동기화 때 신규/구멍 있는 종목의 백필 구간
+STARTUP_BACKFILL_PERIOD = os.getenv("STARTUP_BACKFILL_PERIOD", "2y")
+
+PENDING = "pending"
+RUNNING = "running"
+READY = "ready"
+FAILED = "failed"
+
+DB = "db"
+
+
+def market_key(market: str) -> str:
+    return f"market:{market}"
+
+
+class Readiness:
+    """
+    이름별 준비 상태. set()은 어느 스레드에서나, wait()는 이벤트 루프에서 호출
+    READY/FAILED가 되면 기다리던 쪽이 깨어난다. (FAILED면 기존 데이터로 진행할지는 호출한 쪽이 판단)
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: dict[str, str] = {}
+        self._since: dict[str, float] = {}
+        self._waiters: dict[str, list[tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+
+    def register(self, *names: str):
+        with self._lock:
+            for name in names:
+                self._states.setdefault(name, PENDING)
+                self._since.setdefault(name, time.time())
+
+    def set(self, name: str, state: str):
+        with self._lock:
+            self._states[name] = state
+            self._since[name] = time.time()
+            waiters = self._waiters.pop(name, []) if state in (READY, FAILED) else []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future, state)
+
+    def state(self, name: str) -> str | None:
+        """등록되지 않은 이름은 None (기다릴 필요 없음)"""
+        with self._lock:
+            return self._states.get(name)
+
+    def snapshot(self) -> dict[str, tuple[str, float]]:
+        """{이름: (상태, 상태가 바뀐 뒤 경과 초)}"""
+        now = time.time()
+        with self._lock:
+            return {name: (state, now - self._since[name]) for name, state in self._states.items()}
+
+    async def wait(self, name: str, timeout: float | None = None) -> str | None:
+        """READY/FAILED가 될 때까지 대기. return: 최종 상태 (등록 안 됐으면 None, 시간 초과면 현재 상태)"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._states.get(name)
+            if state is None or state in (READY, FAILED):
+                return state
+            future = loop.create_future()
+            self._waiters.setdefault(name, []).append((loop, future))
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            return self.state(name)
+
+
+def _resolve(future: asyncio.Future, state: str):
+    if not future.done():
+        future.set_result(state)
+
+
+_readiness: Readiness | None = None
+_readiness_lock = threading.Lock()
+
+
+def get_readiness() -> Readiness:
+    global _readiness
+    with _readiness_lock:
+        if _readiness is None:
+            _readiness = Readiness()
+        return _readiness
+
+
+def _warm_up_market(market: str, tickers: list[str]) -> bool:
+    """시장 하나의 초기화 (블로킹, 작업 스레드에서 실행). 정기 사이클과 같은 잡 락 → 겹치면 끝날 때까지 대기"""
+    from worker.update_stock_info_by_yfinance import stock_info_update_run, stock_price_sync_run
+    from worker.price_store import ensure_synced
+    from worker.indicators import ensure_indicators
+    from worker.orchestrator import Dag, Task, OK, cycle_job, get_orchestrator, ingested_rows
+
+    dag = Dag(f"startup:{market}", [
+        Task("info", lambda ctx: stock_info_update_run(tickers)),
+        # 저장된 마지막 날짜 이후만 받고, 신규/구멍 있는 종목만 백필 (수집 완료 이벤트 발행)
+        Task("prices", lambda ctx: stock_price_sync_run(tickers, STARTUP_BACKFILL_PERIOD), deps=("info",)),
+        # 로컬 가격 저장소: 처음이거나 증분 반영이 끊긴 경우만 DB에서 통째로 동기화
+        Task("store", lambda ctx: ensure_synced(market, tickers), deps=("prices",)),
+        # 지표 테이블 도입 전에 저장된 종목만 한 번 전체 계산
+        Task("indicators", lambda ctx: ensure_indicators(tickers), deps=("prices",)),
+    ])
+    record = get_orchestrator().run(cycle_job(market), dag, rows_fn=ingested_rows, wait=True)
+    return record.outcome == OK
+
+
+def _check_schema():
+    """
+    자동 마이그레이션을 끈 경우의 스키마 점검
+    - 추가형 마이그레이션이 빠져 있으면 실패 (코드가 그 테이블/인덱스를 기대함) → DB 준비 상태 FAILED
+    - heavy 마이그레이션은 경고만, 연도 파티션은 점검 (실패해도 계속)
+    """
+    from db import migrations
+    pending = [(m, f"{m.version:03d}_{m.name}") for m, applied in migrations.status() if not applied]
+    required = [name for m, name in pending if not m.heavy]
+    if required:
+        raise RuntimeError(f"미적용 마이그레이션: {', '.join(required)} "
+                           "(python -m db.migrations upgrade 또는 DB_AUTO_MIGRATE=1)")
+    heavy = [name for m, name in pending if m.heavy]
+    if heavy:
+        logger.warning("미적용 heavy 마이그레이션: %s (python -m db.migrations upgrade 또는 DB_AUTO_MIGRATE_HEAVY=1)",
+                       ", ".join(heavy))
+    try:
+        migrations.maintain_partitions()
+    except Exception:
+        logger.exception("연도 파티션 점검 실패 (예약 잡이 다시 시도)")
+
+
+async def warm_up(tickers_by_market: dict[str, list[str]], migrate: bool = True,
+                  workers: int = STARTUP_WORKERS):
+    """
+    1) 스키마 마이그레이션 (DB)
+    2) 시장별 초기화를 동시에 (스레드 workers개 안에서)
+    실패는 상태(FAILED)와 로그로만 남기고 예외를 올리지 않음 → 같이 gather된 봇/알람이 멈추지 않음
+    """
+    readiness = get_readiness()
+    readiness.register(DB, *(market_key(m) for m in tickers_by_market))
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="startup")
+    started = time.perf_counter()
+    try:
+        readiness.set(DB, RUNNING)
+        from db import migrations
+        try:
+            if migrate:
+                # 스키마 마이그레이션 + 연도 파티션 미리 생성 (다른 프로세스가 실행 중이면 advisory lock에서 대기)
+                # heavy 마이그레이션은 DB_AUTO_MIGRATE_HEAVY=1일 때만
+                await loop.run_in_executor(executor, migrations.upgrade, migrations.AUTO_MIGRATE_HEAVY)
+            else:
+                await loop.run_in_executor(executor, _check_schema)
+        except Exception:
+            logger.exception("초기화: 마이그레이션 실패")
+            readiness.set(DB, FAILED)
+            for market in tickers_by_market:
+                readiness.set(market_key(market), FAILED)
+            return
+        readiness.set(DB, READY)
+
+        async def run_market(market: str, tickers: list[str]):
+            key = market_key(market)
+            readiness.set(key, RUNNING)
+            try:
+                ok = await loop.run_in_executor(executor, _warm_up_market, market, tickers)
+            except Exception:
+                logger.exception("[%s] 초기화 실패", market)
+                ok = False
+            if not ok:
+                logger.warning("[%s] 초기화 실패 (기존 데이터로 계속)", market)
+            readiness.set(key, READY if ok else FAILED)
+
+        await asyncio.gather(*(run_market(m, t) for m, t in tickers_by_market.items()))
+    finally:
+        executor.shutdown(wait=False)
+    logger.info("초기화 종료 (%.1fs): %s", time.perf_counter() - started,
+                ", ".join(f"{name}={state}" for name, (state, _) in readiness.snapshot().items()))
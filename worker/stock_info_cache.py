@@ -0,0 +1,73 @@
+# 종목 메타데이터 로컬 캐시 (필드별 TTL)
+# 이름/거래소/국가는 거의 바뀌지 않으므로 주 1회, 시가총액은 하루 1회만 원격 호출로 갱신한다.
+import json
+import logging
+import os
+import time
+from typing import Optional, Tuple
+
+CACHE_PATH = os.getenv("STOCK_INFO_CACHE_PATH", "cache/stock_info.json")
+STATIC_TTL_SEC = int(os.getenv("STOCK_INFO_STATIC_TTL_SEC", str(7 * 24 * 3600)))
+MARKETCAP_TTL_SEC = int(os.getenv("STOCK_INFO_MARKETCAP_TTL_SEC", str(24 * 3600)))
+
+logger = logging.getLogger(__name__)
+
+StockInfoRow = Tuple[str, Optional[str], Optional[str], Optional[str], Optional[int]]
+
+
+class StockInfoCache:
+    """
+    ticker → {fullname, exchange, country, marketcap, static_at, marketcap_at}
+    *_at: 마지막으로 원격에서 가져온 시각(epoch 초)
+    """
+    def __init__(self, path: str = CACHE_PATH):
+        self.path = path
+        self.entries: dict[str, dict] = {}
+
+    def load(self) -> "StockInfoCache":
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                logger.exception("종목 정보 캐시 로드 실패. 빈 캐시로 시작")
+                self.entries = {}
+        return self
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp, self.path)  # 원자적 교체
+
+    def static_stale(self, ticker: str, now: float | None = None) -> bool:
+        e = self.entries.get(ticker)
+        return e is None or (now or time.time()) - e.get("static_at", 0) >= STATIC_TTL_SEC
+
+    def marketcap_stale(self, ticker: str, now: float | None = None) -> bool:
+        e = self.entries.get(ticker)
+        return e is None or (now or time.time()) - e.get("marketcap_at", 0) >= MARKETCAP_TTL_SEC
+
+    def update_full(self, row: StockInfoRow, now: float | None = None):
+        """fetch_stock_info_one 결과 반영. 값을 하나도 못 받았으면 시각을 갱신하지 않아 다음에 재시도"""
+        now = now or time.time()
+        ticker, fullname, exchange, country, marketcap = row
+        if fullname or exchange or country:
+            self.entries.setdefault(ticker, {}).update(
+                fullname=fullname, exchange=exchange, country=country, static_at=now)
+        if marketcap is not None:
+            self.entries.setdefault(ticker, {}).update(marketcap=marketcap, marketcap_at=now)
+
+    def update_marketcap(self, ticker: str, marketcap: Optional[int], now: float | None = None):
+        if marketcap is None:
+            return
+        e = self.entries.setdefault(ticker, {})
+        e.update(marketcap=marketcap, marketcap_at=now or time.time())
+
+    def has_static(self, ticker: str) -> bool:
+        return "static_at" in self.entries.get(ticker, {})
+
+    def row(self, ticker: str) -> StockInfoRow:
+        e = self.entries.get(ticker, {})
+        return (ticker, e.get("fullname"), e.get("exchange"), e.get("country"), e.get("marketcap"))
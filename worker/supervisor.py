@@ -0,0 +1,104 @@
+# 역할별 자식 프로세스 감독
+#   python -m worker.supervisor            → ingest / bot / coin 을 각각 별도 프로세스로 실행
+#   SUPERVISOR_ROLES=ingest,coin 처럼 일부만 실행 가능
+# 자식이 죽으면 백오프 후 다시 띄우고, SIGTERM/SIGINT를 받으면 자식에게 전달한 뒤 종료를 기다린다.
+# 수집 프로세스의 CPU 사용이 코인 웹소켓 처리에 영향을 주지 않도록 GIL/이벤트 루프를 나누는 것이 목적
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+ROLES = [r.strip() for r in os.getenv("SUPERVISOR_ROLES", "ingest,bot,coin").split(",") if r.strip()]
+# 재시작 대기: 1초부터 두 배씩, 최대 RESTART_MAX_SEC. 이 시간 이상 살아 있었으면 대기 초기화
+RESTART_MAX_SEC = float(os.getenv("SUPERVISOR_RESTART_MAX_SEC", "60"))
+HEALTHY_AFTER_SEC = float(os.getenv("SUPERVISOR_HEALTHY_AFTER_SEC", "60"))
+# 종료 신호 후 자식이 끝나기를 기다리는 시간 (넘으면 kill)
+STOP_TIMEOUT_SEC = float(os.getenv("SUPERVISOR_STOP_TIMEOUT_SEC", "15"))
+_POLL_SEC = 0.5
+
+
+class Child:
+    def __init__(self, role: str):
+        self.role = role
+        self.proc: subprocess.Popen | None = None
+        self.started = 0.0
+        self.backoff = 1.0
+        self.restart_at = 0.0
+        self.restarts = 0
+
+    def start(self):
+        self.proc = subprocess.Popen([sys.executable, "-m", "worker.main_worker", "--role", self.role])
+        self.started = time.monotonic()
+        logger.info("[%s] 시작 pid=%d", self.role, self.proc.pid)
+
+    def check(self, now: float):
+        """죽었으면 백오프 후 재시작"""
+        if self.proc is None:
+            if now >= self.restart_at:
+                self.start()
+            return
+        code = self.proc.poll()
+        if code is None:
+            return
+        lived = now - self.started
+        self.backoff = 1.0 if lived >= HEALTHY_AFTER_SEC else min(self.backoff * 2, RESTART_MAX_SEC)
+        self.restart_at = now + self.backoff
+        self.restarts += 1
+        logger.warning("[%s] 종료 (code=%s, %.0fs 실행). %.0fs 후 재시작 (%d회째)",
+                       self.role, code, lived, self.backoff, self.restarts)
+        self.proc = None
+
+    def stop(self):
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.terminate()
+
+    def wait(self, deadline: float):
+        if self.proc is None:
+            return
+        try:
+            self.proc.wait(timeout=max(0.0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            logger.warning("[%s] 종료 시간 초과. kill", self.role)
+            self.proc.kill()
+            self.proc.wait()
+
+
+def run(roles: list[str] = ROLES):
+    children = [Child(role) for role in roles]
+    stopping = False
+
+    def on_signal(signum, _frame):
+        nonlocal stopping
+        logger.info("종료 신호(%s). 자식 프로세스 종료 중", signal.Signals(signum).name)
+        stopping = True
+
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, on_signal)
+
+    for child in children:
+        child.start()
+    while not stopping:
+        now = time.monotonic()
+        for child in children:
+            child.check(now)
+        time.sleep(_POLL_SEC)
+
+    for child in children:
+        child.stop()
+    deadline = time.monotonic() + STOP_TIMEOUT_SEC
+    for child in children:
+        child.wait(deadline)
+    logger.info("모든 자식 프로세스 종료")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    run()
@@ -0,0 +1,102 @@
+# 프로세스 전역 ticker ↔ stock_id 레지스트리
+# 처음 한 번 stock_info 전체를 읽고, 이후로는 stock_info upsert의 RETURNING으로 갱신한다.
+# 모르는 티커는 한 번의 upsert로 일괄 등록 → 가격 수집이 매번 id 조회를 하거나 신규 편입 종목을 건너뛰지 않음
+import logging
+import os
+import threading
+import time
+
+from db.db import db_connection
+
+logger = logging.getLogger(__name__)
+
+# 다시 로드해도 stock_info에 없던 티커(수집 전/상장 폐지)는 이 간격(초) 안에는 다시 로드하지 않음
+TICKER_RELOAD_SEC = float(os.getenv("TICKER_REGISTRY_RELOAD_SEC", "300"))
+
+
+class TickerRegistry:
+    def __init__(self):
+        self._ids: dict[str, int] = {}
+        self._tickers: dict[int, str] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        # 다시 로드한 뒤에도 없던 티커 → 확인 시각 (monotonic)
+        self._absent: dict[str, float] = {}
+
+    def _load(self):
+        with db_connection(readonly=True, autocommit=True) as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT id, ticker FROM stock_info")
+                rows = cur.fetchall()
+        self._update(rows)
+        self._loaded = True
+        logger.info("티커 레지스트리 로드: %d종목", len(rows))
+
+    def _update(self, rows):
+        for sid, ticker in rows:
+            self._ids[ticker] = sid
+            self._tickers[sid] = ticker
+
+    def update(self, rows):
+        """(id, ticker) 행 반영 (stock_info upsert의 RETURNING 결과)"""
+        with self._lock:
+            self._update(rows)
+
+    def ids(self, tickers: list[str], register: bool = True) -> dict[str, int]:
+        """
+        {ticker: stock_id}
+        register: 모르는 티커를 stock_info에 일괄 등록 (이름 등은 다음 stock_info_update_run에서 채워짐)
+                  False면 모르는 티커가 있을 때 다른 프로세스가 등록했을 수 있으므로 한 번 다시 로드
+                  (TICKER_RELOAD_SEC 안에 이미 없다고 확인한 티커뿐이면 다시 로드하지 않음)
+        """
+        with self._lock:
+            fresh = not self._loaded
+            if fresh:
+                self._load()
+            missing = [t for t in dict.fromkeys(tickers) if t not in self._ids]
+            if missing and register:
+                # upsert의 RETURNING에 이미 있던 행도 나오므로 다시 로드할 필요 없음
+                self._register(missing)
+            elif missing:
+                now = time.monotonic()
+                stale = [t for t in missing if t not in self._absent or now - self._absent[t] >= TICKER_RELOAD_SEC]
+                if stale:
+                    if not fresh:
+                        self._load()
+                    for t in stale:
+                        if t not in self._ids:
+                            self._absent[t] = now
+            return {t: self._ids[t] for t in tickers if t in self._ids}
+
+    def _register(self, tickers: list[str]):
+        # DO UPDATE(같은 값)로 해야 이미 있던 행(다른 프로세스가 등록)도 RETURNING에 나옴
+        with db_connection() as conn, conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO stock_info (ticker)
+                    SELECT unnest(%s::text[])
+                    ON CONFLICT (ticker) DO UPDATE SET ticker = EXCLUDED.ticker
+                    RETURNING id, ticker
+                """, (tickers,))
+                rows = cur.fetchall()
+        self._update(rows)
+        logger.info("티커 등록: %s", ", ".join(tickers))
+
+    def tickers(self, stock_ids: list[int]) -> dict[int, str]:
+        """{stock_id: ticker}. 모르는 id가 있으면 다른 프로세스가 등록한 것 → 한 번 다시 로드"""
+        with self._lock:
+            if not self._loaded or any(sid not in self._tickers for sid in stock_ids):
+                self._load()
+            return {sid: self._tickers[sid] for sid in stock_ids if sid in self._tickers}
+
+
+_registry: TickerRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> TickerRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = TickerRegistry()
+        return _registry
@@ -0,0 +1,74 @@
+# 유니버스 레지스트리
+# nasdaq_100.py / kr_index.py 의 종목 리스트를 이름으로 등록하고, 시장별 합집합으로 한 사이클에 종목당 한 번만 가져오게 한다.
+import logging
+import threading
+
+from nasdaq_100 import nasdaq_100, SNP_500
+from kr_index import KOSPI_50, KOSDAQ_150
+
+logger = logging.getLogger(__name__)
+
+US = "US"
+KR = "KR"
+
+# 유니버스 이름 → (시장, 종목 리스트)
+UNIVERSES: dict[str, tuple[str, list[str]]] = {
+    "nasdaq_100": (US, nasdaq_100),
+    "SNP_500": (US, SNP_500),
+    "KOSPI_50": (KR, KOSPI_50),
+    "KOSDAQ_150": (KR, KOSDAQ_150),
+}
+
+_stats_lock = threading.Lock()
+_redundant_avoided = 0
+
+
+def members(name: str) -> list[str]:
+    """유니버스 구성 종목"""
+    return UNIVERSES[name][1]
+
+
+def market_of(name: str) -> str:
+    return UNIVERSES[name][0]
+
+
+def ticker_market(ticker: str) -> str:
+    """티커 접미사로 시장 판별 (.KS/.KQ → KR, 나머지 US)"""
+    return KR if ticker.endswith((".KS", ".KQ")) else US
+
+
+def universes_in(market: str) -> list[str]:
+    return [name for name, (m, _) in UNIVERSES.items() if m == market]
+
+
+def universes_of(ticker: str) -> list[str]:
+    """종목이 속한 유니버스 이름들"""
+    return [name for name, (_, tickers) in UNIVERSES.items() if ticker in tickers]
+
+
+def market_members(market: str) -> list[str]:
+    """시장에 속한 모든 유니버스의 합집합 (등록 순서 유지). 조회 전용, 부수 효과 없음"""
+    return list(dict.fromkeys(t for n in universes_in(market) for t in members(n)))
+
+
+def market_tickers(market: str) -> list[str]:
+    """
+    수집 사이클용 시장 종목 (market_members와 같음)
+    호출할 때마다 중복 제거로 아낀 fetch 수를 로그로 남기고 누적한다. 수집하지 않는 조회는 market_members 사용
+    """
+    global _redundant_avoided
+    names = universes_in(market)
+    total = sum(len(members(n)) for n in names)
+    union = market_members(market)
+
+    with _stats_lock:
+        _redundant_avoided += total - len(union)
+        avoided_total = _redundant_avoided
+    logger.info("[%s] 유니버스 %s: 합계 %d → 중복 제거 %d종목 (이번 %d / 누적 %d개 중복 fetch 절약)",
+                market, "+".join(names), total, len(union), total - len(union), avoided_total)
+    return union
+
+
+def redundant_fetches_avoided() -> int:
+    with _stats_lock:
+        return _redundant_avoided
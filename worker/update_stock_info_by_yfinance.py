@@ -1,13 +1,25 @@
 # 함수의 목적 : 일정 시간마다 실행되어 yfinance를 통해서 주식 종목의 정보를 갱신한다.
 from nasdaq_100 import nasdaq_100
-from db.db import get_connection
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import yfinance as yf
+from db.db import db_connection
 import logging, time
+import csv, io, itertools, json, os, threading
+from datetime import date, timedelta
 from psycopg2.extras import execute_values
 from worker.fetch_stock_info_by_yfinance import fetch_many_stock_info
+from worker.market_data import get_provider, period_days
+from worker.stock_info_cache import StockInfoCache
+from worker.di20_state import apply_price_rows
+from worker import data_version, price_store
+from worker.indicators import apply_changed_rows as update_indicators, table_ready as indicators_ready
+from worker.ticker_registry import get_registry
+from worker.universe import ticker_market
+from worker.events import get_bus, PRICE_INGESTED, PriceIngested
+from common import metrics
+from worker.profiling import profiled, batch_scope
+from worker.pipeline import Stage, run_pipeline
+from worker.fetch_executor import get_fetch_executor
+import numpy as np
 import pandas as pd
-from pandas.api.types import is_datetime64_any_dtype as is_datetime
 
 # 로깅 설정
 logging.basicConfig(
@@ -17,68 +29,166 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def get_stock_ids(tickers: list[str]) -> dict[str, int]:
-    if not tickers:
-        return {}
-    conn = get_connection()
-    try:
-        conn.set_session(readonly=True, autocommit=True)  # SELECT 전용일 때
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT id, ticker
-                FROM stock_info
-                WHERE ticker = ANY(%s::text[])
-            """, (tickers,))
-            return {t: i for i, t in cur.fetchall()}
-    finally:
-        conn.close()
-        
-def save_price_to_db(rows: list[tuple], page_size: int = 1000) -> int:
+# 이 행 수 이상이면 execute_values 대신 COPY + 스테이징 테이블로 저장
+PRICE_COPY_THRESHOLD = int(os.getenv("PRICE_COPY_THRESHOLD", "5000"))
+
+DOWNLOAD_SEC = metrics.histogram("price_download_seconds", "배치 다운로드 시간 (재시도/대기 포함)", ["provider"])
+DOWNLOAD_TICKERS = metrics.counter("price_download_tickers_total", "다운로드 요청 종목 수", ["provider"])
+ROWS_CONVERTED = metrics.counter("price_rows_converted_total", "DataFrame → 저장 행 변환 수")
+ROWS_WRITTEN = metrics.counter("price_rows_written_total", "save_price_to_db에 넘긴 행 수", ["method"])
+ROWS_CHANGED = metrics.counter("price_rows_changed_total", "save_price_to_db로 실제 반영(INSERT+UPDATE)된 행 수", ["method"])
+SAVE_SEC = metrics.histogram("price_save_seconds", "가격 저장 트랜잭션 시간 (지표 갱신 포함)", ["method"])
+SAVE_FAILURES = metrics.counter("price_save_failures_total", "가격 저장 실패 배치 수")
+
+# (stock_id, date) UNIQUE 또는 PK 인덱스가 있어야 합니다.
+_PRICE_UPSERT_CONFLICT = """
+    ON CONFLICT (stock_id, date) DO UPDATE
+    SET open   = EXCLUDED.open,
+        high   = EXCLUDED.high,
+        low    = EXCLUDED.low,
+        close  = EXCLUDED.close,
+        volume = EXCLUDED.volume
+    -- 값이 바뀔 때만 UPDATE (WAL/인덱스 부하 감소)
+    WHERE (stock_prices.open, stock_prices.high, stock_prices.low, stock_prices.close, stock_prices.volume)
+       IS DISTINCT FROM
+          (EXCLUDED.open, EXCLUDED.high, EXCLUDED.low, EXCLUDED.close, EXCLUDED.volume)
+    RETURNING stock_id, date, open, high, low, close, volume
+"""
+
+
+class _CsvRowStream:
+    """rows를 CSV 줄로 조금씩 만들어 COPY에 흘려보내는 파일 객체 (전체 CSV를 메모리에 만들지 않음)"""
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buf = io.StringIO()
+        self._writer = csv.writer(self._buf, lineterminator="\n")
+        self._pending = ""
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._pending) < size:
+            chunk = list(itertools.islice(self._rows, 1000))
+            if not chunk:
+                break
+            self._buf.seek(0)
+            self._buf.truncate()
+            self._writer.writerows(chunk)  # None → 빈 값(= CSV NULL)
+            self._pending += self._buf.getvalue()
+        if size < 0:
+            size = len(self._pending)
+        out, self._pending = self._pending[:size], self._pending[size:]
+        return out
+
+
+def _upsert_prices_values(cur, rows: list[tuple], page_size: int = 1000) -> list[tuple]:
+    sql = """
+        INSERT INTO stock_prices (stock_id, date, open, high, low, close, volume)
+        VALUES %s
+    """ + _PRICE_UPSERT_CONFLICT
+    # template을 명시하면 가독성/안전성↑
+    return execute_values(
+        cur, sql, rows, page_size=page_size,
+        template="(%s,%s,%s,%s,%s,%s,%s)",
+        fetch=True  # RETURNING 결과 받기
+    )
+
+
+def _upsert_prices_copy(cur, rows: list[tuple]) -> list[tuple]:
+    # 트랜잭션 전용 임시 테이블(커밋/롤백 시 삭제, WAL 미기록)에 COPY로 적재
+    cur.execute("DROP TABLE IF EXISTS pg_temp.stock_prices_stage")
+    cur.execute("""
+        CREATE TEMP TABLE stock_prices_stage ON COMMIT DROP AS
+        SELECT stock_id, date, open, high, low, close, volume
+        FROM stock_prices
+        WITH NO DATA
+    """)
+    cur.copy_expert(
+        "COPY stock_prices_stage (stock_id, date, open, high, low, close, volume) FROM STDIN WITH (FORMAT csv)",
+        _CsvRowStream(rows),
+    )
+    # 한 번의 set 기반 upsert로 병합. 같은 (stock_id, date)가 여러 번 오면 마지막 행 사용
+    cur.execute("""
+        INSERT INTO stock_prices (stock_id, date, open, high, low, close, volume)
+        SELECT DISTINCT ON (stock_id, date) stock_id, date, open, high, low, close, volume
+        FROM stock_prices_stage
+        ORDER BY stock_id, date, ctid DESC
+    """ + _PRICE_UPSERT_CONFLICT)
+    return cur.fetchall()
+
+
+def save_price_to_db(rows: list[tuple], page_size: int = 1000, method: str | None = None) -> int:
     """
     rows: [(stock_id, date, open, high, low, close, volume), ...]
+    method: "values"(execute_values) / "copy"(COPY + 스테이징), None이면 행 수로 자동 선택
     return: 반영(INSERT+UPDATE)된 행 수
     """
+    return len(_save_price_rows(rows, page_size, method))
+
+
+def _save_price_rows(rows: list[tuple], page_size: int = 1000, method: str | None = None) -> list[tuple]:
+    """save_price_to_db 본체. return: 실제 반영된 행 (RETURNING)"""
     if not rows:
         logging.info("저장할 행이 없음. DB 작업 생략")
-        return 0
+        return []
 
-    # (stock_id, date) UNIQUE 또는 PK 인덱스가 있어야 합니다.
-    sql = """
-        INSERT INTO stock_prices (stock_id, date, open, high, low, close, volume)
-        VALUES %s
-        ON CONFLICT (stock_id, date) DO UPDATE
-        SET open   = EXCLUDED.open,
-            high   = EXCLUDED.high,
-            low    = EXCLUDED.low,
-            close  = EXCLUDED.close,
-            volume = EXCLUDED.volume
-        -- 값이 바뀔 때만 UPDATE (WAL/인덱스 부하 감소)
-        WHERE (stock_prices.open, stock_prices.high, stock_prices.low, stock_prices.close, stock_prices.volume)
-           IS DISTINCT FROM
-              (EXCLUDED.open, EXCLUDED.high, EXCLUDED.low, EXCLUDED.close, EXCLUDED.volume)
-        RETURNING 1
-    """
+    if method is None:
+        method = "copy" if len(rows) >= PRICE_COPY_THRESHOLD else "values"
 
-    conn = None
+    started = time.perf_counter()
     try:
-        conn = get_connection()
-        with conn:  # 정상 종료 시 commit, 예외 시 rollback
+        with db_connection() as conn, conn:  # 정상 종료 시 commit, 예외 시 rollback
             with conn.cursor() as cur:
-                # template을 명시하면 가독성/안전성↑
-                changed = execute_values(
-                    cur, sql, rows, page_size=page_size,
-                    template="(%s,%s,%s,%s,%s,%s,%s)",
-                    fetch=True  # RETURNING 결과 받기
-                )
+                if method == "copy":
+                    changed = _upsert_prices_copy(cur, rows)
+                else:
+                    changed = _upsert_prices_values(cur, rows, page_size)
                 affected = len(changed)  # 이번 쿼리로 실제 반영(INSERT+UPDATE)된 행 수
-        logging.info("가격 데이터 저장 완료: %d행 반영", affected)
-        return affected
+
+                # 바뀐 봉의 지표만 같은 트랜잭션에서 재계산. 실패해도 가격 저장은 커밋되도록 SAVEPOINT로 분리
+                # (지표 테이블이 아직 없으면 생략)
+                if changed and indicators_ready():
+                    cur.execute("SAVEPOINT indicators")
+                    try:
+                        update_indicators(cur, changed)
+                    except Exception:
+                        logging.exception("지표 갱신 중 예외 발생 (가격 저장은 유지)")
+                        cur.execute("ROLLBACK TO SAVEPOINT indicators")
+        logging.info("가격 데이터 저장 완료(%s): %d행 반영", method, affected)
     except Exception:
         logging.exception("DB 저장 중 예외 발생")
-        return 0
-    finally:
-        if conn:
-            conn.close()
+        SAVE_FAILURES.inc()
+        return []
+    SAVE_SEC.labels(method).observe(time.perf_counter() - started)
+    ROWS_WRITTEN.labels(method).inc(len(rows))
+    ROWS_CHANGED.labels(method).inc(affected)
+
+    # 반영된 봉만 DI20 증분 상태 / 로컬 가격 저장소에 적용 (실패해도 저장 결과에는 영향 없음)
+    try:
+        apply_price_rows([(sid, d, close) for sid, d, _, _, _, close, _ in changed])
+    except Exception:
+        logging.exception("DI20 상태 갱신 중 예외 발생")
+    try:
+        price_store.apply_rows(changed)
+    except Exception:
+        logging.exception("가격 저장소 갱신 중 예외 발생")
+
+    # 실제로 바뀐 행이 있을 때만 데이터 버전 증가 → 스크리너 캐시 무효화 (바뀐 시장만)
+    if affected:
+        tickers_by_id = get_registry().tickers(list({r[0] for r in changed}))
+        data_version.bump({ticker_market(t) for t in tickers_by_id.values()})
+    return changed
+
+
+def _stock_info_filled(tickers: list[str]) -> set[str]:
+    """stock_info에 이름/거래소/국가 중 하나라도 채워진 티커 (티커만 등록된 행이나 없는 행은 제외)"""
+    with db_connection(readonly=True, autocommit=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT ticker
+                FROM stock_info
+                WHERE ticker = ANY(%s::text[])
+                  AND (fullname IS NOT NULL OR exchange IS NOT NULL OR country IS NOT NULL)
+            """, (list(tickers),))
+            return {r[0] for r in cur.fetchall()}
 
 
 def stock_info_update_run(tickers : list):
@@ -86,17 +196,51 @@ def stock_info_update_run(tickers : list):
     if not tickers:
         logger.info("티커 리스트 비어있음.")
         return
-    
+
+    # 캐시에서 만료된 항목만 원격 조회
+    # - 이름/거래소/국가 만료(또는 없음) → 전체 조회
+    # - 시가총액만 만료 → fast_info 한 번
+    # - 캐시는 유효한데 DB에 없는 종목(DB 초기화, 지난번 upsert 실패 등) → 원격 조회 없이 캐시 값으로 upsert
+    cache = StockInfoCache().load()
+    full_targets = [t for t in tickers if cache.static_stale(t)]
+    full_set = set(full_targets)
+    cap_targets = [t for t in tickers if t not in full_set and cache.marketcap_stale(t)]
+    filled = _stock_info_filled(tickers)
+    refresh = full_set.union(cap_targets)
+    db_missing = [t for t in tickers if t not in filled and t not in refresh]
+    logger.info("종목 정보 캐시: 전체 %d / 전체 조회 %d / 시가총액만 %d / DB에 없음 %d / 캐시 사용 %d",
+                len(tickers), len(full_targets), len(cap_targets), len(db_missing),
+                len(tickers) - len(full_targets) - len(cap_targets))
+    if not full_targets and not cap_targets and not db_missing:
+        logger.info("모든 종목 정보가 캐시 유효기간 내이고 DB에 있음. 원격/DB 작업 생략")
+        return
+
     # 티커에 해당하는 종목들 가져오기 병렬로
-    stock_info_list = fetch_many_stock_info(tickers=tickers, max_workers=8)
+    # 실패한 종목은 캐시 시각이 갱신되지 않으므로 다음 실행 때 다시 조회됨
+    failures = {}
+    if full_targets:
+        rows, failed = fetch_many_stock_info(tickers=full_targets)
+        failures.update(failed)
+        for row in rows:
+            cache.update_full(row)
+    if cap_targets:
+        rows, failed = fetch_many_stock_info(tickers=cap_targets, fetch_fn=get_provider().fetch_marketcap)
+        failures.update(failed)
+        for ticker, marketcap in rows:
+            cache.update_marketcap(ticker, marketcap)
+    if failures:
+        logger.warning("종목 정보 조회 실패 %d종목: %s", len(failures), ", ".join(sorted(failures)))
+
+    # 갱신 대상 + DB에 없는 종목만 캐시 값으로 upsert (값이 같으면 DB에서 UPDATE 생략)
+    # 이름/거래소를 한 번도 못 받은 종목은 기존 DB 값을 NULL로 덮지 않도록 제외
+    stock_info_list = [cache.row(t) for t in full_targets + cap_targets + db_missing if cache.has_static(t)]
     if not stock_info_list:
         logger.info("수집된 행이 없음. DB 작업 생략")
+        cache.save()
         return
-    
-    conn = None
+
     try:
-        conn = get_connection()
-        with conn:
+        with db_connection() as conn, conn:
             with conn.cursor() as cur:
                 insert_sql = """
                     INSERT INTO stock_info (ticker, fullname, exchange, country, marketcap)
@@ -109,129 +253,308 @@ def stock_info_update_run(tickers : list):
                     WHERE (stock_info.fullname, stock_info.exchange, stock_info.country, stock_info.marketcap)
                     IS DISTINCT FROM
                         (EXCLUDED.fullname,  EXCLUDED.exchange,  EXCLUDED.country,  EXCLUDED.marketcap)
+                    RETURNING id, ticker
                     """
-                execute_values(cur, insert_sql, stock_info_list, page_size=1000)
-    except Exception as e:
-        logging.exception("DB 저장 중 예외 발생")
-    finally:
-        if conn:
-            conn.close()
-        logging.info("DB 저장 완료")
+                # 새로 들어간 종목의 id를 레지스트리에 바로 반영 → 가격 수집이 다시 조회하지 않음
+                get_registry().update(execute_values(cur, insert_sql, stock_info_list, page_size=1000, fetch=True))
+    except Exception:
+        # 캐시를 저장하지 않으므로 다음 실행 때 같은 종목을 다시 조회/저장
+        logging.exception("DB 저장 중 예외 발생. 종목 정보 캐시 저장 생략")
+        return
+
+    # DB 반영이 커밋된 뒤에만 캐시 시각을 남김 → upsert 실패 시 TTL 동안 누락되지 않음
+    cache.save()
+    logging.info("DB 저장 완료")
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def frame_to_price_rows(df: pd.DataFrame, stock_id_map: dict[str, int],
+                        fallback_ticker: str | None = None) -> list[tuple]:
+    """
+    yf.download 결과 → [(stock_id, date, open, high, low, close, volume), ...]
+    - MultiIndex(level0=ticker, level1=OHLCV)와 단일 레벨(티커 1개) 모두 같은 경로로 처리
+    - 행 단위 파이썬 루프 없이 stack / map / 벡터 연산으로 변환
+    - DB에 없는 티커와 OHLCV가 전부 비어 있는 봉(해당 종목 미거래일)은 제외
+    """
+    if df is None or df.empty:
+        return []
+
+    # 단일 레벨이면 티커 레벨을 붙여 MultiIndex와 같은 모양으로 맞춤
+    # (yfinance가 실패로 일부만 내려주면 이런 케이스가 나올 수 있음)
+    if not (isinstance(df.columns, pd.MultiIndex) and df.columns.nlevels == 2):
+        df = pd.concat({fallback_ticker: df}, axis=1)
+
+    # (날짜, 티커) x OHLCV 로 한 번에 변환
+    long = df.stack(level=0, future_stack=True).reindex(columns=PRICE_COLUMNS)
 
+    tickers = long.index.get_level_values(1)
+    sids = tickers.map(stock_id_map)
+    missing = sorted(set(tickers[sids.isna()]))
+    if missing:
+        logger.warning("DB에 없는 티커(건너뜀): %s", ", ".join(map(str, missing)))
+
+    mask = sids.notna() & long.notna().any(axis=1).to_numpy()
+    if not mask.any():
+        return []
+    long = long[mask]
+
+    # 날짜: 타임존 제거를 인덱스 전체에 한 번에 적용
+    dates = pd.DatetimeIndex(long.index.get_level_values(0))
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+
+    prices = long[PRICE_COLUMNS[:4]].astype(object).where(long[PRICE_COLUMNS[:4]].notna(), None)
+    volume = np.trunc(long["Volume"].to_numpy(dtype=float))
+    volume = pd.array(volume, dtype="Int64").to_numpy(dtype=object, na_value=None)
+
+    return list(zip(
+        sids[mask].astype(int).tolist(),
+        dates.to_pydatetime().tolist(),
+        *(prices[c].tolist() for c in PRICE_COLUMNS[:4]),
+        volume.tolist(),
+    ))
+
+
+# 파이프라인 단계별 동시성 / 단계 사이 큐 크기
+PRICE_DOWNLOAD_WORKERS = int(os.getenv("PRICE_DOWNLOAD_WORKERS", "1"))
+PRICE_CONVERT_WORKERS = int(os.getenv("PRICE_CONVERT_WORKERS", "1"))
+PRICE_WRITE_WORKERS = int(os.getenv("PRICE_WRITE_WORKERS", "2"))
+PRICE_QUEUE_SIZE = int(os.getenv("PRICE_QUEUE_SIZE", "2"))
+
+def _download_batch(job: tuple[list[str], dict]):
+    """다운로드 단계: (batch, download_kwargs) → (batch, DataFrame)"""
+    batch, download_kwargs = job
+    logger.info("배치 %s~%s (%d개, %s) 다운로드 시작",
+                batch[0], batch[-1], len(batch), download_kwargs)
+    # 한 번에 여러 종목 다운로드(MARKET_DATA_PROVIDER로 선택한 공급자), 공용 실행기로 호출 → 속도 제한 / 요청 제한 시 백오프 후 재시도
+    provider = get_provider()
+    DOWNLOAD_TICKERS.labels(provider.name).inc(len(batch))
+    with DOWNLOAD_SEC.labels(provider.name).time():
+        df = get_fetch_executor().call(provider.download, batch, **download_kwargs)
+
+    if df is None or df.empty:
+        logger.info("배치 결과 없음(빈 DF). 건너뜀")
+        return None
+    return batch, df
+
+
+def _save_rows(rows: list[tuple]) -> dict[int, int]:
+    """저장 단계: 배치 단위로 DB 저장 (행 수가 많으면 COPY 경로). return: {stock_id: 반영 행 수}"""
+    with batch_scope(f"write {len(rows)}행"):
+        changed = _save_price_rows(rows)
+    logger.info("배치 저장 완료: %d행 (반영 %d)", len(rows), len(changed))
+    counts: dict[int, int] = {}
+    for row in changed:
+        counts[row[0]] = counts.get(row[0], 0) + 1
+    return counts
+
+
+def _run_price_jobs(jobs: list[tuple[list[str], dict]], stock_id_map: dict[str, int],
+                    publish: bool = True) -> list[PriceIngested]:
+    """
+    jobs: [(batch 티커 리스트, yf.download 인자), ...]
+    다운로드 → 변환 → 저장을 bounded queue로 연결해 네트워크 대기와 DB 저장을 겹쳐서 실행
+    publish: 끝나면 시장별로 수집 완료 이벤트 발행 (바뀐 행이 없어도 발행, rows_changed=0)
+             False면 발행은 호출한 쪽(오케스트레이터의 다음 단계)이 한다.
+    return: 시장별 수집 결과
+    """
+    def convert(item):
+        batch, df = item
+        with batch_scope(f"convert {batch[0]}~{batch[-1]} ({len(batch)}종목)"):
+            rows = frame_to_price_rows(df, stock_id_map, fallback_ticker=batch[0])
+        if not rows:
+            logger.info("배치 변환 결과 0행. 건너뜀")
+            return None
+        ROWS_CONVERTED.inc(len(rows))
+        return rows
+
+    results = run_pipeline(jobs, [
+        Stage("download", _download_batch, PRICE_DOWNLOAD_WORKERS),
+        Stage("convert", convert, PRICE_CONVERT_WORKERS),
+        Stage("write", _save_rows, PRICE_WRITE_WORKERS),
+    ], queue_size=PRICE_QUEUE_SIZE)
+
+    changed: dict[int, int] = {}
+    for counts in results:
+        for sid, n in counts.items():
+            changed[sid] = changed.get(sid, 0) + n
+    events = _ingest_events(stock_id_map, changed)
+    if publish:
+        for event in events:
+            get_bus().publish(PRICE_INGESTED, event)
+    return events
+
+
+def _ingest_events(stock_id_map: dict[str, int], changed: dict[int, int]) -> list[PriceIngested]:
+    by_market: dict[str, list[str]] = {}
+    for ticker in stock_id_map:
+        by_market.setdefault(ticker_market(ticker), []).append(ticker)
+    events = []
+    for market, tickers in by_market.items():
+        changed_tickers = [t for t in tickers if stock_id_map[t] in changed]
+        rows = sum(changed[stock_id_map[t]] for t in changed_tickers)
+        events.append(PriceIngested(market, tickers, changed_tickers, rows))
+    return events
+
+
+@profiled("stock_price_update_by_yfinance_run")
 def stock_price_update_by_yfinance_run(tickers: list, period: str = "10d",
-                                       batch_size: int = 50):
+                                       batch_size: int = 50, publish: bool = True) -> list[PriceIngested]:
     if not tickers:
         logger.info("티커 리스트 비어있음")
-        return
+        return []
+
+    stock_id_map = get_registry().ids(tickers)  # {ticker: id}, 모르는 티커는 등록
+
+    jobs = [(tickers[start:start+batch_size], {"period": period})
+            for start in range(0, len(tickers), batch_size)]
+    events = _run_price_jobs(jobs, stock_id_map, publish)
+
+    logger.info("모든 가격 데이터 저장 종료. 누적 반영 %d", sum(e.rows_changed for e in events))
+    return events
+
+
+# 갭(마지막 저장일 ~ 오늘) 크기별 다운로드 구간(일). 갭이 가장 큰 구간을 넘으면 전체 백필
+SYNC_GAP_TIERS = [7, 31, 92, 366]
+# 저장된 구간 안에서 이 개수보다 많은 봉이 비어 있으면 구멍으로 보고 전체 백필
+# (거래정지일 하루이틀은 원천에 봉이 없어서 백필해도 안 채워지므로 허용)
+SYNC_HOLE_TOLERANCE = int(os.getenv("PRICE_SYNC_HOLE_TOLERANCE", "3"))
+# 백필을 시도한 구멍 기록: {ticker: {"missing": 빈 봉 수, "tried": epoch 초}}
+# 백필 후에도 빈 봉 수가 그대로면(원천에 데이터 없음) PRICE_SYNC_HOLE_RETRY_SEC 동안 다시 백필하지 않는다.
+SYNC_HOLES_PATH = os.getenv("PRICE_SYNC_HOLES_PATH", "cache/price_holes.json")
+SYNC_HOLE_RETRY_SEC = int(os.getenv("PRICE_SYNC_HOLE_RETRY_SEC", str(7 * 24 * 3600)))
+_holes_lock = threading.Lock()
+
+
+def _load_hole_attempts(path: str = SYNC_HOLES_PATH) -> dict[str, dict]:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        logger.exception("구멍 백필 기록 로드 실패. 빈 기록으로 시작")
+        return {}
+
 
-    stock_id_map = get_stock_ids(tickers)  # {ticker: id}
-
-    total_inserted = 0
-    n = len(tickers)
-    for start in range(0, n, batch_size):
-        batch = tickers[start:start+batch_size]
-        logger.info("배치 %d~%d (%d개) 다운로드 시작",
-                    start+1, start+len(batch), len(batch))
-
-        # 한 번에 여러 종목 다운로드
-        # threads=False: yfinance 내부 스레딩 비활성(외부에서 동시성 쓰지 않는다면 안전)
-        df = yf.download(
-            tickers=batch, period=period,
-            auto_adjust=True, rounding=True, progress=False,
-            group_by="ticker", threads=False
-        )
-
-        if df is None or df.empty:
-            logger.info("배치 결과 없음(빈 DF). 건너뜀")
-            continue
-
-        rows_batch = []
-
-        # 멀티-티커일 때: 컬럼이 MultiIndex (level0=ticker, level1=OHLCV)
-        if isinstance(df.columns, pd.MultiIndex) and df.columns.nlevels == 2:
-            # 현재 DF에 실제로 존재하는 티커만 추출
-            present = list(pd.unique(df.columns.get_level_values(0)))
-            for t in present:
-                sid = stock_id_map.get(t)
-                if sid is None:
-                    logger.warning("DB에 없는 티커(건너뜀): %s", t)
-                    continue
-
-                sub = df[t].reset_index()  # Date + OHLCV
-                # 날짜 컬럼 이름 통일
-                dt_cols = [c for c in sub.columns if is_datetime(sub[c])]
-                dt_col = dt_cols[0] if dt_cols else sub.columns[0]
-                if dt_col != "Date":
-                    sub = sub.rename(columns={dt_col: "Date"})
-
-                for rec in sub.itertuples(index=False, name=None):
-                    # rec: (Date, Open, High, Low, Close, Volume) 순서 보장 전 처리
-                    # 필요한 컬럼 순서 맞추기
-                    cols = sub.columns.tolist()
-                    # 안전하게 가져오기
-                    dt    = rec[cols.index("Date")]   if "Date"   in cols else None
-                    open_ = rec[cols.index("Open")]   if "Open"   in cols else None
-                    high_ = rec[cols.index("High")]   if "High"   in cols else None
-                    low_  = rec[cols.index("Low")]    if "Low"    in cols else None
-                    close_= rec[cols.index("Close")]  if "Close"  in cols else None
-                    vol   = rec[cols.index("Volume")] if "Volume" in cols else None
-
-                    # 타임존 제거
-                    if isinstance(dt, pd.Timestamp) and dt.tz is not None:
-                        try:
-                            dt = dt.tz_localize(None)
-                        except Exception:
-                            pass
-                    # 볼륨 정수화
-                    if pd.isna(vol):
-                        vol_out = None
-                    else:
-                        try: vol_out = int(vol)
-                        except Exception: vol_out = None
-
-                    rows_batch.append((sid, dt, open_, high_, low_, close_, vol_out))
-
-        else:
-            # 단일 티커만 반환된 경우(컬럼 단일 레벨)
-            # yfinance가 실패로 일부만 내려주면 이런 케이스가 나올 수 있음
-            t = batch[0]
-            sid = stock_id_map.get(t)
-            if sid is None:
-                logger.warning("DB에 없는 티커(건너뜀): %s", t)
+def _save_hole_attempts(attempts: dict[str, dict], tickers: list[str], path: str = SYNC_HOLES_PATH):
+    """tickers 몫만 반영 (시장별 동기화가 동시에 돌아도 서로의 기록을 덮지 않도록 파일을 다시 읽어서 병합)"""
+    with _holes_lock:
+        merged = _load_hole_attempts(path)
+        for ticker in tickers:
+            if ticker in attempts:
+                merged[ticker] = attempts[ticker]
             else:
-                sub = df.reset_index()
-                dt_cols = [c for c in sub.columns if is_datetime(sub[c])]
-                dt_col = dt_cols[0] if dt_cols else sub.columns[0]
-                if dt_col != "Date":
-                    sub = sub.rename(columns={dt_col: "Date"})
-
-                for rec in sub.itertuples(index=False, name=None):
-                    cols = sub.columns.tolist()
-                    dt    = rec[cols.index("Date")]   if "Date"   in cols else None
-                    open_ = rec[cols.index("Open")]   if "Open"   in cols else None
-                    high_ = rec[cols.index("High")]   if "High"   in cols else None
-                    low_  = rec[cols.index("Low")]    if "Low"    in cols else None
-                    close_= rec[cols.index("Close")]  if "Close"  in cols else None
-                    vol   = rec[cols.index("Volume")] if "Volume" in cols else None
-
-                    if isinstance(dt, pd.Timestamp) and dt.tz is not None:
-                        try: dt = dt.tz_localize(None)
-                        except Exception: pass
-                    if pd.isna(vol):
-                        vol_out = None
-                    else:
-                        try: vol_out = int(vol)
-                        except Exception: vol_out = None
-
-                    rows_batch.append((sid, dt, open_, high_, low_, close_, vol_out))
-
-        if not rows_batch:
-            logger.info("배치 변환 결과 0행. 건너뜀")
-            continue
+                merged.pop(ticker, None)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(merged, f)
+        os.replace(tmp, path)
+
+
+def _hole_already_tried(attempt: dict | None, missing: int, now: float) -> bool:
+    """같은(또는 더 적은) 구멍을 최근에 백필해 봤으면 True. 구멍이 늘었으면 새로 생긴 것이므로 False"""
+    return (attempt is not None and missing <= attempt["missing"]
+            and now - attempt["tried"] < SYNC_HOLE_RETRY_SEC)
+
+
+def get_price_coverage(stock_ids: list[int], since: date) -> dict[int, tuple[date, date, int, int]]:
+    """
+    종목별 저장 현황을 쿼리 1번으로 조회
+    return: {stock_id: (첫 날짜, 마지막 날짜, 저장된 봉 수, 같은 구간의 전체 거래일 수)}
+    전체 거래일 수는 같이 넘긴 종목들에 한 번이라도 있는 날짜로 계산 → 같은 시장 종목끼리 호출할 것
+    """
+    if not stock_ids:
+        return {}
+    with db_connection(readonly=True, autocommit=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                WITH s AS (
+                    SELECT stock_id, date
+                    FROM stock_prices
+                    WHERE stock_id = ANY(%s::int[]) AND date >= %s
+                ),
+                d AS (SELECT DISTINCT date FROM s),
+                agg AS (
+                    SELECT stock_id, min(date) AS first_date, max(date) AS last_date, count(*) AS n
+                    FROM s
+                    GROUP BY stock_id
+                )
+                SELECT a.stock_id, a.first_date, a.last_date, a.n,
+                       (SELECT count(*) FROM d WHERE d.date BETWEEN a.first_date AND a.last_date)
+                FROM agg a
+            """, (list(stock_ids), since))
+            return {sid: (first, last, n, expected) for sid, first, last, n, expected in cur.fetchall()}
 
-        # 배치 단위로 DB 저장 (execute_values 사용 권장)
-        inserted = save_price_to_db(rows_batch)  # 반환값을 반영 행 수로 만들었다면 집계 가능
-        total_inserted += inserted if inserted else 0
-        logger.info("배치 저장 완료: %d행 (누적 %d)", len(rows_batch), total_inserted)
 
-    logger.info("모든 가격 데이터 저장 종료. 누적 반영 %d", total_inserted)
\ No newline at end of file
+def plan_price_sync(stock_id_map: dict[str, int], backfill_period: str = "2y",
+                    today: date | None = None, attempts: dict[str, dict] | None = None,
+                    now: float | None = None) -> dict[str | None, list[str]]:
+    """
+    티커를 필요한 다운로드 구간별로 묶는다.
+    return: {start 날짜 문자열: [티커...]}, 키 None = backfill_period 전체 백필(신규/구멍 있는 종목)
+    attempts: 구멍 백필 기록 (_load_hole_attempts). 이번에 백필하는 구멍을 여기에 추가/갱신한다.
+    """
+    today = today or date.today()
+    now = now or time.time()
+    attempts = {} if attempts is None else attempts
+    coverage = get_price_coverage(list(stock_id_map.values()),
+                                  today - timedelta(days=period_days(backfill_period)))
+
+    plan: dict[str | None, list[str]] = {}
+    for ticker, sid in stock_id_map.items():
+        cov = coverage.get(sid)
+        key = None
+        if cov is not None:
+            first, last, n, expected = cov
+            gap = (today - last).days
+            tier = next((t for t in SYNC_GAP_TIERS if gap <= t), None)
+            missing = expected - n
+            if missing <= SYNC_HOLE_TOLERANCE:
+                attempts.pop(ticker, None)
+            if tier is not None and (missing <= SYNC_HOLE_TOLERANCE
+                                     or _hole_already_tried(attempts.get(ticker), missing, now)):
+                # 마지막 저장 봉도 다시 받아서 장중 값 갱신
+                key = (today - timedelta(days=tier + 1)).isoformat()
+            elif missing > SYNC_HOLE_TOLERANCE:
+                attempts[ticker] = {"missing": missing, "tried": now}
+        plan.setdefault(key, []).append(ticker)
+    return plan
+
+
+@profiled("stock_price_sync_run")
+def stock_price_sync_run(tickers: list, backfill_period: str = "2y", batch_size: int = 50,
+                         publish: bool = True) -> list[PriceIngested]:
+    """
+    저장된 마지막 날짜 기준 증분 동기화
+    - 종목별 max(date)를 한 번에 읽고, 갭 크기가 비슷한 종목끼리 start= 구간으로 다운로드
+    - 신규 종목이나 중간에 빈 봉이 있는 종목만 backfill_period 전체를 받는다
+      (백필해도 안 채워지는 구멍은 기록해 두고 SYNC_HOLE_RETRY_SEC 동안 다시 백필하지 않음)
+    return: 시장별 수집 결과 (publish=False면 이벤트 발행은 호출한 쪽이)
+    """
+    if not tickers:
+        logger.info("티커 리스트 비어있음")
+        return []
+
+    stock_id_map = get_registry().ids(tickers)  # {ticker: id}, 신규 편입 종목은 등록 후 전체 백필
+
+    attempts = _load_hole_attempts()
+    plan = plan_price_sync(stock_id_map, backfill_period, attempts=attempts)
+    logger.info("증분 동기화 계획: %s",
+                ", ".join(f"{k or backfill_period}={len(v)}종목" for k, v in plan.items()))
+
+    jobs = []
+    for start_date, group in plan.items():
+        download_kwargs = {"period": backfill_period} if start_date is None else {"start": start_date}
+        jobs += [(group[start:start+batch_size], download_kwargs)
+                 for start in range(0, len(group), batch_size)]
+    events = _run_price_jobs(jobs, stock_id_map, publish)
+    try:
+        _save_hole_attempts(attempts, list(stock_id_map))
+    except OSError:
+        logger.exception("구멍 백필 기록 저장 실패")
+
+    logger.info("증분 동기화 종료. 누적 반영 %d", sum(e.rows_changed for e in events))
+    return events